@@ -0,0 +1,430 @@
+import asyncio
+import time
+from functools import partial
+from typing import TYPE_CHECKING, AsyncIterator, Dict, List, Optional, Tuple
+
+import httpx
+
+from .parser import extract_article, get_loaded_parser, get_parser
+from .parser.base import BaseParser, FetchedContent, error_result, freshness_fields
+from .search_parser import ParseEvent, SearchParser
+from .utils.cache import TTLCache
+from .utils.cancellation import CancellationToken
+from .utils.domain_stats import DomainStats
+from .utils.http import FetchLimits, FetchRejectedError, HttpSession
+from .utils.logger import logger
+from .utils.negative_cache import NegativeCache
+from .utils.search_cache import SearchResultCache
+from .utils.simhash import NearDuplicateIndex
+
+if TYPE_CHECKING:
+    from .utils.raw_store import RawStore
+
+
+class _Backoff:
+    """一次查詢中正在重試退避的 URL：退避期間不佔同時解析的名額，進入退避時喚醒管線補位"""
+
+    def __init__(self):
+        self.urls = set()
+        self.signal = asyncio.Event()
+
+    async def sleep(self, url: str, delay: float):
+        self.urls.add(url)
+        self.signal.set()
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            self.urls.discard(url)
+
+
+class AsyncSearchParser(SearchParser):
+    """在單一 event loop 上完成 SearxNG 查詢與文章下載，HTML 擷取在執行緒或（設定 extract_workers 時）process pool 進行"""
+
+    def __init__(
+        self,
+        search_engine_url: str = "http://localhost:8080",
+        db_handler=None,
+        timeout: int = 10,
+        max_workers: int = 5,
+        max_concurrency: int = 20,
+        client: Optional[httpx.AsyncClient] = None,
+        search_cache: Optional[SearchResultCache] = None,
+        max_pages: int = 3,
+        http_session: Optional[HttpSession] = None,
+        io_workers: Optional[int] = None,
+        extract_workers: Optional[int] = 0,
+        raw_store: Optional["RawStore"] = None,
+        near_duplicate_index: Optional[NearDuplicateIndex] = None,
+        domain_stats: Optional[DomainStats] = None,
+        negative_cache: Optional[NegativeCache] = None,
+        article_cache: Optional[TTLCache] = None,
+        speculative_parses: Optional[int] = 2,
+        extract_timeout: Optional[float] = 60,
+    ):
+        super().__init__(
+            search_engine_url=search_engine_url,
+            db_handler=db_handler,
+            timeout=timeout,
+            max_workers=max_workers,
+            search_cache=search_cache,
+            max_pages=max_pages,
+            http_session=http_session,
+            io_workers=io_workers,
+            extract_workers=extract_workers,
+            raw_store=raw_store,
+            near_duplicate_index=near_duplicate_index,
+            domain_stats=domain_stats,
+            negative_cache=negative_cache,
+            article_cache=article_cache,
+            speculative_parses=speculative_parses,
+            extract_timeout=extract_timeout,
+        )
+        self.max_concurrency = max_concurrency
+        self._client = client
+        self._owns_client = client is None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                follow_redirects=True,
+                limits=httpx.Limits(max_connections=self.max_concurrency),
+            )
+        return self._client
+
+    async def _run_in_executor(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(func, *args))
+
+    async def _afetch_results(
+        self,
+        query: str,
+        language: Optional[str] = None,
+        safesearch: int = 0,
+        categories: str = "general",
+        engines: Optional[str] = None,
+        time_range: Optional[str] = None,
+        max_results: int = 10,
+        pageno: int = 1,
+    ) -> List[Dict]:
+        try:
+            params, headers = self._build_search_request(
+                query, language, safesearch, categories, engines, time_range, pageno
+            )
+
+            if self.search_cache is not None:
+                # 持久層會查 DB，交給 executor 避免卡住 event loop
+                cached = await self._run_in_executor(self._get_cached_search, params)
+                if cached is not None:
+                    return self._format_search_results(cached, max_results)
+
+            logger.info(f"[搜尋引擎] 開始查詢：{query}（第 {pageno} 頁），最大筆數限制：{max_results}")
+
+            response = await self.client.get(
+                f"{self.search_engine_url}/search", params=params, headers=headers, timeout=self.timeout
+            )
+            response.raise_for_status()
+            data = response.json()
+            if self.search_cache is not None:
+                await self._run_in_executor(self.search_cache.set, params, data)
+            return self._format_search_results(data, max_results)
+
+        except httpx.HTTPError as e:
+            logger.error(f"[SearxNG Error] 搜尋失敗: {e}")
+            return []
+
+    async def _aiter_candidates(
+            self,
+            query: str,
+            max_results: int,
+            **kwargs
+        ) -> AsyncIterator[Tuple[Dict, Optional[Dict]]]:
+        """逐頁產出 (搜尋結果, DB 快取資料或 None)；目前頁面快用完時才以背景 task 預抓下一頁"""
+        seen = set()
+        pageno = 1
+        prefetched = None
+        try:
+            while pageno <= self.max_pages and len(seen) < max_results:
+                if prefetched is not None:
+                    raw = await prefetched
+                    prefetched = None
+                else:
+                    raw = await self._afetch_results(query=query, max_results=max_results, pageno=pageno, **kwargs)
+                pageno += 1
+
+                page = []
+                for r in raw:
+                    if r["url"] in seen:
+                        continue
+                    if len(seen) >= max_results:
+                        break
+                    seen.add(r["url"])
+                    page.append(r)
+                if not page:
+                    return
+                if self.domain_stats is not None:
+                    # 可能重新載入 DB 統計，交給 executor
+                    page = await self._run_in_executor(self.domain_stats.arrange, page)
+                    if not page:
+                        continue
+
+                existing_articles = {}
+                if self.db:
+                    existing_articles = await self._run_in_executor(self._lookup_existing, page)
+                    logger.debug(f"[快取檢查] 資料庫已有 {len(existing_articles)} 篇")
+
+                for i, r in enumerate(page):
+                    can_prefetch = pageno <= self.max_pages and len(seen) < max_results
+                    if prefetched is None and can_prefetch and len(page) - i <= self.max_workers:
+                        prefetched = asyncio.ensure_future(
+                            self._afetch_results(query=query, max_results=max_results, pageno=pageno, **kwargs)
+                        )
+                    yield r, existing_articles.get(r["url"])
+        finally:
+            if prefetched is not None:
+                prefetched.cancel()
+
+    async def _aextract(
+        self, parser: BaseParser, url: str, content: bytes, encoding: Optional[str], fingerprint: bool = False
+    ) -> Dict:
+        if self.extract_executor is None:
+            return await self._run_in_executor(extract_article, url, content, encoding, fingerprint)
+        loop = asyncio.get_running_loop()
+        try:
+            return await asyncio.wait_for(
+                loop.run_in_executor(self.extract_executor, extract_article, url, content, encoding, fingerprint),
+                self.extract_timeout,
+            )
+        except asyncio.TimeoutError:
+            # 不當作可重試的逾時：同一份內容重新擷取結果相同
+            logger.error(f"[AsyncSearchParser] 擷取逾時：{url}")
+            return error_result(f"擷取超過 {self.extract_timeout} 秒")
+
+    async def _afetch_guarded(self, request: Dict, limits: FetchLimits) -> FetchedContent:
+        """串流下載：先檢查標頭，再限制大小逐塊讀取；整段（含連線）受 limits.deadline 限制"""
+        started = time.monotonic()
+
+        async def stream() -> FetchedContent:
+            async with self.client.stream(
+                "GET", request["url"], headers=request["headers"], timeout=min(self.timeout, limits.deadline)
+            ) as response:
+                response.raise_for_status()
+                limits.check_headers(response.headers)
+                body = bytearray()
+                async for chunk in response.aiter_bytes(limits.chunk_size):
+                    body += chunk
+                    limits.check_progress(len(body), started)
+                return FetchedContent(
+                    bytes(body),
+                    response.charset_encoding,
+                    response.status_code,
+                    response.headers.get("ETag"),
+                    response.headers.get("Last-Modified"),
+                )
+
+        try:
+            return await asyncio.wait_for(stream(), timeout=limits.deadline)
+        except asyncio.TimeoutError:
+            raise FetchRejectedError(f"已截斷：下載超過總時限 {limits.deadline} 秒")
+
+    async def _astore_raw(self, url: str, content: bytes, encoding: Optional[str]):
+        try:
+            await self._run_in_executor(self.raw_store.put, url, content, encoding)
+        except Exception as e:
+            logger.error(f"[RawStore] 原始內容寫入失敗：{url} → {e}")
+
+    async def _aparse_article(
+        self, url: str, cancel_token: CancellationToken, fingerprint: bool = False, backoff: Optional[_Backoff] = None
+    ) -> Dict:
+        """url 為實際下載的原始 URL；可重試的失敗以 asyncio.sleep 退避，不佔用 executor 執行緒
+
+        傳入 backoff 時退避期間登記在其中，呼叫端可先以空出的名額處理下一個 URL。
+        """
+        # 第一次遇到某網域時會匯入解析器模組（持有註冊表的鎖），交給 executor 以免卡住 event loop
+        parser = get_loaded_parser(url) or await self._run_in_executor(get_parser, url)
+        policy = parser.retry_policy
+        started = time.monotonic()
+        attempt = 0
+        backoff_seconds = 0.0
+        while True:
+            attempt += 1
+            try:
+                request = parser.build_request(url)
+                if request is None:
+                    # 需要特殊 client（如 cloudscraper）的解析器，下載交給 executor
+                    fetched = await self._run_in_executor(parser.fetch, url, cancel_token, self.http)
+                else:
+                    fetched = await self._afetch_guarded(request, parser.fetch_limits)
+                if self.raw_store is not None:
+                    await self._astore_raw(url, fetched.content, fetched.encoding)
+                parsed = await self._aextract(parser, url, fetched.content, fetched.encoding, fingerprint)
+                return {
+                    **parsed,
+                    **freshness_fields(fetched),
+                    "attempts": attempt,
+                    "backoff_seconds": round(backoff_seconds, 3),
+                    "elapsed_seconds": round(time.monotonic() - started, 3),
+                }
+            except Exception as e:
+                if not cancel_token.cancelled and policy.should_retry(e, attempt, extra_types=(httpx.TransportError,)):
+                    delay = policy.backoff(attempt)
+                    logger.info(f"[重試排程] {url} 第 {attempt} 次失敗（{e}），{delay:.1f} 秒後重試")
+                    if backoff is not None:
+                        await backoff.sleep(url, delay)
+                    else:
+                        await asyncio.sleep(delay)
+                    backoff_seconds += delay
+                    continue
+                logger.error(f"[AsyncSearchParser] 解析失敗：{url} → {e}")
+                return {
+                    **error_result(str(e)),
+                    "attempts": attempt,
+                    "backoff_seconds": round(backoff_seconds, 3),
+                    "elapsed_seconds": round(time.monotonic() - started, 3),
+                }
+
+    @staticmethod
+    def _fetch_url(r: Dict) -> str:
+        return r.get("original_url") or r["url"]
+
+    async def search_and_parse(
+            self,
+            query: str,
+            min_parsed: int = 5,
+            max_attempts: int = 30,
+            near_duplicates: str = "keep",
+            **kwargs
+        ) -> Dict:
+        events = [
+            event async for event in self.aiter_search_and_parse(
+                query, min_parsed=min_parsed, max_attempts=max_attempts, near_duplicates=near_duplicates, **kwargs
+            )
+        ]
+        return self._collect_events(query, iter(events))
+
+    async def aiter_search_and_parse(
+            self,
+            query: str,
+            min_parsed: int = 5,
+            max_attempts: int = 30,
+            near_duplicates: str = "keep",
+            **kwargs
+        ) -> AsyncIterator[ParseEvent]:
+        self._check_near_duplicate_mode(near_duplicates)
+        logger.info(f"[解析流程] 開始處理查詢：{query}，min_parsed={min_parsed}，max_attempts={max_attempts}")
+        candidates = self._aiter_candidates(query, max_attempts, **kwargs)
+        parsed_count = 0
+        failed_count = 0
+        duplicate_count = 0
+        negative_count = 0
+        parse_attempts = 0
+        pending_success = []
+        pending_failed = []
+        in_flight = {}
+        cancel_token = CancellationToken()
+        backoff = _Backoff()
+        fingerprint = self._needs_fingerprint(near_duplicates)
+
+        try:
+            while True:
+                # 補位前清除，之後才進入退避的 URL 會再次喚醒
+                backoff.signal.clear()
+                # 與同步版相同：執行中（不含退避等待中）的數量不超過 needed + speculative_parses 與 max_concurrency，
+                # 達到 min_parsed 後其餘的在 finally 取消
+                while parse_attempts + len(in_flight) < max_attempts:
+                    needed = min_parsed - parsed_count
+                    running = sum(1 for r in in_flight.values() if self._fetch_url(r) not in backoff.urls)
+                    if needed <= 0 or running >= self._parse_slots(needed, self.max_concurrency):
+                        break
+                    try:
+                        r, cached = await candidates.__anext__()
+                    except StopAsyncIteration:
+                        break
+                    if cached is not None and cached.get("negative"):
+                        self.negative_cache.count_saved(r["url"], cached.get("error"))
+                        negative_count += 1
+                        continue
+                    if cached is not None:
+                        parse_attempts += 1
+                        if near_duplicates == "skip" and cached.get("duplicate_of"):
+                            duplicate_count += 1
+                            yield ParseEvent("duplicate", cached)
+                            continue
+                        logger.info(f"[快取命中] 使用 DB 資料：{r['url']}")
+                        parsed_count += 1
+                        yield ParseEvent("cached", cached)
+                        continue
+                    in_flight[
+                        asyncio.ensure_future(self._aparse_article(self._fetch_url(r), cancel_token, fingerprint, backoff))
+                    ] = r
+
+                if parsed_count >= min_parsed:
+                    logger.warning("已達成功上限，提前結束解析")
+                    break
+                if not in_flight:
+                    if parse_attempts >= max_attempts:
+                        logger.warning("達到最大嘗試數量")
+                    break
+
+                # 有文章進入退避時也喚醒，讓空出的名額先處理下一個 URL
+                woken = asyncio.ensure_future(backoff.signal.wait())
+                try:
+                    done, _ = await asyncio.wait(list(in_flight) + [woken], return_when=asyncio.FIRST_COMPLETED)
+                finally:
+                    woken.cancel()
+                for task in done:
+                    # 同一批完成的其餘結果在達標後不再計入，留在 in_flight 於 finally 取消
+                    if parsed_count >= min_parsed:
+                        break
+                    if task not in in_flight:
+                        continue
+                    parse_attempts += 1
+                    r = in_flight.pop(task)
+                    parsed = task.result()
+                    record = {**r, **parsed}
+                    self._record_domain_stats(record)
+                    if self._is_successful(parsed):
+                        # 指紋索引可能查 DB，交給 executor
+                        status = await self._run_in_executor(self._mark_near_duplicate, record, near_duplicates)
+                        if self.db:
+                            pending_success.append(self._db_record(record, near_duplicates))
+                        if status == "duplicate":
+                            duplicate_count += 1
+                            yield ParseEvent("duplicate", record)
+                            continue
+                        logger.info(f"[解析成功] {r['url']}，長度={len(parsed['text'])}")
+                        parsed_count += 1
+                        yield ParseEvent("success", record)
+                    else:
+                        failed_count += 1
+                        if self.db:
+                            pending_failed.append(record)
+                        yield ParseEvent("failed", record)
+        finally:
+            await candidates.aclose()
+            if in_flight:
+                cancel_token.cancel()
+                for task in in_flight:
+                    task.cancel()
+                logger.info(f"[解析流程] 取消 {len(in_flight)} 篇未完成的解析")
+
+            logger.info(
+                f"成功解析 {parsed_count} 篇文章，失敗 {failed_count} 篇，近似重複 {duplicate_count} 篇，"
+                f"負面快取略過 {negative_count} 篇，共嘗試 {parse_attempts} 篇"
+            )
+
+            if self.db:
+                await self._run_in_executor(self._write_results_to_db, query, pending_success, pending_failed)
+
+    async def aclose(self):
+        if self._owns_client and self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        self.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.aclose()
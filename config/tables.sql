@@ -1,6 +1,7 @@
 CREATE TABLE parsed_articles (
     id SERIAL PRIMARY KEY,
     url TEXT UNIQUE,
+    original_url TEXT,
     query TEXT,
     title TEXT,
     snippet TEXT,
@@ -9,6 +10,11 @@ CREATE TABLE parsed_articles (
     score FLOAT,
     text TEXT,
     error TEXT,
+    etag TEXT,
+    last_modified TEXT,
+    fetched_at TIMESTAMP,
+    duplicate_of TEXT,
+    elapsed_seconds FLOAT,
     inserted_at TIMESTAMP DEFAULT now()
 );
 
@@ -16,6 +22,7 @@ CREATE TABLE parsed_articles (
 CREATE TABLE failed_articles (
     id SERIAL PRIMARY KEY,
     url TEXT UNIQUE,
+    original_url TEXT,
     query TEXT,
     title TEXT,
     snippet TEXT,
@@ -24,5 +31,48 @@ CREATE TABLE failed_articles (
     score FLOAT,
     text TEXT,
     error TEXT,
+    elapsed_seconds FLOAT,
+    parser_version TEXT,
     inserted_at TIMESTAMP DEFAULT now()
 );
+
+
+CREATE TABLE search_cache (
+    cache_key TEXT PRIMARY KEY,
+    query TEXT,
+    results TEXT,
+    fetched_at TIMESTAMP DEFAULT now()
+);
+
+
+-- SimHash 指紋切成六段，各段建索引供 LSH 查詢近似重複文章
+CREATE TABLE IF NOT EXISTS article_fingerprints (
+    url TEXT PRIMARY KEY,
+    simhash BIGINT NOT NULL,
+    band0 INTEGER NOT NULL,
+    band1 INTEGER NOT NULL,
+    band2 INTEGER NOT NULL,
+    band3 INTEGER NOT NULL,
+    band4 INTEGER NOT NULL,
+    band5 INTEGER NOT NULL,
+    inserted_at TIMESTAMP DEFAULT now()
+);
+CREATE INDEX IF NOT EXISTS article_fingerprints_band0_idx ON article_fingerprints (band0);
+CREATE INDEX IF NOT EXISTS article_fingerprints_band1_idx ON article_fingerprints (band1);
+CREATE INDEX IF NOT EXISTS article_fingerprints_band2_idx ON article_fingerprints (band2);
+CREATE INDEX IF NOT EXISTS article_fingerprints_band3_idx ON article_fingerprints (band3);
+CREATE INDEX IF NOT EXISTS article_fingerprints_band4_idx ON article_fingerprints (band4);
+CREATE INDEX IF NOT EXISTS article_fingerprints_band5_idx ON article_fingerprints (band5);
+
+
+-- 既有資料表升級
+ALTER TABLE parsed_articles ADD COLUMN IF NOT EXISTS etag TEXT;
+ALTER TABLE parsed_articles ADD COLUMN IF NOT EXISTS last_modified TEXT;
+ALTER TABLE parsed_articles ADD COLUMN IF NOT EXISTS fetched_at TIMESTAMP;
+CREATE INDEX IF NOT EXISTS parsed_articles_fetched_at_idx ON parsed_articles (fetched_at);
+ALTER TABLE parsed_articles ADD COLUMN IF NOT EXISTS original_url TEXT;
+ALTER TABLE failed_articles ADD COLUMN IF NOT EXISTS original_url TEXT;
+ALTER TABLE parsed_articles ADD COLUMN IF NOT EXISTS duplicate_of TEXT;
+ALTER TABLE parsed_articles ADD COLUMN IF NOT EXISTS elapsed_seconds FLOAT;
+ALTER TABLE failed_articles ADD COLUMN IF NOT EXISTS elapsed_seconds FLOAT;
+ALTER TABLE failed_articles ADD COLUMN IF NOT EXISTS parser_version TEXT;
@@ -2,13 +2,121 @@ import psycopg2
 import traceback
 import logging
 import configparser
+import threading
+import time
+import datetime
+import hashlib
+import re
+from contextlib import contextmanager
+
+from psycopg2 import errors
+from psycopg2 import extensions
+from psycopg2 import extras
+from psycopg2 import pool as pg_pool
+
+
+# upsert_data / update_data 的欄位合併規則：{new} 為本次寫入的值，{old} 為資料表原本的值；
+# 也可直接傳入含 {new} / {old} 的 SQL 運算式
+MERGE_RULES = {
+    "overwrite": "{new}",
+    "keep": "{old}",
+    # 新值為 NULL 時保留原值
+    "coalesce": "COALESCE({new}, {old})",
+    # 原值為 NULL 時才寫入
+    "fill": "COALESCE({old}, {new})",
+    "longer": "CASE WHEN length({new}) > COALESCE(length({old}), -1) THEN {new} ELSE {old} END",
+    "greatest": "GREATEST({new}, {old})",
+    "least": "LEAST({new}, {old})",
+}
+
+
+_PARAM_RE = re.compile(r"%(s|%)")
+
+
+def _to_positional(sql):
+    """psycopg2 的 %s 佔位符轉為 PREPARE 用的 $1、$2…，回傳 (sql, 參數個數)"""
+    count = 0
+
+    def replace(match):
+        nonlocal count
+        if match.group(1) == "%":
+            return "%"
+        count += 1
+        return f"${count}"
+
+    return _PARAM_RE.sub(replace, sql), count
+
+
+class _Connection(extensions.connection):
+    """記錄此連線上已 PREPARE 的語句；prepared statement 只存在於建立它的 session"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared_statements = {}
+        self.schema_generation = 0
+        # 保護 prepared_statements，並在 PREPARE 到 EXECUTE 之間不讓其他執行緒 DEALLOCATE
+        self.prepare_lock = threading.RLock()
+
+
+class ConnectionUnavailableError(Exception):
+    pass
+
+
+def _copy_value(value):
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+class _CopyStream:
+    """將資料列逐列轉成 COPY 文字格式，供 copy_expert 分段讀取，不必先組出整份字串"""
+
+    def __init__(self, entries):
+        self._lines = ("\t".join(_copy_value(v) for v in row) + "\n" for row in entries)
+        self._buffer = ""
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            line = next(self._lines, None)
+            if line is None:
+                break
+            self._buffer += line
+        if size < 0:
+            size = len(self._buffer)
+        chunk, self._buffer = self._buffer[:size], self._buffer[size:]
+        return chunk
 
 
 class PostgresHandler:
 
+    ROW_CURSOR_FACTORIES = {
+        "tuple": None,
+        "namedtuple": extras.NamedTupleCursor,
+        "dict": extras.RealDictCursor,
+    }
+
     def __init__(
-        self, config_path='./configs/private/database.ini', section='postgresql', logger=None
+        self, config_path='./configs/private/database.ini', section='postgresql', logger=None,
+        pool_size=None, min_pool_size=None, pool_timeout=30.0, health_check_interval=30.0,
+        prepare_statements=True, max_prepared_statements=100,
     ):
+        """pool_size 為 None 時沿用單一連線；設定後改用連線池，每次執行 SQL 時借出、用完歸還
+
+        min_pool_size 為閒置時保留的連線數（預設與 pool_size 相同），
+        閒置超過 health_check_interval 秒的連線借出前先以 SELECT 1 檢查。
+        prepare_statements 為 False 時不使用伺服器端 prepared statement（如經由 transaction 模式的 PgBouncer 連線）；
+        每條連線最多保留 max_prepared_statements 個，超過時全部釋放後重新準備。
+        """
         self.config = self.load_db_config(filename=config_path, section=section)
         self.host = self.config['host']
         self.port = self.config['port']
@@ -18,6 +126,11 @@ class PostgresHandler:
         self.connection = None
         self.cursor = None
         self.table_header_dict = {}
+        self.column_type_dict = {}
+        self.prepare_statements = prepare_statements
+        self.max_prepared_statements = max_prepared_statements
+        # invalidate_schema 時遞增，連線上較舊的 prepared statement 於下次使用前釋放
+        self._schema_generation = 0
 
         if logger is None:
             self.logger = logging.getLogger("PostgresHandler")
@@ -25,15 +138,47 @@ class PostgresHandler:
         else:
             self.logger = logger
 
+        self.pool = None
+        self.pool_size = pool_size
+        self.min_pool_size = pool_size if min_pool_size is None else min_pool_size
+        self.pool_timeout = pool_timeout
+        self.health_check_interval = health_check_interval
+        self._pool_lock = threading.Lock()
+        self._connection_lock = threading.RLock()
+        self._pool_slots = threading.BoundedSemaphore(pool_size) if pool_size else None
+        self._last_used = {}
+        self._stream_names = 0
+        self._stream_names_lock = threading.Lock()
+        self._metrics = {
+            "checkouts": 0,
+            "wait_seconds_total": 0.0,
+            "wait_seconds_max": 0.0,
+            "timeouts": 0,
+            "reconnects": 0,
+            "health_check_failures": 0,
+            "in_use": 0,
+            "peak_in_use": 0,
+        }
+
+        if pool_size:
+            self._create_pool()
+        else:
+            self._connect()
+
+    def _connect_kwargs(self):
+        return dict(
+            dbname=self.dbname,
+            user=self.user,
+            password=self.password,
+            host=self.host,
+            port=self.port,
+            connect_timeout=5,
+            connection_factory=_Connection,
+        )
+
+    def _connect(self):
         try:
-            self.connection = psycopg2.connect(
-                dbname=self.dbname,
-                user=self.user,
-                password=self.password,
-                host=self.host,
-                port=self.port,
-                connect_timeout=5,
-            )
+            self.connection = psycopg2.connect(**self._connect_kwargs())
             self.cursor = self.connection.cursor()
             self.logger.info(f"[PostgresHandler] Connected to the database.")
         except Exception as e:
@@ -43,6 +188,115 @@ class PostgresHandler:
             self.connection = None  
             self.cursor = None
 
+    def _create_pool(self):
+        with self._pool_lock:
+            if self.pool is not None:
+                return
+            try:
+                self.pool = pg_pool.ThreadedConnectionPool(
+                    self.min_pool_size, self.pool_size, **self._connect_kwargs()
+                )
+                self.logger.info(
+                    f"[PostgresHandler] Connection pool created (min={self.min_pool_size}, max={self.pool_size})."
+                )
+            except Exception as e:
+                self.logger.error(f"[PostgresHandler] Failed to create connection pool: {e}")
+                self.pool = None
+
+    def _is_healthy(self, connection):
+        if connection.closed:
+            return False
+        last_used = self._last_used.get(id(connection))
+        if last_used is not None and time.monotonic() - last_used < self.health_check_interval:
+            return True
+        try:
+            with connection.cursor() as c:
+                c.execute("SELECT 1")
+            connection.rollback()
+            return True
+        except Exception as e:
+            self.logger.warning(f"[PostgresHandler] Health check failed: {e}")
+            self._count("health_check_failures")
+            return False
+
+    def _get_pooled_connection(self):
+        if self.pool is None:
+            self._create_pool()
+            if self.pool is None:
+                raise ConnectionUnavailableError("Connection pool is not available.")
+        for _ in range(self.pool_size + 1):
+            connection = self.pool.getconn()
+            if self._is_healthy(connection):
+                return connection
+            # 斷線的連線丟棄後重新建立
+            self._last_used.pop(id(connection), None)
+            self.pool.putconn(connection, close=True)
+            self._count("reconnects")
+        raise ConnectionUnavailableError("No healthy connection available.")
+
+    @contextmanager
+    def _checkout(self):
+        if self._pool_slots is None:
+            # 單一連線由所有執行緒共用，一次只借給一個執行緒，交易的 commit / rollback 才不會互相波及
+            with self._connection_lock:
+                if self.connection is None or self.connection.closed:
+                    self._connect()
+                if self.connection is None:
+                    raise ConnectionUnavailableError("Database connection is not available.")
+                yield self.connection
+            return
+
+        started = time.monotonic()
+        if not self._pool_slots.acquire(timeout=self.pool_timeout):
+            self._count("timeouts")
+            raise ConnectionUnavailableError(f"Timed out after {self.pool_timeout}s waiting for a pooled connection.")
+        connection = None
+        try:
+            connection = self._get_pooled_connection()
+            waited = time.monotonic() - started
+            with self._pool_lock:
+                self._metrics["checkouts"] += 1
+                self._metrics["wait_seconds_total"] += waited
+                self._metrics["wait_seconds_max"] = max(self._metrics["wait_seconds_max"], waited)
+                self._metrics["in_use"] += 1
+                self._metrics["peak_in_use"] = max(self._metrics["peak_in_use"], self._metrics["in_use"])
+            try:
+                yield connection
+            finally:
+                with self._pool_lock:
+                    self._metrics["in_use"] -= 1
+        finally:
+            if connection is not None:
+                if connection.closed:
+                    self._last_used.pop(id(connection), None)
+                else:
+                    self._last_used[id(connection)] = time.monotonic()
+                # 交易未結束的連線由 putconn 先 rollback
+                self.pool.putconn(connection, close=bool(connection.closed))
+            self._pool_slots.release()
+
+    def _count(self, name):
+        with self._pool_lock:
+            self._metrics[name] += 1
+
+    def pool_metrics(self):
+        """連線池使用狀況：借出次數、等待時間、使用率等（單一連線模式回傳空 dict）"""
+        if self._pool_slots is None:
+            return {}
+        with self._pool_lock:
+            metrics = dict(self._metrics)
+        metrics["size"] = self.pool_size
+        metrics["utilization"] = metrics["in_use"] / self.pool_size
+        metrics["wait_seconds_avg"] = metrics["wait_seconds_total"] / metrics["checkouts"] if metrics["checkouts"] else 0.0
+        return metrics
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.closeall()
+            self.pool = None
+        if self.connection is not None and not self.connection.closed:
+            self.connection.close()
+
     def load_db_config(self, filename='./configs/private/database.ini', section='postgresql'):
         parser = configparser.ConfigParser()
         parser.read(filename)
@@ -56,7 +310,8 @@ class PostgresHandler:
         
         return db
 
-    def _execute_sql(self, sql, entries=[], multiple=False):
+    def _execute_sql(self, sql, entries=[], multiple=False, prepared=False):
+        """prepared=True 時以伺服器端 prepared statement 執行（每條連線只 PREPARE 一次），適合反覆執行的固定 SQL"""
 
         result = {
             "indicator": False,
@@ -65,22 +320,21 @@ class PostgresHandler:
             "data": [],
             "formatted_data": [],
         }
-        if self.connection is None or self.connection.closed:
-            self.logger.error("[PostgresHandler] Database connection is not available.")
-            result["message"] = "Database connection is not available."
-            return result
-        
-        try:
-            c = self.connection.cursor()
 
-            # execute sql
+        def work(c):
+            if prepared and self.prepare_statements:
+                with self._prepared(c, sql) as (name, count):
+                    return execute(c, f"EXECUTE {name}" + (f" ({', '.join(['%s'] * count)})" if count else ""))
+            return execute(c, sql)
+
+        def execute(c, sql_cmd):
             if multiple:
-                c.executemany(sql, entries)
+                c.executemany(sql_cmd, entries)
             else:
                 if entries == []:
-                    c.execute(sql)
+                    c.execute(sql_cmd)
                 else:
-                    c.execute(sql, entries)
+                    c.execute(sql_cmd, entries)
 
             if c.description:
                 result["data"] = c.fetchall()
@@ -89,43 +343,150 @@ class PostgresHandler:
                     {result["header"][i]: value for i, value in enumerate(row)}
                     for row in result["data"]
                 ]
-            else:
-                self.connection.commit() 
+                return False
+            return True
 
-            result["indicator"] = True
-            result["message"] = "Operation succeeded."
+        self._run(work, result)
+        if result["indicator"]:
             self.logger.info(
                 f'[PostgresHandler] execute_sql Success: {result["message"]}'
             )
+        return result
 
-        except Exception as e:
-            traceback.print_exc()
-            self.logger.warning(f"[PostgresHandler] execute_sql Error: {e}")
-            result["message"] = str(e)
-            self.connection.rollback()
+    @contextmanager
+    def _prepared(self, c, sql):
+        """在 cursor 所屬的連線上 PREPARE sql（已準備過則沿用），產出 (語句名稱, 參數個數)
+
+        區塊結束前持有連線的 prepare_lock，EXECUTE 需在區塊內完成。
+        """
+        connection = c.connection
+        with connection.prepare_lock:
+            statements = connection.prepared_statements
+            if connection.schema_generation != self._schema_generation or len(statements) >= self.max_prepared_statements:
+                if statements:
+                    c.execute("DEALLOCATE ALL")
+                    statements.clear()
+                connection.schema_generation = self._schema_generation
+            if sql not in statements:
+                body, count = _to_positional(sql)
+                name = "ps_" + hashlib.md5(sql.encode("utf-8")).hexdigest()[:16]
+                # 以 savepoint 包住，語句已存在時不會讓整個交易進入 aborted 狀態
+                c.execute("SAVEPOINT prepare_statement")
+                try:
+                    c.execute(f"PREPARE {name} AS {body}")
+                except errors.DuplicatePreparedStatement:
+                    # 對照表與伺服器不同步（如同一連線上其他程式碼已準備過）時沿用既有語句
+                    c.execute("ROLLBACK TO SAVEPOINT prepare_statement")
+                c.execute("RELEASE SAVEPOINT prepare_statement")
+                statements[sql] = name, count
+            yield statements[sql]
+
+    def _run(self, work, result):
+        """借出連線執行 work(cursor)，work 回傳 True 時 commit；失敗時 rollback，斷線時重新連線並重試一次"""
+        for attempt in range(2):
+            try:
+                with self._checkout() as connection:
+                    try:
+                        if work(connection.cursor()):
+                            connection.commit()
+                        result["indicator"] = True
+                        result["message"] = "Operation succeeded."
+                        return result
+
+                    except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+                        if connection.closed and attempt == 0:
+                            self.logger.warning(f"[PostgresHandler] Connection lost, reconnecting: {e}")
+                            self._count("reconnects")
+                            # 伺服器重啟時池中其他連線多半也已失效，下次借出時一律重新檢查
+                            self._last_used.clear()
+                            continue
+                        self._handle_error(connection, e, result)
+                        return result
+
+                    except Exception as e:
+                        self._handle_error(connection, e, result)
+                        return result
+
+            except ConnectionUnavailableError as e:
+                self.logger.error(f"[PostgresHandler] {e}")
+                result["message"] = str(e)
+                return result
 
         return result
 
+    def _handle_error(self, connection, e, result):
+        traceback.print_exc()
+        self.logger.warning(f"[PostgresHandler] execute_sql Error: {e}")
+        result["message"] = str(e)
+        if not connection.closed:
+            connection.rollback()
+
     def get_header(self, table_name, force=False, no_ser_pk=False):
+        """資料表欄位名稱，每個資料表只查一次 information_schema；結構變更後以 invalidate_schema 清除"""
+
+        cache_key = (table_name, no_ser_pk)
+        if cache_key in self.table_header_dict and not force:
+            return list(self.table_header_dict[cache_key])
 
-        if table_name in self.table_header_dict and not force:
-            return self.table_header_dict[table_name]
+        table_info = table_name.split(".")  # ex: 'public.inventory'
+        if len(table_info) == 2:
+            schema_name = table_info[0]
+            name = table_info[1]
         else:
-            table_info = table_name.split(".")  # ex: 'public.inventory'
-            if len(table_info) == 2:
-                schema_name = table_info[0]
-                table_name = table_info[1]
-            else:
-                schema_name = "public"
-                table_name = table_info[0]
+            schema_name = "public"
+            name = table_info[0]
 
         sql_cmd = "SELECT column_name FROM information_schema.columns WHERE (table_schema = '{}') AND (table_name = '{}')".format(
-            schema_name, table_name
+            schema_name, name
         )
         if no_ser_pk:
             sql_cmd += " AND (column_default NOT LIKE 'nextval%' OR column_default IS NULL) AND (generation_expression IS NULL)"
+        sql_cmd += " ORDER BY ordinal_position"
         result = self._execute_sql(sql_cmd)
-        return [item[0] for item in result["data"]]
+        headers = [item[0] for item in result["data"]]
+        # 查詢失敗或資料表不存在時不快取
+        if headers:
+            self.table_header_dict[cache_key] = headers
+        return list(headers)
+
+    def invalidate_schema(self, table_name=None):
+        """清除欄位快取並在各連線下次使用前釋放 prepared statement（ALTER TABLE 後呼叫）；table_name 為 None 時清除全部"""
+        for cache_key in list(self.table_header_dict):
+            if table_name is None or cache_key[0] == table_name:
+                self.table_header_dict.pop(cache_key, None)
+        for cached_table in list(self.column_type_dict):
+            if table_name is None or cached_table == table_name:
+                self.column_type_dict.pop(cached_table, None)
+        self._schema_generation += 1
+
+    @staticmethod
+    def _build_select(table, target_column_list, conditional_rule_list, order_by_list, limit_number):
+        sql_cmd = "SELECT "
+        if not target_column_list:
+            sql_cmd += f"* FROM {table} "
+        else:
+            sql_cmd += f"{', '.join(target_column_list)} FROM {table} "
+
+        entries = []
+        if conditional_rule_list:
+            sql_cmd += "WHERE "
+            conditions = []
+            for condition_rule in conditional_rule_list:
+                if 'IN' in condition_rule[0]:
+                    conditions.append(f"{condition_rule[0]}")
+                    entries.extend(condition_rule[1])
+                else:
+                    conditions.append(f"{condition_rule[0]} %s")
+                    entries.append(condition_rule[1])
+            sql_cmd += " AND ".join(conditions) + " "
+
+        if order_by_list:
+            sql_cmd += "ORDER BY " + ", ".join(order_by_list) + " "
+
+        if limit_number > 0:
+            sql_cmd += f"LIMIT {limit_number} "
+
+        return sql_cmd, entries
 
     def get_data(
         self,
@@ -137,31 +498,9 @@ class PostgresHandler:
     ):
 
         try:
-            sql_cmd = "SELECT "
-            if not target_column_list:
-                sql_cmd += f"* FROM {table} "
-            else:
-                sql_cmd += f"{', '.join(target_column_list)} FROM {table} "
-
-            entries = []
-            if conditional_rule_list:
-                sql_cmd += "WHERE "
-                conditions = []
-                for condition_rule in conditional_rule_list:
-                    if 'IN' in condition_rule[0]:
-                        conditions.append(f"{condition_rule[0]}")
-                        entries.extend(condition_rule[1])
-                    else:
-                        conditions.append(f"{condition_rule[0]} %s")
-                        entries.append(condition_rule[1])
-                sql_cmd += " AND ".join(conditions) + " "
-
-            if order_by_list:
-                sql_cmd += "ORDER BY " + ", ".join(order_by_list) + " "
-
-            if limit_number > 0:
-                sql_cmd += f"LIMIT {limit_number} "
-
+            sql_cmd, entries = self._build_select(
+                table, target_column_list, conditional_rule_list, order_by_list, limit_number
+            )
             sql_cmd += ";"
             self.logger.info(
                 f"[PostgresHandler] get_data sql command: {sql_cmd}, entries: {entries}"
@@ -183,10 +522,108 @@ class PostgresHandler:
                 "formatted_data": [],
             }
 
-    def update_data(self, table, editing_list, reference_column_list):
+    @contextmanager
+    def _stream_connection(self):
+        """串流讀取在整個迭代期間佔用一條連線：連線池模式借出一條；
+        單一連線模式另開一條，以免期間其他 SQL 的 commit 關閉伺服器端 cursor"""
+        if self._pool_slots is not None:
+            with self._checkout() as connection:
+                yield connection
+            return
+        try:
+            connection = psycopg2.connect(**self._connect_kwargs())
+        except psycopg2.OperationalError as e:
+            raise ConnectionUnavailableError(f"Failed to open a streaming connection: {e}") from e
+        try:
+            yield connection
+        finally:
+            connection.close()
+
+    def iter_sql(self, sql, entries=[], itersize=2000, row_type="tuple"):
+        """以具名（伺服器端）cursor 執行查詢，每次向伺服器取 itersize 筆，逐筆 yield，不一次載入整個結果
+
+        row_type："tuple"、"namedtuple"（可用欄位名稱取屬性）或 "dict"。
+        連線在迭代結束、中途 break 或 close() 時才歸還；錯誤記錄後直接拋出。
+        """
+        if row_type not in self.ROW_CURSOR_FACTORIES:
+            raise ValueError(f"row_type must be one of {list(self.ROW_CURSOR_FACTORIES)}, got {row_type!r}")
+        sql = sql.strip().rstrip(";")
+        count = 0
+        try:
+            with self._stream_connection() as connection:
+                with self._stream_names_lock:
+                    self._stream_names += 1
+                    name = f"iter_sql_{id(self):x}_{self._stream_names}"
+                c = connection.cursor(name=name, cursor_factory=self.ROW_CURSOR_FACTORIES[row_type])
+                c.itersize = itersize
+                try:
+                    c.execute(sql, entries or None)
+                    for row in c:
+                        count += 1
+                        yield row
+                finally:
+                    if not connection.closed:
+                        c.close()
+                        # 唯讀查詢，結束交易即可
+                        connection.rollback()
+        except Exception as e:
+            self.logger.error(f"[PostgresHandler] iter_sql Error after {count} rows: {e}")
+            raise
+        self.logger.info(f"[PostgresHandler] iter_sql Success: streamed {count} rows.")
+
+    def iter_data(
+        self,
+        table,
+        target_column_list=[],
+        conditional_rule_list=[],
+        order_by_list=[],
+        limit_number=-1,
+        itersize=2000,
+        row_type="tuple",
+    ):
+        """與 get_data 相同的查詢條件，改以 iter_sql 逐筆取回"""
+        sql_cmd, entries = self._build_select(
+            table, target_column_list, conditional_rule_list, order_by_list, limit_number
+        )
+        self.logger.info(
+            f"[PostgresHandler] iter_data sql command: {sql_cmd}, entries: {entries}"
+        )
+        return self.iter_sql(sql_cmd, entries, itersize=itersize, row_type=row_type)
+
+    def get_column_types(self, table):
+        """欄位名稱 → 型別（如 "timestamp without time zone"），供參數轉型用；與 get_header 共用快取的失效方式"""
+        if table in self.column_type_dict:
+            return dict(self.column_type_dict[table])
+        sql_cmd = (
+            "SELECT attname, format_type(atttypid, atttypmod) FROM pg_attribute "
+            "WHERE attrelid = %s::regclass AND attnum > 0 AND NOT attisdropped ORDER BY attnum"
+        )
+        result = self._execute_sql(sql_cmd, [table])
+        if not result["indicator"]:
+            raise Exception(f"Failed to get column types of {table}: {result['message']}")
+        self.column_type_dict[table] = dict(result["data"])
+        return dict(self.column_type_dict[table])
+
+    @staticmethod
+    def _split_key(key):
+        """"title =" → ("title", "=")；未附運算子時視為 "=" """
+        parts = key.split(None, 1)
+        return parts[0], parts[1].strip() if len(parts) > 1 else "="
+
+    @staticmethod
+    def _merge_expression(rule, new, old):
+        return MERGE_RULES.get(rule, rule).format(new=new, old=old)
+
+    def update_data(self, table, editing_list, reference_column_list, merge_rules=None, page_size=500):
+        """以 UPDATE ... FROM (VALUES ...) 批次更新，每 page_size 筆一次往返
+
+        editing_list 的 key 沿用 "欄位 =" 的寫法（也可只寫欄位名稱），每筆需有相同欄位；
+        reference_column_list 為比對用的欄位。merge_rules 指定各欄位的合併規則（見 MERGE_RULES），
+        預設直接覆寫。同一參照值出現多次時只套用最後一筆。回傳值另含 updated（實際更新筆數）。
+        """
 
         if editing_list == []:
-            return {"indicator": True, "message": "Editing list is empty."}
+            return {"indicator": True, "message": "Editing list is empty.", "updated": 0}
         if reference_column_list == []:
             return {"indicator": False, "message": "Reference column list is empty."}
         if not all(
@@ -201,59 +638,153 @@ class PostgresHandler:
             }
 
         try:
-            entries = []
-            sql_cmd = f"UPDATE {table} SET "
+            editing_keys = [key for key in editing_list[0] if key not in reference_column_list]
+            if not editing_keys:
+                return {"indicator": False, "message": "No column to update."}
+            if any(set(data) != set(editing_list[0]) for data in editing_list):
+                return {"indicator": False, "message": "All rows in editing list must have the same columns."}
+            if any(self._split_key(key)[1] != "=" for key in editing_keys):
+                return {"indicator": False, "message": "Editing columns only support '='."}
+
+            keys = editing_keys + list(reference_column_list)
+            columns = [self._split_key(key)[0] for key in keys]
+            column_types = self.get_column_types(table)
+            missing = [column for column in columns if column not in column_types]
+            if missing:
+                return {"indicator": False, "message": f"Columns {missing} not found in table '{table}'."}
+
+            rows = {}
+            for data in editing_list:
+                rows[tuple(data[key] for key in reference_column_list)] = [data[key] for key in keys]
+            entries = list(rows.values())
 
-            set_clauses = {
-                f"{key} %s"
-                for key in editing_list[0]
-                if key not in reference_column_list
-            }
-            sql_cmd += ", ".join(set_clauses) + " WHERE "
+            merge_rules = merge_rules or {}
+            set_cmd = ", ".join(
+                f"{column} = " + self._merge_expression(merge_rules.get(column, "overwrite"), f"v.{column}", f"t.{column}")
+                for column in columns[:len(editing_keys)]
+            )
+            where_cmd = " AND ".join(
+                f"t.{column} {operator} v.{column}"
+                for column, operator in map(self._split_key, reference_column_list)
+            )
+            # VALUES 中的參數沒有型別（NULL、字串皆視為 text），依資料表欄位轉型
+            template = "(" + ", ".join(f"%s::{column_types[column]}" for column in columns) + ")"
+            sql_cmd = (
+                f"UPDATE {table} AS t SET {set_cmd} FROM (VALUES %s) AS v ({', '.join(columns)}) "
+                f"WHERE {where_cmd} RETURNING 1;"
+            )
+            # 不記錄 entries：內含文章全文
+            self.logger.info(f"[PostgresHandler] update_data {table}: {len(entries)} rows, sql command: {sql_cmd}")
+            counts = {}
+
+            def work(c):
+                counts["updated"] = len(
+                    extras.execute_values(c, sql_cmd, entries, template=template, page_size=page_size, fetch=True)
+                )
+                return True
+
+            result = self._run(work, {"indicator": False, "message": ""})
+            if result["indicator"]:
+                result["updated"] = counts["updated"]
+                self.logger.info(f"[PostgresHandler] update_data {table}: updated {result['updated']}")
+            return result
+        except Exception as e:
+            msg = "[PostgresHandler] update_data ERROR: " + str(e)
+            self.logger.error(msg)
+            return {"indicator": False, "message": msg}
 
-            where_clauses = {f"{key} %s" for key in reference_column_list}
-            sql_cmd += " AND ".join(where_clauses) + ";"
+    def upsert_data(
+        self, table, adding_list, unique_columns, adding_header_list=[], to_null=False, merge_rules=None, page_size=500,
+    ):
+        """INSERT ... ON CONFLICT (unique_columns) DO UPDATE 批次寫入，每 page_size 筆一次往返
 
-            for data in editing_list:
-                entries = [
-                    data[key] for key in data if key not in reference_column_list
-                ]
-                entries += [data[key] for key in data if key in reference_column_list]
+        已存在的列依 merge_rules 逐欄合併（見 MERGE_RULES，預設 "overwrite"；"keep" 的欄位只在新增時寫入），
+        例如 {"text": "longer", "published": "coalesce"}。欄位與 to_null 的處理同 add_data，
+        同一鍵值出現多次時只寫入最後一筆。回傳值另含 inserted 與 updated 筆數。
+        """
 
-            self.logger.info(
-                f"[PostgresHandler] update_data sql command: {sql_cmd}, entries: {entries}"
+        if adding_list == []:
+            return {"indicator": True, "message": "Adding list is empty.", "inserted": 0, "updated": 0}
+        if adding_header_list == []:
+            adding_header_list = self.get_header(table, no_ser_pk=True)
+
+        try:
+            unique_list = [column.strip() for column in unique_columns.split(",")]
+            missing = [column for column in unique_list if column not in adding_header_list]
+            if missing:
+                return {"indicator": False, "message": f"Unique columns {missing} are not in adding header list."}
+
+            rows = {}
+            for data in adding_list:
+                row = []
+                for key in adding_header_list:
+                    if key in data:
+                        row.append(data[key])
+                    elif to_null:
+                        row.append(None)
+                    else:
+                        raise Exception("Lack of Data ( {} ): {}".format(table, key))
+                # ON CONFLICT DO UPDATE 不允許同一指令更新同一列兩次
+                rows[tuple(data.get(column) for column in unique_list)] = row
+            entries = list(rows.values())
+
+            merge_rules = merge_rules or {}
+            set_cmd = ", ".join(
+                f"{column} = " + self._merge_expression(merge_rules.get(column, "overwrite"), f"EXCLUDED.{column}", f"t.{column}")
+                for column in adding_header_list
+                if column not in unique_list and merge_rules.get(column) != "keep"
             )
-            result = self._execute_sql(sql_cmd, entries)
-            del result["header"]
-            del result["data"]
+            conflict_cmd = f"DO UPDATE SET {set_cmd}" if set_cmd else "DO NOTHING"
+            # xmax = 0 表示該列為本次新增，否則為更新
+            sql_cmd = (
+                f"INSERT INTO {table} AS t ({', '.join(adding_header_list)}) VALUES %s "
+                f"ON CONFLICT ({', '.join(unique_list)}) {conflict_cmd} RETURNING (xmax = 0);"
+            )
+            self.logger.info(f"[PostgresHandler] upsert_data {table}: {len(entries)} rows, sql command: {sql_cmd}")
+            counts = {}
+
+            def work(c):
+                returned = extras.execute_values(c, sql_cmd, entries, page_size=page_size, fetch=True)
+                counts["inserted"] = sum(1 for (inserted,) in returned if inserted)
+                counts["updated"] = len(returned) - counts["inserted"]
+                return True
+
+            result = self._run(work, {"indicator": False, "message": ""})
+            if result["indicator"]:
+                result.update(counts)
+                self.logger.info(
+                    f"[PostgresHandler] upsert_data {table}: inserted {result['inserted']}, updated {result['updated']}"
+                )
             return result
         except Exception as e:
-            msg = "[PostgresHandler] update_data ERROR: " + str(e)
+            msg = "[PostgresHandler] upsert_data ERROR: " + str(e)
             self.logger.error(msg)
             return {"indicator": False, "message": msg}
 
-    def add_data(self, table, adding_list, adding_header_list=[], to_null=False, on_conflict_do_nothing=True, unique_columns=None):
+    def add_data(
+        self, table, adding_list, adding_header_list=[], to_null=False, on_conflict_do_nothing=True, unique_columns=None,
+        page_size=500, copy_threshold=5000,
+    ):
+        """批次寫入：資料分頁送出，達 copy_threshold 筆時改用 COPY 到暫存表再一次 INSERT
+
+        分頁寫入預設以 prepared statement 執行 INSERT ... SELECT FROM unnest(...)：每欄以一個陣列參數傳入，
+        不論筆數都是同一個語句，每條連線只需解析、規劃一次；資料表含陣列欄位或未啟用 prepare_statements 時改用多列 VALUES。
+
+        回傳值另含 inserted（實際寫入筆數）與 skipped（因衝突略過的筆數）。
+        """
 
         if adding_list == []:
-            return {"indicator": True, "message": "Adding list is empty."}
+            return {"indicator": True, "message": "Adding list is empty.", "inserted": 0, "skipped": 0}
         if adding_header_list == []:
             adding_header_list = self.get_header(table, no_ser_pk=True)
 
         try:
-            column_name_cmd = ""
-            value_cmd = ""
-            for header in adding_header_list:
-                column_name_cmd += header + ", "
-                value_cmd += "%s, "
-            column_name_cmd = column_name_cmd[:-2]
-            value_cmd = value_cmd[:-2]
-            
+            column_name_cmd = ", ".join(adding_header_list)
+
             on_conflict_cmd = ""
             if on_conflict_do_nothing and unique_columns:
                 on_conflict_cmd = f" ON CONFLICT ({unique_columns}) DO NOTHING"
-                sql_cmd = f"INSERT INTO {table} ({column_name_cmd}) VALUES ({value_cmd}){on_conflict_cmd};"
-            else:
-                sql_cmd = f"INSERT INTO {table} ({column_name_cmd}) VALUES ({value_cmd});"
+
             entries = []
 
             for data in adding_list:
@@ -267,18 +798,68 @@ class PostgresHandler:
                         entries[-1].append(None)
                     else:
                         raise Exception("Lack of Data ( {} ): {}".format(table, key))
+
+            use_copy = len(entries) >= copy_threshold
+            column_types = {}
+            if self.prepare_statements and not use_copy:
+                column_types = self.get_column_types(table)
+            # unnest 會攤平陣列欄位，這類資料表仍用 VALUES
+            use_unnest = bool(column_types) and all(
+                key in column_types and not column_types[key].endswith("]") for key in adding_header_list
+            )
+            # 不記錄 entries：內含文章全文
             self.logger.info(
-                f"[PostgresHandler] add_data sql command: {sql_cmd}, entries: {entries}"
+                f"[PostgresHandler] add_data {table}: {len(entries)} rows via "
+                f"{'COPY' if use_copy else 'UNNEST' if use_unnest else 'VALUES'}"
             )
-            result = self._execute_sql(sql_cmd, entries, multiple=True)
-            del result["header"]
-            del result["data"]
+            counts = {}
+
+            def work(c):
+                if use_copy:
+                    counts["inserted"] = self._copy_insert(c, table, adding_header_list, entries, on_conflict_cmd)
+                elif use_unnest:
+                    array_params = ", ".join(f"%s::{column_types[key]}[]" for key in adding_header_list)
+                    insert_cmd = (
+                        f"INSERT INTO {table} ({column_name_cmd}) SELECT * FROM unnest({array_params}){on_conflict_cmd} RETURNING 1"
+                    )
+                    counts["inserted"] = 0
+                    with self._prepared(c, insert_cmd) as (name, _):
+                        for start in range(0, len(entries), page_size):
+                            page = entries[start:start + page_size]
+                            c.execute(f"EXECUTE {name} ({array_params})", [list(column) for column in zip(*page)])
+                            counts["inserted"] += len(c.fetchall())
+                else:
+                    sql_cmd = f"INSERT INTO {table} ({column_name_cmd}) VALUES %s{on_conflict_cmd} RETURNING 1;"
+                    counts["inserted"] = len(extras.execute_values(c, sql_cmd, entries, page_size=page_size, fetch=True))
+                return True
+
+            result = self._run(work, {"indicator": False, "message": ""})
+            if result["indicator"]:
+                result["inserted"] = counts["inserted"]
+                result["skipped"] = len(entries) - counts["inserted"]
+                self.logger.info(
+                    f"[PostgresHandler] add_data {table}: inserted {result['inserted']}, skipped {result['skipped']}"
+                )
             return result
         except Exception as e:
             msg = "[PostgresHandler] add_data ERROR: " + str(e)
             self.logger.error(msg)
             return {"indicator": False, "message": msg}
 
+    @staticmethod
+    def _copy_insert(c, table, headers, entries, on_conflict_cmd):
+        column_name_cmd = ", ".join(headers)
+        staging = f"_staging_{table.replace('.', '_')}"
+        # 暫存表只複製欄位型別，不帶 SERIAL 預設值，交易結束自動刪除
+        c.execute(
+            f"CREATE TEMP TABLE {staging} ON COMMIT DROP AS SELECT {column_name_cmd} FROM {table} WITH NO DATA"
+        )
+        c.copy_expert(f"COPY {staging} ({column_name_cmd}) FROM STDIN", _CopyStream(entries))
+        c.execute(
+            f"INSERT INTO {table} ({column_name_cmd}) SELECT {column_name_cmd} FROM {staging}{on_conflict_cmd}"
+        )
+        return c.rowcount
+
     def delete_data(self, table, filter_list, reference_column_list):
 
         if filter_list == []:
@@ -102,6 +102,25 @@ class DBHandler:
             result_dict["message"] = str(e)
             return result_dict
         
+    def stream_results(self, sql, params=None, batch_size: int = 1000, as_dict: bool = False):
+        """逐筆 yield 查詢結果，每次自 cursor 取 batch_size 筆，不一次載入整個結果
+
+        預設回傳 SQLAlchemy Row（可用索引或欄位名稱屬性存取），as_dict=True 時回傳 dict。
+        連線在迭代結束、中途 break 或 close() 時才歸還；錯誤記錄後直接拋出。
+        """
+        count = 0
+        try:
+            with self.engine.connect() as conn:
+                result = conn.execution_options(stream_results=True).execute(text(sql), params or {})
+                for partition in result.partitions(batch_size):
+                    for row in partition:
+                        count += 1
+                        yield dict(row._mapping) if as_dict else row
+        except Exception as e:
+            self.logger.error(f"[DBHandler] stream_results() error after {count} rows: {e}")
+            raise
+        self.logger.info(f"[DBHandler] Streamed {count} rows for SQL: {sql}")
+
     def get_data(
         self,
         table: str,
@@ -8,6 +8,7 @@ class FailedArticle(Base):
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     url = Column(Text, unique=True)
+    original_url = Column(Text)
     query = Column(Text)
     title = Column(Text)
     snippet = Column(Text)
@@ -16,11 +17,14 @@ class FailedArticle(Base):
     score = Column(Float)
     text = Column(Text)
     error = Column(Text)
+    elapsed_seconds = Column(Float)
+    parser_version = Column(Text)
     
     def to_dict(self):
         return {
             "id": self.id,
             "url": self.url,
+            "original_url": self.original_url,
             "query": self.query,
             "title": self.title,
             "snippet": self.snippet,
@@ -29,4 +33,6 @@ class FailedArticle(Base):
             "score": self.score,
             "text": self.text,
             "error": self.error,
+            "elapsed_seconds": self.elapsed_seconds,
+            "parser_version": self.parser_version,
         }
@@ -8,6 +8,7 @@ class ParsedArticle(Base):
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     url = Column(Text, unique=True)
+    original_url = Column(Text)
     query = Column(Text)
     title = Column(Text)
     snippet = Column(Text)
@@ -16,11 +17,17 @@ class ParsedArticle(Base):
     score = Column(Float)
     text = Column(Text)
     error = Column(Text)
+    etag = Column(Text)
+    last_modified = Column(Text)
+    fetched_at = Column(TIMESTAMP)
+    duplicate_of = Column(Text)
+    elapsed_seconds = Column(Float)
     
     def to_dict(self):
         return {
             "id": self.id,
             "url": self.url,
+            "original_url": self.original_url,
             "query": self.query,
             "title": self.title,
             "snippet": self.snippet,
@@ -29,4 +36,9 @@ class ParsedArticle(Base):
             "score": self.score,
             "text": self.text,
             "error": self.error,
+            "etag": self.etag,
+            "last_modified": self.last_modified,
+            "fetched_at": self.fetched_at.isoformat() if self.fetched_at else None,
+            "duplicate_of": self.duplicate_of,
+            "elapsed_seconds": self.elapsed_seconds,
         }
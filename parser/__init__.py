@@ -1,16 +1,64 @@
 # parser/__init__.py
-from .base import GenericParser
-from .ctee_parser import CteeParser
-from .msn_parser import MSNParser
+from typing import Dict, Optional
 
-PARSERS = [
-    CteeParser(),
-    MSNParser(),
-    GenericParser(),  # fallback 最後使用
-]
+from ..utils.cancellation import CancellationToken
+from ..utils.http import HttpSession
+from ..utils.simhash import simhash
+from .base import BaseParser
+from .registry import ParserRegistry, ParserSpec
 
+# 解析器模組（newspaper、cloudscraper、bs4 等）在第一次遇到對應網域時才載入
+registry = ParserRegistry()
 
-def parse_article(url: str):
-    for parser in PARSERS:
-        if parser.can_handle(url):
-            return parser.parse(url)
+
+def get_parser(url: str) -> BaseParser:
+    return registry.get(url)
+
+
+def get_loaded_parser(url: str) -> Optional[BaseParser]:
+    return registry.get_loaded(url)
+
+
+def register_parser(domain: str, parser: ParserSpec):
+    registry.register(domain, parser)
+
+
+def init_extract_worker(registered_specs: Optional[Dict[str, str]] = None):
+    """擷取用 process pool 的 initializer：補上主程式以 register_parser() 註冊的解析器（不預先載入）"""
+    for domain, spec in (registered_specs or {}).items():
+        registry.register(domain, spec)
+
+
+def parse_article(
+    url: str,
+    cancel_token: Optional[CancellationToken] = None,
+    session: Optional[HttpSession] = None,
+):
+    return get_parser(url).parse(url, cancel_token=cancel_token, session=session)
+
+
+def extract_article(url: str, content: bytes, encoding: Optional[str] = None, fingerprint: bool = False) -> Dict:
+    """供 ProcessPoolExecutor 呼叫的擷取入口；子行程依 URL 自行載入解析器
+
+    子行程以 forkserver / spawn 啟動，不會繼承主程式的解析器實例；SearchParser 建立 process pool 時
+    會把已用 register_parser() 註冊的解析器以 "模組:類別" 傳給子行程重建，之後才註冊的需改用 entry point。
+    fingerprint=True 時，擷取成功後一併計算內文的 SimHash 指紋，供近似重複判斷。
+    """
+    result = get_parser(url).extract(url, content, encoding)
+    if fingerprint and result.get("text") and not result.get("error"):
+        result["simhash"] = simhash(result["text"])
+    return result
+
+
+_LAZY_CLASSES = {
+    "GenericParser": ".generic_parser",
+    "CteeParser": ".ctee_parser",
+    "MSNParser": ".msn_parser",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_CLASSES:
+        import importlib
+        return getattr(importlib.import_module(_LAZY_CLASSES[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
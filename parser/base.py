@@ -1,59 +1,177 @@
 import re
+import time
+from datetime import datetime
 from abc import ABC, abstractmethod
-from typing import Dict, Optional
+from typing import Dict, NamedTuple, Optional
 from urllib.parse import quote
 
-from newspaper import Article
-
+from ..utils.cancellation import CancellationToken, check_cancelled
+from ..utils.http import DEFAULT_FETCH_LIMITS, FetchLimits, HttpSession, get_default_session, read_limited
 from ..utils.logger import logger
-from ..utils.text_utils import clean_wikinews_tail
+from ..utils.retry import RetryPolicy
+
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "zh-TW,zh;q=0.9,en-US;q=0.8,en;q=0.7",
+}
+
+
+def encode_url(url: str) -> str:
+    return quote(url, safe=":/") if not re.fullmatch(r"[ -~]+", url) else url
+
+
+def response_charset(content_type: Optional[str]) -> Optional[str]:
+    """只採用 Content-Type 明確宣告的 charset，未宣告時交給 decode_content 判斷"""
+    match = re.search(r"charset=([\w-]+)", content_type or "", re.I)
+    return match.group(1) if match else None
+
+
+def decode_content(content: bytes, encoding: Optional[str] = None) -> str:
+    if not encoding:
+        match = re.search(rb"<meta[^>]+charset=[\"']?([\w-]+)", content[:4096], re.I)
+        encoding = match.group(1).decode("ascii") if match else "utf-8"
+    try:
+        return content.decode(encoding, errors="replace")
+    except LookupError:
+        return content.decode("utf-8", errors="replace")
+
+
+class FetchedContent(NamedTuple):
+    content: bytes
+    encoding: Optional[str] = None
+    status: int = 200
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    @property
+    def not_modified(self) -> bool:
+        return self.status == 304
+
+
+def conditional_headers(validators: Optional[Dict] = None) -> Dict[str, str]:
+    """依先前保存的 etag / last_modified 組出條件式請求標頭"""
+    headers = {}
+    if validators and validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+    if validators and validators.get("last_modified"):
+        headers["If-Modified-Since"] = validators["last_modified"]
+    return headers
+
+
+def fetched_from_response(
+    response,
+    validators: Optional[Dict] = None,
+    limits: Optional[FetchLimits] = None,
+    started: Optional[float] = None,
+) -> FetchedContent:
+    """requests / cloudscraper 回應轉為 FetchedContent；304 時沿用舊的 validators（除非伺服器給了新的）
+
+    傳入 limits 時 response 需以 stream=True 取得：先檢查標頭，再限制大小與總時限逐塊讀取。
+    """
+    validators = validators or {}
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    if response.status_code == 304:
+        return FetchedContent(
+            b"", None, 304, etag or validators.get("etag"), last_modified or validators.get("last_modified")
+        )
+    response.raise_for_status()
+    if limits is None:
+        content = response.content
+    else:
+        limits.check_headers(response.headers)
+        content = read_limited(response, limits, started or time.monotonic())
+    return FetchedContent(
+        content,
+        response_charset(response.headers.get("Content-Type")),
+        response.status_code,
+        etag,
+        last_modified,
+    )
+
+
+def freshness_fields(fetched: FetchedContent) -> Dict:
+    """寫入 parsed_articles 的驗證欄位，供之後以條件式請求重新驗證"""
+    return {
+        "etag": fetched.etag,
+        "last_modified": fetched.last_modified,
+        "fetched_at": datetime.now(),
+    }
+
+
+def error_result(error: str) -> Dict:
+    return {
+        "title": "",
+        "published": None,
+        "text": "",
+        "error": error
+    }
 
 
 class BaseParser(ABC):
-    @abstractmethod
-    def can_handle(self, url: str) -> bool:
-        pass
+    # 由管線層的 RetryScheduler 依此規則重試 fetch()，解析器本身不再重試或 sleep
+    retry_policy: RetryPolicy = RetryPolicy()
+    # 所有下載都以串流讀取，非文章類型、過大或過慢的回應提早中止
+    fetch_limits: FetchLimits = DEFAULT_FETCH_LIMITS
+    # 擷取邏輯改版時遞增，讓負面快取中「版面不符」的失敗紀錄失效、重新嘗試
+    version: str = "1"
 
     @abstractmethod
-    def parse(self, url: str) -> Optional[Dict]:
+    def extract(self, url: str, content: bytes, encoding: Optional[str] = None) -> Dict:
+        """從已下載的原始內容擷取文章欄位，純 CPU 運算，可交給 executor 執行"""
         pass
-    
 
-class GenericParser(BaseParser):
-    def can_handle(self, url: str) -> bool:
-        return True  # fallback parser
-    
-    def parse(self, url: str) -> Optional[Dict]:
+    def build_request(self, url: str) -> Optional[Dict]:
+        """回傳 {"url", "headers"} 供 HTTP client 直接下載；回傳 None 表示需覆寫 fetch()"""
+        return None
+
+    def fetch(
+        self,
+        url: str,
+        cancel_token: Optional[CancellationToken] = None,
+        session: Optional[HttpSession] = None,
+        validators: Optional[Dict] = None,
+    ) -> FetchedContent:
+        """下載單次原始內容，失敗時直接拋出例外，由呼叫端決定是否重試
+
+        傳入 validators（etag / last_modified）時送出條件式請求，未變更則回傳 status=304 的空內容。
+        """
+        request = self.build_request(url)
+        session = session or get_default_session()
+        check_cancelled(cancel_token)
+        headers = {**request["headers"], **conditional_headers(validators)}
+        started = time.monotonic()
+        response = session.get(
+            request["url"], headers=headers, timeout=self.fetch_limits.socket_timeout(started, 10), stream=True
+        )
         try:
-            logger.info(f"[GenericParser] 嘗試解析: {url}")
-            encoded_url = quote(url, safe=":/") if not re.fullmatch(r"[ -~]+", url) else url
-            article = Article(encoded_url)
-            article.download()
-            article.parse()
-            
-            text = article.text
-            published = article.publish_date
-            if published:
-                published = published.strftime("%Y-%m-%d")
-            if "wikinews.org" in encoded_url:
-                text = clean_wikinews_tail(text)
-            
-            return {
-                    "title": article.title,
-                    "published": published,
-                    "text": text,
-                    "error": None
-                }   
+            fetched = fetched_from_response(response, validators, self.fetch_limits, started)
+        finally:
+            response.close()
+        check_cancelled(cancel_token)
+        return fetched
+
+    def parse(
+        self,
+        url: str,
+        cancel_token: Optional[CancellationToken] = None,
+        session: Optional[HttpSession] = None,
+    ) -> Optional[Dict]:
+        """單次下載並擷取，不重試；失敗時回傳帶 error 的結果"""
+        logger.info(f"[{type(self).__name__}] 解析 {url}")
+        try:
+            fetched = self.fetch(url, cancel_token=cancel_token, session=session)
+            return self.extract(url, fetched.content, fetched.encoding)
         except Exception as e:
-            logger.error(f"[GenericParser] 解析失敗：{e}")
-            return {
-                "title": "",
-                "published": None,
-                "text": "",
-                "error": str(e)
-            }
-            
-        
-                    
-        
-        
\ No newline at end of file
+            logger.error(f"[{type(self).__name__}] 解析失敗：{e}")
+            return error_result(str(e))
+
+
+def __getattr__(name):
+    # GenericParser 已移至 generic_parser，延後匯入以免載入 base 時就載入 newspaper
+    if name == "GenericParser":
+        from .generic_parser import GenericParser
+        return GenericParser
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
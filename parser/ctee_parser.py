@@ -1,94 +1,215 @@
-import re
+import queue
+import threading
 import time
 from typing import Dict, Optional
-from urllib.parse import quote
 
 import cloudscraper
+from cloudscraper.exceptions import CloudflareException
 from bs4 import BeautifulSoup
 
+from ..utils.cancellation import CancellationToken, ParseCancelledError, cancellable_sleep, check_cancelled
+from ..utils.http import DEFAULT_FETCH_LIMITS, FetchLimits, HttpSession
 from ..utils.logger import logger
+from ..utils.retry import DEFAULT_RETRY_ON, DEFAULT_RETRY_STATUSES, RetryPolicy
 from datetime import datetime
 
-from .base import BaseParser
+from .base import BaseParser, FetchedContent, conditional_headers, encode_url, fetched_from_response
 
 
-def fetch_ctee_article_full(url: str, retry: int = 3) -> dict:
-    scraper = cloudscraper.create_scraper(
-        browser={'browser': 'chrome', 'platform': 'windows', 'mobile': False}
+def parse_ctee_html(html) -> dict:
+    soup = BeautifulSoup(html, "html.parser")
+
+    title_tag = soup.find("h1", class_="main-title")
+    title = title_tag.get_text(strip=True) if title_tag else ""
+
+    date_tag = soup.find("li", class_="publish-date")
+    time_tag = soup.find("li", class_="publish-time")
+    date_str = date_tag.find("time").get_text(strip=True) if date_tag else ""
+    time_str = time_tag.find("time").get_text(strip=True) if time_tag else ""
+    publish_datetime = f"{date_str} {time_str}".strip()
+    if publish_datetime:
+        publish_datetime = datetime.strptime(publish_datetime, "%Y-%m-%d")
+
+    article = soup.find("article")
+    if not article:
+        logger.error("找不到 <article> 標籤")
+        raise ValueError("找不到 <article> 標籤")
+
+    paragraphs = article.find_all("p")
+    content = "\n".join(
+        p.get_text(strip=True) for p in paragraphs if p.get_text(strip=True)
     )
 
-    for attempt in range(retry):
+    return {
+        "title": title,
+        "published": publish_datetime,
+        "content": content
+    }
+
+
+# Cloudflare 驗證未通過時常見的狀態碼，遇到時需重建 scraper 重新取得 clearance
+CHALLENGE_STATUS_CODES = (403, 503)
+
+
+class ScraperPoolTimeout(TimeoutError):
+    """池中 scraper 全被佔用且等待逾時；屬 TimeoutError，由重試排程稍後再試"""
+
+
+class ScraperPool:
+    """長駐的 cloudscraper session 池：保留 Cloudflare clearance cookie 與連線，只在驗證失敗時重建"""
+
+    def __init__(self, size: int = 5, browser: Optional[Dict] = None, checkout_timeout: Optional[float] = 30.0):
+        self.size = size
+        self.checkout_timeout = checkout_timeout
+        self.browser = browser or {'browser': 'chrome', 'platform': 'windows', 'mobile': False}
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _create(self):
+        return cloudscraper.create_scraper(browser=self.browser)
+
+    def checkout(self, cancel_token: Optional[CancellationToken] = None, timeout: Optional[float] = None):
+        """取出閒置的 scraper；池未滿時新建，已滿時等待歸還，等待期間每 0.5 秒檢查一次取消與逾時
+
+        timeout 未指定時使用 checkout_timeout，逾時拋出 ScraperPoolTimeout。
+        """
+        timeout = self.checkout_timeout if timeout is None else timeout
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+            # 先佔名額再於鎖外建立；建立失敗時歸還名額，不讓池永久少一個
+            with self._lock:
+                reserved = self._created < self.size
+                if reserved:
+                    self._created += 1
+            if reserved:
+                try:
+                    return self._create()
+                except BaseException:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            check_cancelled(cancel_token)
+            wait = 0.5
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise ScraperPoolTimeout(f"等待可用的 scraper 超過 {timeout} 秒")
+                wait = min(wait, remaining)
+            try:
+                return self._idle.get(timeout=wait)
+            except queue.Empty:
+                continue
+
+    def checkin(self, scraper):
+        self._idle.put(scraper)
+
+    def refresh(self, scraper):
+        """捨棄驗證失敗的 scraper，換一個新的（會重新通過 Cloudflare 驗證）"""
+        logger.info("[CteeParser] Cloudflare 驗證失敗，重建 scraper")
+        # 新的建立成功才關閉舊的；建立失敗時舊 scraper 仍會歸還，名額不會流失
+        fresh = self._create()
+        scraper.close()
+        return fresh
+
+
+_default_scraper_pool = ScraperPool()
+
+
+def fetch_ctee_html(
+    url: str,
+    cancel_token: Optional[CancellationToken] = None,
+    scraper_pool: Optional[ScraperPool] = None,
+    validators: Optional[Dict] = None,
+    limits: FetchLimits = DEFAULT_FETCH_LIMITS,
+) -> FetchedContent:
+    """以池中的 scraper 單次下載；Cloudflare 驗證失敗時先重建 scraper 再拋出例外"""
+    scraper_pool = scraper_pool or _default_scraper_pool
+
+    # 等待 scraper 的時間另以 checkout_timeout 計，不佔用下載總時限
+    scraper = scraper_pool.checkout(cancel_token)
+    started = time.monotonic()
+    try:
+        check_cancelled(cancel_token)
         try:
-            response = scraper.get(url, timeout=10)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, "html.parser")
-
-            title_tag = soup.find("h1", class_="main-title")
-            title = title_tag.get_text(strip=True) if title_tag else ""
-
-            date_tag = soup.find("li", class_="publish-date")
-            time_tag = soup.find("li", class_="publish-time")
-            date_str = date_tag.find("time").get_text(strip=True) if date_tag else ""
-            time_str = time_tag.find("time").get_text(strip=True) if time_tag else ""
-            publish_datetime = f"{date_str} {time_str}".strip()
-            if publish_datetime:
-                publish_datetime = datetime.strptime(publish_datetime, "%Y-%m-%d")
-
-            article = soup.find("article")
-            if not article:
-                logger.error("找不到 <article> 標籤")
-                raise ValueError("找不到 <article> 標籤")
-
-            paragraphs = article.find_all("p")
-            content = "\n".join(
-                p.get_text(strip=True) for p in paragraphs if p.get_text(strip=True)
+            response = scraper.get(
+                url, headers=conditional_headers(validators), timeout=limits.socket_timeout(started, 10), stream=True
             )
+        except CloudflareException:
+            scraper = scraper_pool.refresh(scraper)
+            raise
+        try:
+            if response.status_code in CHALLENGE_STATUS_CODES:
+                scraper = scraper_pool.refresh(scraper)
+            fetched = fetched_from_response(response, validators, limits, started)
+        finally:
+            response.close()
+        check_cancelled(cancel_token)
+        return fetched
+    finally:
+        scraper_pool.checkin(scraper)
 
-            return {
-                "title": title,
-                "published": publish_datetime,
-                "content": content
-            }
 
+def fetch_ctee_article_full(
+    url: str,
+    retry: int = 3,
+    cancel_token: Optional[CancellationToken] = None,
+    scraper_pool: Optional[ScraperPool] = None,
+) -> dict:
+    """管線外單獨使用的同步版本（含重試等待）；SearchParser 內的重試由 RetryScheduler 排程"""
+    for attempt in range(retry):
+        try:
+            if attempt > 0:
+                cancellable_sleep(2, cancel_token)
+            fetched = fetch_ctee_html(url, cancel_token=cancel_token, scraper_pool=scraper_pool)
+            return parse_ctee_html(fetched.content)
+
+        except ParseCancelledError as e:
+            return {"error": str(e)}
         except Exception as e:
-            print(f"[第 {attempt+1} 次嘗試失敗]：{e}")
-            if attempt < 2:
-                time.sleep(2)
-            else:
+            logger.warning(f"[CteeParser] 第 {attempt+1} 次嘗試失敗：{url} → {e}")
+            if attempt >= retry - 1:
                 return {"error": str(e)}
-            
+
+
 class CteeParser(BaseParser):
-    def can_handle(self, url: str) -> bool:
-        return "ctee.com.tw" in url
-    
-    def parse(self, url: str) -> Optional[Dict]:
-        logger.info(f"[CteeParser] 解析 {url}")
-        try:
-            encoded_url = quote(url, safe=":/") if not re.fullmatch(r"[ -~]+", url) else url
-            result = fetch_ctee_article_full(url=encoded_url)
-            if "error" not in result:
-                return {
-                    "title": result["title"],
-                    "published": result["published"],
-                    "text": result["content"],
-                    "error": None
-                }
-            return {
-                "title": "",
-                "published": None,
-                "text": "",
-                "error": result["error"]
-            }
-        except Exception as e:
-            logger.error(f"[GenericParser] 解析失敗：{e}")
-            return {
-                "title": "",
-                "published": None,
-                "text": "",
-                "error": str(e)
-            }
-            
-            
+    # 403/503 多半是 Cloudflare 驗證失敗，重建 scraper 後值得再試一次
+    retry_policy = RetryPolicy(
+        retry_on=DEFAULT_RETRY_ON + (CloudflareException,),
+        retry_statuses=CHALLENGE_STATUS_CODES + DEFAULT_RETRY_STATUSES,
+        max_attempts=3,
+        base_delay=2.0,
+        max_delay=8.0,
+    )
 
+    def __init__(self, scraper_pool: Optional[ScraperPool] = None):
+        self.scraper_pool = scraper_pool or _default_scraper_pool
 
+    def fetch(
+        self,
+        url: str,
+        cancel_token: Optional[CancellationToken] = None,
+        session: Optional[HttpSession] = None,
+        validators: Optional[Dict] = None,
+    ) -> FetchedContent:
+        # 工商時報需通過 Cloudflare 驗證，使用 cloudscraper 池而非共用 session
+        return fetch_ctee_html(
+            encode_url(url),
+            cancel_token=cancel_token,
+            scraper_pool=self.scraper_pool,
+            validators=validators,
+            limits=self.fetch_limits,
+        )
 
+    def extract(self, url: str, content: bytes, encoding: Optional[str] = None) -> Dict:
+        result = parse_ctee_html(content)
+        return {
+            "title": result["title"],
+            "published": result["published"],
+            "text": result["content"],
+            "error": None
+        }
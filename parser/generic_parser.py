@@ -0,0 +1,33 @@
+from typing import Dict, Optional
+
+from newspaper import Article
+
+from ..utils.text_utils import clean_wikinews_tail
+from .base import DEFAULT_HEADERS, BaseParser, decode_content, encode_url
+
+
+class GenericParser(BaseParser):
+    def build_request(self, url: str) -> Optional[Dict]:
+        return {"url": encode_url(url), "headers": DEFAULT_HEADERS}
+
+    def extract(self, url: str, content: bytes, encoding: Optional[str] = None) -> Dict:
+        encoded_url = encode_url(url)
+        article = Article(encoded_url)
+        article.download(input_html=decode_content(content, encoding))
+        article.parse()
+        return self._article_result(article, encoded_url)
+
+    def _article_result(self, article: Article, encoded_url: str) -> Dict:
+        text = article.text
+        published = article.publish_date
+        if published:
+            published = published.strftime("%Y-%m-%d")
+        if "wikinews.org" in encoded_url:
+            text = clean_wikinews_tail(text)
+
+        return {
+                "title": article.title,
+                "published": published,
+                "text": text,
+                "error": None
+            }
@@ -1,13 +1,13 @@
+import json
 import re
 from datetime import datetime
-from urllib.parse import quote
+from typing import Dict, Optional
 
-import requests
 from bs4 import BeautifulSoup
 
 from ..utils.logger import logger
 
-from .base import BaseParser
+from .base import BaseParser, encode_url
 
 
 def parse_msn_article_json(article_json: dict) -> dict:
@@ -30,51 +30,31 @@ def parse_msn_article_json(article_json: dict) -> dict:
         "content": content
     }
 
-def fetch_and_parse_msn_article(msn_url: str) -> dict:
+MSN_API_HEADERS = {
+    "User-Agent": "Mozilla/5.0",
+    "Accept": "application/json"
+}
+
+
+def build_msn_api_url(msn_url: str) -> str:
     match = re.search(r'/ar-([A-Za-z0-9]+)', msn_url)
     if not match:
-        logger
+        logger.error(f"[MSNParser] 無法從網址中擷取文章 ID：{msn_url}")
         raise ValueError("無法從網址中擷取文章 ID")
 
     article_id = match.group(1)
-    api_url = f"https://assets.msn.com/content/view/v2/Detail/zh-tw/{article_id}"
-
-    headers = {
-        "User-Agent": "Mozilla/5.0",
-        "Accept": "application/json"
-    }
-    response = requests.get(api_url, headers=headers, timeout=10)
-    response.raise_for_status()
+    return f"https://assets.msn.com/content/view/v2/Detail/zh-tw/{article_id}"
 
-    article_json = response.json()
-    return parse_msn_article_json(article_json)
 
 class MSNParser(BaseParser):
-    def can_handle(self, url: str) -> bool:
-        return "msn.com" in url
-    
-    def parse(self, url: str):
-        logger.info(f"[MSNParser] 解析 {url}")
-        try:
-            encoded_url = quote(url, safe=":/") if not re.fullmatch(r"[ -~]+", url) else url
-            result = fetch_and_parse_msn_article(encoded_url)
-            if "error" not in result:
-                return {
-                    "title": result["title"],
-                    "published": result["published"],
-                    "text": result["content"],
-                    "error": None
-                }
-            return {
-                "title": "",
-                "published": None,
-                "error": result["error"]
-            }
-        except Exception as e:
-            logger.error(f"[GenericParser] 解析失敗：{e}")
-            return {
-                "title": "",
-                "published": None,
-                "text": "",
-                "error": str(e)
-            }            
\ No newline at end of file
+    def build_request(self, url: str) -> Optional[Dict]:
+        return {"url": build_msn_api_url(encode_url(url)), "headers": MSN_API_HEADERS}
+
+    def extract(self, url: str, content: bytes, encoding: Optional[str] = None) -> Dict:
+        result = parse_msn_article_json(json.loads(content))
+        return {
+            "title": result["title"],
+            "published": result["published"],
+            "text": result["content"],
+            "error": None
+        }
@@ -0,0 +1,157 @@
+import importlib
+import threading
+from typing import Dict, Iterator, Optional, Type, Union
+from urllib.parse import urlsplit
+
+from ..utils.logger import logger
+from .base import BaseParser
+
+ENTRY_POINT_GROUP = "searchparser.parsers"
+
+# 網域後綴 → "模組:類別"，模組在第一次遇到該網域時才匯入
+BUILTIN_PARSERS = {
+    "ctee.com.tw": ".ctee_parser:CteeParser",
+    "msn.com": ".msn_parser:MSNParser",
+}
+DEFAULT_PARSER = ".generic_parser:GenericParser"
+
+ParserSpec = Union[str, BaseParser, Type[BaseParser]]
+
+
+def _iter_entry_points():
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:
+        return []
+    eps = entry_points()
+    # Python 3.10+ 為 EntryPoints.select，3.8/3.9 為 dict
+    if hasattr(eps, "select"):
+        return eps.select(group=ENTRY_POINT_GROUP)
+    return eps.get(ENTRY_POINT_GROUP, [])
+
+
+class ParserRegistry:
+    """以網域後綴索引的解析器註冊表
+
+    查詢時依主機名稱由長到短比對後綴（news.msn.com → msn.com → com），
+    每個 URL 只需數次 dict 查詢；解析器模組與實例都在第一次用到時才建立。
+    第三方套件可在 entry point 群組 "searchparser.parsers" 以網域為名稱註冊，例如：
+
+        [project.entry-points."searchparser.parsers"]
+        "example.com" = "my_pkg.parsers:ExampleParser"
+    """
+
+    def __init__(self, default: ParserSpec = DEFAULT_PARSER, load_entry_points: bool = True):
+        self._specs: Dict[str, object] = dict(BUILTIN_PARSERS)
+        self._instances: Dict[str, BaseParser] = {}
+        self._registered = set()
+        self._default = default
+        self._default_instance: Optional[BaseParser] = None
+        self._entry_points_loaded = not load_entry_points
+        self._lock = threading.Lock()
+
+    def register(self, domain: str, parser: ParserSpec):
+        """註冊網域後綴對應的解析器，可傳入實例、類別或 "模組:類別" 字串"""
+        domain = domain.lower().lstrip(".")
+        with self._lock:
+            self._specs[domain] = parser
+            self._instances.pop(domain, None)
+            self._registered.add(domain)
+
+    def unregister(self, domain: str):
+        domain = domain.lower().lstrip(".")
+        with self._lock:
+            self._specs.pop(domain, None)
+            self._instances.pop(domain, None)
+            self._registered.discard(domain)
+
+    @staticmethod
+    def _suffixes(url: str) -> Iterator[str]:
+        labels = (urlsplit(url).hostname or "").lower().split(".")
+        for i in range(len(labels)):
+            yield ".".join(labels[i:])
+
+    def get(self, url: str) -> BaseParser:
+        if not self._entry_points_loaded:
+            self._load_entry_points()
+
+        for domain in self._suffixes(url):
+            parser = self._instances.get(domain)
+            if parser is not None:
+                return parser
+            if domain in self._specs:
+                return self._instantiate(domain)
+        return self._get_default()
+
+    def get_loaded(self, url: str) -> Optional[BaseParser]:
+        """與 get() 相同，但只回傳已載入的解析器，需要匯入模組時回傳 None；不取鎖，可直接在 event loop 上呼叫"""
+        if not self._entry_points_loaded:
+            return None
+        for domain in self._suffixes(url):
+            parser = self._instances.get(domain)
+            if parser is not None:
+                return parser
+            if domain in self._specs:
+                return None
+        return self._default_instance
+
+    def _instantiate(self, domain: str) -> BaseParser:
+        with self._lock:
+            parser = self._instances.get(domain)
+            if parser is None:
+                parser = self._load(self._specs[domain])
+                self._instances[domain] = parser
+                logger.debug(f"[ParserRegistry] 載入 {domain} 解析器：{type(parser).__name__}")
+            return parser
+
+    def _get_default(self) -> BaseParser:
+        if self._default_instance is None:
+            with self._lock:
+                if self._default_instance is None:
+                    self._default_instance = self._load(self._default)
+        return self._default_instance
+
+    @staticmethod
+    def _load(spec) -> BaseParser:
+        if isinstance(spec, BaseParser):
+            return spec
+        if isinstance(spec, str):
+            module_name, _, attr = spec.partition(":")
+            spec = getattr(importlib.import_module(module_name, package=__package__), attr)
+        elif hasattr(spec, "load") and not isinstance(spec, type):
+            # importlib.metadata.EntryPoint
+            spec = spec.load()
+        return spec() if isinstance(spec, type) else spec
+
+    def registered_specs(self) -> Dict[str, str]:
+        """以 register() 註冊的解析器，轉成可傳給子行程的 "模組:類別" 字串
+
+        實例只能以其類別重建（建構參數不會保留）；函式內定義等無法以名稱匯入的類別在子行程載入時失敗，
+        該網域會改回報擷取錯誤。
+        """
+        specs = {}
+        with self._lock:
+            for domain in self._registered:
+                spec = self._specs[domain]
+                if isinstance(spec, BaseParser):
+                    spec = type(spec)
+                if isinstance(spec, type):
+                    spec = f"{spec.__module__}:{spec.__qualname__}"
+                if isinstance(spec, str):
+                    specs[domain] = spec
+        return specs
+
+    def _load_entry_points(self):
+        with self._lock:
+            if self._entry_points_loaded:
+                return
+            self._entry_points_loaded = True
+            try:
+                for ep in _iter_entry_points():
+                    # entry point 可覆寫內建解析器，但不覆寫以 register() 手動註冊的
+                    domain = ep.name.lower().lstrip(".")
+                    if domain not in self._registered:
+                        self._specs[domain] = ep
+                        self._instances.pop(domain, None)
+            except Exception as e:
+                logger.error(f"[ParserRegistry] 讀取 entry points 失敗：{e}")
@@ -1,12 +1,380 @@
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from datetime import datetime
-from .parser import parse_article
-from typing import Dict, List, Optional
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, InvalidStateError, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from datetime import datetime, timedelta
+from itertools import islice
+from .parser import extract_article, get_parser, init_extract_worker, registry
+from .parser.base import FetchedContent, error_result, freshness_fields
+from typing import TYPE_CHECKING, AbstractSet, AsyncIterator, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
 
 import requests
 
+from .utils.cache import TTLCache
+from .utils.cancellation import CancellationToken
+from .utils.db import execute_sql
+from .utils.domain_stats import DomainStats
+from .utils.http import HttpSession, get_default_session
 from .utils.logger import logger
+from .utils.negative_cache import NegativeCache
+from .utils.retry import RetryScheduler
+from .utils.search_cache import SearchResultCache
+from .utils.simhash import NearDuplicateIndex
 from .utils.text_utils import extract_date_from_metadata, parse_published_date
+from .utils.url_utils import canonicalize_url
+
+if TYPE_CHECKING:
+    # raw_store 需要 zstandard，僅在使用時由呼叫端匯入
+    from .utils.raw_store import RawStore
+
+
+SEARCH_HEADERS = {
+    "User-Agent": "Mozilla/5.0",
+    "Accept": "*/*",
+    "Accept-Language": "zh-TW,zh;q=0.9,en-US;q=0.8,en;q=0.7",
+    "Cache-Control": "no-cache",
+    "Pragma": "no-cache",
+    "Connection": "keep-alive",
+}
+
+# 快取查詢的 SQL 固定不變（URL 以陣列參數傳入），DB 可重用執行計畫。
+# skip / link 模式存下的近似重複列沒有全文，改取原文的內文；原文已不存在時視為未快取
+EXISTING_ARTICLES_SQL = """
+    SELECT p.url, p.title, p.snippet, p.engine, p.published, p.score,
+           COALESCE(p.text, c.text) AS text, p.error, p.duplicate_of,
+           NULL AS parser_version, NULL AS failed_at, FALSE AS failed
+    FROM parsed_articles p
+    LEFT JOIN parsed_articles c ON p.text IS NULL AND c.url = p.duplicate_of
+    WHERE p.url = ANY(%s) AND (p.duplicate_of IS NULL OR COALESCE(p.text, c.text) IS NOT NULL)
+"""
+EXISTING_AND_FAILED_ARTICLES_SQL = EXISTING_ARTICLES_SQL + """
+    UNION ALL
+    SELECT url, title, snippet, engine, published, score, text, error, NULL,
+           parser_version, inserted_at, TRUE
+    FROM failed_articles
+    WHERE url = ANY(%s)
+"""
+DELETE_FAILED_ARTICLES_SQL = "DELETE FROM failed_articles WHERE url = ANY(%s)"
+DELETE_PARSED_ARTICLES_SQL = "DELETE FROM parsed_articles WHERE url = ANY(%s)"
+REPARSE_PREVIOUS_SQL = """
+    SELECT url, query, snippet, engine, score, published, etag, last_modified, fetched_at
+    FROM parsed_articles WHERE url = ANY(%s)
+    UNION ALL
+    SELECT url, query, snippet, engine, score, published, NULL, NULL, NULL
+    FROM failed_articles WHERE url = ANY(%s)
+"""
+# 重新解析時沿用舊資料的欄位，新值為 NULL 時保留原值
+REPARSE_CARRIED_COLUMNS = ("query", "snippet", "engine", "score", "published", "etag", "last_modified", "fetched_at")
+REFRESH_CANDIDATES_SQL = "SELECT url, original_url, etag, last_modified, fetched_at FROM parsed_articles WHERE url = ANY(%s)"
+
+# keep：照常計入與儲存；skip：不計入 min_parsed；link：計入但 DB 只存指向原文的連結
+NEAR_DUPLICATE_MODES = ("keep", "skip", "link")
+
+
+class ParseEvent(NamedTuple):
+    """串流解析的單筆結果，status 為 success / cached / failed / duplicate；refresh_articles 另有 refreshed / not_modified"""
+    status: str
+    record: Dict
+
+
+class _ParseJob:
+    """一次解析工作內共用的 URL → Future 對照，同一 URL 只會送出一次解析
+
+    每次嘗試先在 I/O executor 下載一次，再把原始內容交給 extract_executor（設定 extract_workers 時為 process pool，否則為 I/O executor）擷取；
+    下載失敗時可重試的交給 RetryScheduler 延後重新排入，等待期間工作執行緒可以先處理下一個 URL。
+    """
+
+    def __init__(
+        self,
+        executor: ThreadPoolExecutor,
+        session: Optional[HttpSession] = None,
+        scheduler: Optional[RetryScheduler] = None,
+        extract_executor: Optional[Executor] = None,
+        raw_store: Optional["RawStore"] = None,
+        fingerprint: bool = False,
+        extract_timeout: Optional[float] = None,
+    ):
+        self.executor = executor
+        self.extract_executor = extract_executor
+        # 擷取超過此秒數即以失敗回報，不讓卡住的子行程拖住整個查詢
+        self.extract_timeout = extract_timeout
+        # 需要判斷近似重複時才在擷取時計算 SimHash
+        self.fingerprint = fingerprint
+        self.raw_store = raw_store
+        self.session = session
+        self.scheduler = scheduler
+        self.submitted = 0
+        self.reused = 0
+        # 已完成的嘗試會在 submit() 持鎖時直接觸發 callback，需可重入
+        self._lock = threading.RLock()
+        self._futures: Dict[str, Tuple[Future, CancellationToken]] = {}
+        self._attempts: Dict[str, Future] = {}
+        self._waiters: Dict[str, int] = {}
+        self._fetch_urls: Dict[str, str] = {}
+        self._started: Dict[str, float] = {}
+        self._backing_off = set()
+        self._retry_signal = Future()
+
+    def in_backoff(self, url: str) -> bool:
+        return url in self._backing_off
+
+    def retry_signal(self) -> Future:
+        """下一次有 URL 進入退避等待時完成的 Future"""
+        return self._retry_signal
+
+    def submit(self, url: str, fetch_url: Optional[str] = None) -> Future:
+        """url 為正規化後的鍵；實際下載與擷取使用 fetch_url（原始 URL）"""
+        with self._lock:
+            entry = self._futures.get(url)
+            if entry is None or entry[1].cancelled:
+                token = CancellationToken()
+                entry = (Future(), token)
+                self._futures[url] = entry
+                self._waiters[url] = 0
+                self._fetch_urls[url] = fetch_url or url
+                self._started[url] = time.monotonic()
+                self.submitted += 1
+                self._launch(url, entry[0], token, attempt=1, backoff_seconds=0.0)
+            else:
+                self.reused += 1
+            self._waiters[url] += 1
+            return entry[0]
+
+    def _launch(self, url: str, result: Future, token: CancellationToken, attempt: int, backoff_seconds: float):
+        self._backing_off.discard(url)
+        if token.cancelled or result.done():
+            return
+        try:
+            fetch_url = self._fetch_urls[url]
+            fetch_future = self.executor.submit(get_parser(fetch_url).fetch, fetch_url, token, self.session)
+        except RuntimeError as e:
+            # executor 已關閉
+            self._set_result(result, {**error_result(str(e)), **self._timing(url, attempt, backoff_seconds)})
+            return
+        self._attempts[url] = fetch_future
+        fetch_future.add_done_callback(
+            lambda f: self._on_fetch_done(url, result, token, attempt, backoff_seconds, f)
+        )
+
+    def _on_fetch_done(
+        self,
+        url: str,
+        result: Future,
+        token: CancellationToken,
+        attempt: int,
+        backoff_seconds: float,
+        fetch_future: Future,
+    ):
+        if fetch_future.cancelled() or result.done():
+            return
+        exc = fetch_future.exception()
+        if exc is None:
+            fetched = fetch_future.result()
+            self._store_raw(url, fetched)
+            self._extract(url, result, token, attempt, backoff_seconds, fetched)
+            return
+
+        policy = get_parser(self._fetch_urls[url]).retry_policy
+        if self.scheduler is not None and not token.cancelled and policy.should_retry(exc, attempt):
+            delay = policy.backoff(attempt)
+            scheduled = self.scheduler.schedule(
+                delay, lambda: self._launch(url, result, token, attempt + 1, backoff_seconds + delay)
+            )
+            if scheduled:
+                logger.info(f"[重試排程] {url} 第 {attempt} 次失敗（{exc}），{delay:.1f} 秒後重試")
+                self._backing_off.add(url)
+                with self._lock:
+                    signal, self._retry_signal = self._retry_signal, Future()
+                signal.set_result(None)
+                return
+
+        self._fail(url, result, exc, attempt, backoff_seconds)
+
+    def _store_raw(self, url: str, fetched: FetchedContent):
+        if self.raw_store is None:
+            return
+        try:
+            self.raw_store.put(self._fetch_urls[url], fetched.content, fetched.encoding)
+        except Exception as e:
+            logger.error(f"[RawStore] 原始內容寫入失敗：{url} → {e}")
+
+    def _extract(
+        self,
+        url: str,
+        result: Future,
+        token: CancellationToken,
+        attempt: int,
+        backoff_seconds: float,
+        fetched: FetchedContent,
+    ):
+        if token.cancelled:
+            return
+        # 擷取錯誤（版面不符等）重試也不會成功，不再排程重試
+        fetch_url = self._fetch_urls[url]
+        try:
+            if self.extract_executor is not None:
+                extract_future = self.extract_executor.submit(
+                    extract_article, fetch_url, fetched.content, fetched.encoding, self.fingerprint
+                )
+            else:
+                extract_future = self.executor.submit(
+                    extract_article, fetch_url, fetched.content, fetched.encoding, self.fingerprint
+                )
+        except RuntimeError as e:
+            self._fail(url, result, e, attempt, backoff_seconds)
+            return
+        self._attempts[url] = extract_future
+
+        def on_done(f: Future):
+            if f.cancelled() or result.done():
+                return
+            if f.exception() is not None:
+                self._fail(url, result, f.exception(), attempt, backoff_seconds)
+                return
+            parsed = {
+                **f.result(),
+                **freshness_fields(fetched),
+                **self._timing(url, attempt, backoff_seconds),
+            }
+            self._set_result(result, parsed)
+
+        extract_future.add_done_callback(on_done)
+        if self.extract_timeout is not None and self.scheduler is not None:
+            self.scheduler.schedule(
+                self.extract_timeout,
+                lambda: self._extract_timed_out(url, result, extract_future, attempt, backoff_seconds),
+            )
+
+    def _extract_timed_out(
+        self, url: str, result: Future, extract_future: Future, attempt: int, backoff_seconds: float
+    ):
+        if extract_future.done() or result.done():
+            return
+        # 已在子行程執行中的擷取無法中止，只是不再等待；尚在排隊的會被取消
+        extract_future.cancel()
+        self._fail(url, result, TimeoutError(f"擷取超過 {self.extract_timeout} 秒"), attempt, backoff_seconds)
+
+    def _fail(self, url: str, result: Future, exc: BaseException, attempt: int, backoff_seconds: float):
+        logger.error(f"[解析失敗] {url} → {exc}")
+        parsed = {**error_result(str(exc)), **self._timing(url, attempt, backoff_seconds)}
+        self._set_result(result, parsed)
+
+    def _timing(self, url: str, attempt: int, backoff_seconds: float) -> Dict:
+        # elapsed_seconds 自送出到有結果，包含重試退避等待
+        return {
+            "attempts": attempt,
+            "backoff_seconds": round(backoff_seconds, 3),
+            "elapsed_seconds": round(time.monotonic() - self._started[url], 3),
+        }
+
+    @staticmethod
+    def _set_result(result: Future, parsed: Dict):
+        try:
+            result.set_result(parsed)
+        except InvalidStateError:
+            # 已被 release() 取消
+            pass
+
+    def release(self, url: str) -> bool:
+        """不再等待該 URL；沒有其他查詢在等待時才真正取消，回傳是否已取消"""
+        with self._lock:
+            self._waiters[url] -= 1
+            if self._waiters[url] > 0:
+                return False
+            result, token = self._futures[url]
+            if result.done():
+                return False
+            token.cancel()
+            result.cancel()
+            attempt_future = self._attempts.get(url)
+            if attempt_future is not None:
+                attempt_future.cancel()
+            return True
+
+
+class _PagedCandidates:
+    """依需求逐頁向 SearxNG 取得候選結果；目前頁面快用完時才在背景預抓下一頁，並排除重複 URL"""
+
+    def __init__(
+        self,
+        fetch_page: Callable[[int], List[Dict]],
+        executor: ThreadPoolExecutor,
+        max_results: int,
+        max_pages: int = 3,
+        prefetch_threshold: int = 5,
+        first_page: Optional[List[Dict]] = None,
+        arrange: Optional[Callable[[List[Dict]], List[Dict]]] = None,
+    ):
+        self.fetch_page = fetch_page
+        self.arrange = arrange
+        self.executor = executor
+        self.max_results = max_results
+        self.max_pages = max_pages
+        self.prefetch_threshold = prefetch_threshold
+        self.page_count = 0
+        self._next_pageno = 1
+        self._prefetched: Optional[Future] = None
+        self._first_page = first_page
+        self._exhausted = False
+        self._seen = set()
+
+    def _start_prefetch(self):
+        if self._exhausted or self._prefetched is not None or self._next_pageno > self.max_pages:
+            return
+        logger.debug(f"[搜尋引擎] 預抓第 {self._next_pageno} 頁")
+        self._prefetched = self.executor.submit(self.fetch_page, self._next_pageno)
+
+    def _next_page(self) -> Optional[List[Dict]]:
+        """回傳下一頁的新結果（可能全被 arrange 過濾掉而為空），沒有更多頁面時回傳 None"""
+        if self._exhausted or self._next_pageno > self.max_pages or len(self._seen) >= self.max_results:
+            return None
+
+        pageno = self._next_pageno
+        self._next_pageno += 1
+        if pageno == 1 and self._first_page is not None:
+            raw = self._first_page
+        elif self._prefetched is not None:
+            raw = self._prefetched.result()
+        else:
+            raw = self.fetch_page(pageno)
+        self._prefetched = None
+        self.page_count += 1
+
+        page = []
+        for r in raw:
+            if r["url"] in self._seen:
+                continue
+            if len(self._seen) >= self.max_results:
+                break
+            self._seen.add(r["url"])
+            page.append(r)
+        # 沒有新結果代表 SearxNG 已無更多頁面（或開始重複）
+        if not page:
+            self._exhausted = True
+            return None
+        return self.arrange(page) if self.arrange is not None else page
+
+    def iter_pages(self) -> Iterator[List[Dict]]:
+        while True:
+            page = self._next_page()
+            if page is None:
+                return
+            if page:
+                yield page
+
+    def walk(self, page: List[Dict]) -> Iterator[Dict]:
+        """逐筆產出頁面內容，剩下 prefetch_threshold 筆時開始預抓下一頁"""
+        for i, r in enumerate(page):
+            if len(page) - i <= self.prefetch_threshold:
+                self._start_prefetch()
+            yield r
+
+    def __iter__(self) -> Iterator[Dict]:
+        for page in self.iter_pages():
+            yield from self.walk(page)
 
 
 class SearchParser:
@@ -15,11 +383,134 @@ class SearchParser:
         search_engine_url: str = "http://localhost:8080",
         db_handler=None,
         timeout: int = 10,
+        max_workers: int = 5,
+        search_cache: Optional[SearchResultCache] = None,
+        max_pages: int = 3,
+        http_session: Optional[HttpSession] = None,
+        io_workers: Optional[int] = None,
+        extract_workers: Optional[int] = 0,
+        raw_store: Optional["RawStore"] = None,
+        near_duplicate_index: Optional[NearDuplicateIndex] = None,
+        domain_stats: Optional[DomainStats] = None,
+        negative_cache: Optional[NegativeCache] = None,
+        article_cache: Optional[TTLCache] = None,
+        speculative_parses: Optional[int] = None,
+        extract_timeout: Optional[float] = 60,
     ):
         self.search_engine_url = search_engine_url
         self.db = db_handler
         self.timeout = timeout
+        self.max_workers = max_workers
+        # 除了尚需的成功篇數外最多再多解析幾篇；None 表示一律補滿 max_workers，達標後多出的由取消機制收回
+        self.speculative_parses = speculative_parses
+        self.search_cache = search_cache
+        self.max_pages = max_pages
+        self.raw_store = raw_store
+        self.near_duplicate_index = near_duplicate_index
+        # 設定後候選依網域成功率 / 耗時排序，並可略過低成功率網域
+        self.domain_stats = domain_stats
+        # 設定後查詢 DB 快取時一併查 failed_articles，近期失敗的 URL 不再下載
+        self.negative_cache = negative_cache
+        # 設定後 DB 快取查詢前先查程序內的 LRU，熱門 URL 不必每次查 DB
+        self.article_cache = article_cache
+        self._index_lock = threading.Lock()
+        # 下載為 I/O 等待，執行緒數可遠大於同時解析篇數（多查詢批次共用同一個池）
+        io_workers = io_workers or max(max_workers, 32)
+        self.executor = ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix="search-parser")
+        # 共用 session 的連線池需容納所有下載執行緒，否則多出的連線用完即丟
+        self.http = http_session or get_default_session(pool_maxsize=io_workers)
+        # HTML 擷取為 CPU 運算，可選擇交給 process pool 避開 GIL（None 為 CPU 核心數）；預設 0 在下載執行緒內擷取
+        if extract_workers is None:
+            extract_workers = os.cpu_count() or 1
+        self.extract_executor = None
+        if extract_workers > 0:
+            # 本程序已有 I/O 執行緒在跑，fork 可能複製到被其他執行緒持有的鎖；子行程改由 forkserver / spawn 啟動，
+            # 並補上已 register_parser() 註冊的解析器（解析器仍在第一次遇到該網域時才載入）
+            self.extract_executor = ProcessPoolExecutor(
+                max_workers=extract_workers,
+                mp_context=self._extract_mp_context(),
+                initializer=init_extract_worker,
+                initargs=(registry.registered_specs(),),
+            )
+        # None 表示不限制擷取時間
+        self.extract_timeout = extract_timeout
+        self.retry_scheduler = RetryScheduler()
+        # 翻頁預抓與批次查詢用，不佔用解析工作槽
+        self.search_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="search-parser-search")
         
+    @staticmethod
+    def _extract_mp_context():
+        methods = multiprocessing.get_all_start_methods()
+        return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+    def _build_search_request(
+        self,
+        query: str,
+        language: Optional[str] = None,
+        safesearch: int = 0,
+        categories: str = "general",
+        engines: Optional[str] = None,
+        time_range: Optional[str] = None,
+        pageno: int = 1,
+    ) -> Tuple[Dict, Dict]:
+        params = {
+            "q": query,
+            "format": "json",
+            "safesearch": safesearch,
+            "categories": categories,
+        }
+        if language:
+            params["language"] = language
+        if engines:
+            params["engines"] = engines
+        if time_range:
+            params["time_range"] = time_range
+        if pageno > 1:
+            params["pageno"] = pageno
+        return params, SEARCH_HEADERS
+
+    def _format_search_results(self, data: Dict, max_results: int) -> List[Dict]:
+        logger.info(f"共找到 {len(data['results'])} 筆搜尋結果")
+
+        results = []
+        skip_count = 0
+        seen = set()
+        for r in data.get("results", []):
+            if len(results) >= max_results:
+                break
+            
+            if "wikinews.org" in r.get("url", ""):
+                skip_count += 1
+                continue
+
+            # 以正規化 URL 去重；不同引擎常回傳帶追蹤參數或 AMP / 行動版的同一篇文章
+            canonical_url = canonicalize_url(r["url"])
+            if canonical_url in seen:
+                skip_count += 1
+                continue
+            seen.add(canonical_url)
+            
+            published = r.get("publishedDate") or extract_date_from_metadata(r.get("metadata", ""))
+            results.append({
+                "title": r["title"],
+                "url": canonical_url,
+                "original_url": r["url"],
+                "snippet": r.get("content", ""),
+                "engine": r.get("engine"),
+                "published": parse_published_date(published),
+                "score": r["score"]
+            })
+        logger.info(f"[搜尋引擎] 成功保留 {len(results)} 篇，過濾掉 wikinews.org {skip_count} 篇")
+        return results
+
+    def _get_cached_search(self, params: Dict) -> Optional[Dict]:
+        if self.search_cache is None:
+            return None
+        data = self.search_cache.get(params)
+        if data is not None:
+            logger.info(f"[搜尋快取] 命中：{params['q']}")
+        return data
+
     def _fetch_results(
         self,
         query: str,
@@ -28,59 +519,26 @@ class SearchParser:
         categories: str = "general",
         engines: Optional[str] = None,
         time_range: Optional[str] = None,
-        max_results : int = 10
+        max_results : int = 10,
+        pageno: int = 1,
     ) -> List[Dict]:
         try:
-            params = {
-                "q": query,
-                "format": "json",
-                "safesearch": safesearch,
-                "categories": categories,
-            }
-            if language:
-                params["language"] = language
-            if engines:
-                params["engines"] = engines
-            if time_range:
-                params["time_range"] = time_range
-
-            headers = {
-                "User-Agent": "Mozilla/5.0",
-                "Accept": "*/*",
-                "Accept-Language": "zh-TW,zh;q=0.9,en-US;q=0.8,en;q=0.7",
-                "Cache-Control": "no-cache",
-                "Pragma": "no-cache",
-                "Connection": "keep-alive",
-            }
+            params, headers = self._build_search_request(
+                query, language, safesearch, categories, engines, time_range, pageno
+            )
             
-            logger.info(f"[搜尋引擎] 開始查詢：{query}，最大筆數限制：{max_results}")
+            cached = self._get_cached_search(params)
+            if cached is not None:
+                return self._format_search_results(cached, max_results)
 
-            response = requests.get(f"{self.search_engine_url}/search", params=params, timeout=self.timeout, headers=headers)
+            logger.info(f"[搜尋引擎] 開始查詢：{query}（第 {pageno} 頁），最大筆數限制：{max_results}")
+
+            response = self.http.get(f"{self.search_engine_url}/search", params=params, timeout=self.timeout, headers=headers)
             response.raise_for_status()
             data = response.json()
-            logger.info(f"共找到 {len(data['results'])} 筆搜尋結果")
-
-            results = []
-            skip_count = 0
-            for r in data.get("results", []):
-                if len(results) >= max_results:
-                    break
-                
-                if "wikinews.org" in r.get("url", ""):
-                    skip_count += 1
-                    continue
-                
-                published = r.get("publishedDate") or extract_date_from_metadata(r.get("metadata", ""))
-                results.append({
-                    "title": r["title"],
-                    "url": r["url"],
-                    "snippet": r.get("content", ""),
-                    "engine": r.get("engine"),
-                    "published": parse_published_date(published),
-                    "score": r["score"]
-                })
-            logger.info(f"[搜尋引擎] 成功保留 {len(results)} 篇，過濾掉 wikinews.org {skip_count} 篇")
-            return results
+            if self.search_cache is not None:
+                self.search_cache.set(params, data)
+            return self._format_search_results(data, max_results)
 
         except requests.RequestException as e:
             logger.error(f"[SearxNG Error] 搜尋失敗: {e}")
@@ -91,114 +549,539 @@ class SearchParser:
             query: str,
             min_parsed: int = 5,
             max_attempts: int = 30,
+            near_duplicates: str = "keep",
             **kwargs
         ) -> List[Dict]:
-        logger.info(f"[解析流程] 開始處理查詢：{query}，min_parsed={min_parsed}，max_attempts={max_attempts}")
-        raw_results = self._fetch_results(query=query, max_results=max_attempts, **kwargs)
+        events = self.iter_search_and_parse(
+            query, min_parsed=min_parsed, max_attempts=max_attempts, near_duplicates=near_duplicates, **kwargs
+        )
+        return self._collect_events(query, events)
 
-        parsed_results = []
-        failed_results = []
-        parse_attempts = 0
-        batch_size = 5
-        
-        for i in range(0, len(raw_results), batch_size):
-            if len(parsed_results) >= min_parsed or parse_attempts >= max_attempts:
-                break
-            batch = raw_results[i:i + batch_size]
-            
+    def search_and_parse_many(
+            self,
+            queries: List[str],
+            min_parsed: int = 5,
+            max_attempts: int = 30,
+            max_concurrent_queries: int = 8,
+            near_duplicates: str = "keep",
+            **kwargs
+        ) -> List[Dict]:
+        """批次處理多個查詢：SearxNG 併發查詢、共用解析 pool，同一 URL 在整批中只解析一次"""
+        if not queries:
+            return []
+        self._check_near_duplicate_mode(near_duplicates)
+        logger.info(f"[批次解析] 開始處理 {len(queries)} 個查詢，min_parsed={min_parsed}，max_attempts={max_attempts}")
+
+        job = self._new_job(near_duplicates)
+        query_workers = max(1, min(max_concurrent_queries, len(queries)))
+        with ThreadPoolExecutor(max_workers=query_workers, thread_name_prefix="search-parser-query") as query_pool:
+            raw_results_list = list(query_pool.map(
+                lambda q: self._fetch_results(query=q, max_results=max_attempts, **kwargs), queries
+            ))
+
+            existing_articles = {}
+            all_results = [r for raw_results in raw_results_list for r in raw_results]
+            checked_urls = {r["url"] for r in all_results}
             if self.db:
-                batch_urls = [r['url'] for r in batch]
-                existing_articles = self._get_existing_articles(batch_urls)
-                
+                existing_articles = self._lookup_existing(all_results)
                 logger.debug(f"[快取檢查] 資料庫已有 {len(existing_articles)} 篇")
-                
-                for r in batch:
-                    if r['url'] in existing_articles:
-                        logger.info(f"[快取命中] 使用 DB 資料：{r['url']}")
-                        parsed_results.append(existing_articles[r['url']])
+
+            def run_query(query: str, raw_results: List[Dict]) -> Dict:
+                pages = self._paged_candidates(query, max_attempts, first_page=raw_results, **kwargs)
+                candidates = self._iter_candidates(pages, existing_articles, checked_urls)
+                events = self._iter_pipeline(query, candidates, min_parsed, max_attempts, job, near_duplicates)
+                return self._collect_events(query, events)
+
+            results = list(query_pool.map(run_query, queries, raw_results_list))
+
+        logger.info(f"[批次解析] 完成，實際解析 {job.submitted} 個 URL，跨查詢共用 {job.reused} 次")
+        return results
+
+    def iter_search_and_parse(
+            self,
+            query: str,
+            min_parsed: int = 5,
+            max_attempts: int = 30,
+            near_duplicates: str = "keep",
+            **kwargs
+        ) -> Iterator[ParseEvent]:
+        """每篇文章一確定結果（含 DB 快取命中）就立即產出，停止條件與 search_and_parse 相同"""
+        self._check_near_duplicate_mode(near_duplicates)
+        logger.info(f"[解析流程] 開始處理查詢：{query}，min_parsed={min_parsed}，max_attempts={max_attempts}")
+        pages = self._paged_candidates(query, max_attempts, **kwargs)
+        yield from self._iter_pipeline(
+            query, self._iter_candidates(pages), min_parsed, max_attempts, self._new_job(near_duplicates), near_duplicates
+        )
+
+    def _new_job(self, near_duplicates: str = "keep") -> "_ParseJob":
+        return _ParseJob(
+            self.executor, self.http, self.retry_scheduler, self.extract_executor, self.raw_store,
+            fingerprint=self._needs_fingerprint(near_duplicates),
+            extract_timeout=self.extract_timeout,
+        )
+
+    def _iter_pipeline(
+            self,
+            query: str,
+            candidates: Iterator[Tuple[Dict, Optional[Dict]]],
+            min_parsed: int,
+            max_attempts: int,
+            job: "_ParseJob",
+            near_duplicates: str = "keep",
+        ) -> Iterator[ParseEvent]:
+        parsed_count = 0
+        failed_count = 0
+        duplicate_count = 0
+        negative_count = 0
+        parse_attempts = 0
+        # 只有需要寫入 DB 時才保留結果，快取命中的文章已在 DB 中
+        pending_success = []
+        pending_failed = []
+        in_flight = {}
+
+        try:
+            while True:
+                # 補滿空出的工作槽：執行中（不含退避等待中）的數量不超過 max_workers，
+                # 慢的網站不會卡住其他候選；達到 min_parsed 後其餘的在 finally 取消
+                while parse_attempts + len(in_flight) < max_attempts:
+                    needed = min_parsed - parsed_count
+                    running = sum(1 for r in in_flight.values() if not job.in_backoff(r["url"]))
+                    if needed <= 0 or running >= self._parse_slots(needed, self.max_workers):
+                        break
+                    candidate = next(candidates, None)
+                    if candidate is None:
+                        break
+                    r, cached = candidate
+                    if cached is not None and cached.get("negative"):
+                        self.negative_cache.count_saved(r["url"], cached.get("error"))
+                        negative_count += 1
+                        continue
+                    if cached is not None:
                         parse_attempts += 1
-                        if len(parsed_results) >= min_parsed:
-                            logger.info("已達成功上限（DB 快取），提前結束解析")
-                            break
-                batch = [r for r in batch if r["url"] not in existing_articles]
-            
-            if not batch:
-                logger.debug("[解析流程] 本批次剩下皆為快取文章，略過解析")
-                continue
-            
-            needed = min_parsed - len(parsed_results)
-            if needed <= 0:
-                break
-            batch = batch[:needed]
-                 
-            with ThreadPoolExecutor(max_workers=batch_size) as executor:
-                futures = {
-                    executor.submit(parse_article, r["url"]): r
-                    for r in batch
-                }
-                for future in as_completed(futures):
+                        if near_duplicates == "skip" and cached.get("duplicate_of"):
+                            duplicate_count += 1
+                            yield ParseEvent("duplicate", cached)
+                            continue
+                        logger.info(f"[快取命中] 使用 DB 資料：{r['url']}")
+                        parsed_count += 1
+                        yield ParseEvent("cached", cached)
+                        continue
+                    in_flight[job.submit(r["url"], r.get("original_url"))] = r
+
+                if parsed_count >= min_parsed:
+                    logger.warning("已達成功上限，提前結束解析")
+                    break
+                if not in_flight:
+                    if parse_attempts >= max_attempts:
+                        logger.warning("達到最大嘗試數量")
+                    break
+
+                # 有文章進入退避時也喚醒，讓空出的工作槽先處理下一個 URL
+                done, _ = wait(list(in_flight) + [job.retry_signal()], return_when=FIRST_COMPLETED)
+                for future in done:
+                    # 同一批完成的其餘結果在達標後不再計入，留在 in_flight 與進行中的一併於 finally 釋放
+                    if parsed_count >= min_parsed:
+                        break
+                    if future not in in_flight:
+                        continue
                     parse_attempts += 1
-                    r = futures[future]
-                    
+                    r = in_flight.pop(future)
+
                     try:
                         parsed = future.result()
-                        text = parsed.get("text", "") if parsed else ""
-                        error_message = parsed.get("error", "") if parsed else ""
-                        text_length = len(text)
-
-                        is_success = bool(text.strip()) and not error_message and text_length >= 50
-
-                        if is_success:
-                            logger.info(f"[解析成功] {r['url']}，長度={text_length}")
-                            parsed_results.append({**r, **parsed})
-                            if len(parsed_results) >= min_parsed:
-                                logger.warning("已達成功上限，提前結束解析")
-                                break
-                        else:
-                            failed_results.append({**r, **parsed})
                     except Exception as e:
                         logger.error(f"[解析失敗] {r['url']} → {e}")
-            
-            if parse_attempts >= max_attempts:
-                logger.warning("達到最大嘗試數量")
-                break
+                        continue
+
+                    record = {**r, **parsed}
+                    self._record_domain_stats(record)
+                    if self._is_successful(parsed):
+                        status = self._mark_near_duplicate(record, near_duplicates)
+                        if self.db:
+                            pending_success.append(self._db_record(record, near_duplicates))
+                        if status == "duplicate":
+                            duplicate_count += 1
+                            yield ParseEvent("duplicate", record)
+                            continue
+                        logger.info(f"[解析成功] {r['url']}，長度={len(parsed['text'])}")
+                        parsed_count += 1
+                        yield ParseEvent("success", record)
+                    else:
+                        failed_count += 1
+                        if self.db:
+                            pending_failed.append(record)
+                        yield ParseEvent("failed", record)
+        finally:
+            if in_flight:
+                cancelled = sum(1 for r in in_flight.values() if job.release(r["url"]))
+                logger.info(f"[解析流程] 放棄 {len(in_flight)} 篇未完成的解析，其中 {cancelled} 篇已取消")
+
+            logger.info(
+                f"成功解析 {parsed_count} 篇文章，失敗 {failed_count} 篇，近似重複 {duplicate_count} 篇，"
+                f"負面快取略過 {negative_count} 篇，共嘗試 {parse_attempts} 篇"
+            )
+
+            if self.db:
+                self._write_results_to_db(query, pending_success, pending_failed)
+
+    async def aiter_search_and_parse(
+            self,
+            query: str,
+            min_parsed: int = 5,
+            max_attempts: int = 30,
+            near_duplicates: str = "keep",
+            **kwargs
+        ) -> AsyncIterator[ParseEvent]:
+        """iter_search_and_parse 的 async generator 版本，同步流程在背景執行緒中推進"""
+        loop = asyncio.get_running_loop()
+        events = self.iter_search_and_parse(
+            query, min_parsed=min_parsed, max_attempts=max_attempts, near_duplicates=near_duplicates, **kwargs
+        )
+        try:
+            while True:
+                event = await loop.run_in_executor(None, next, events, None)
+                if event is None:
+                    break
+                yield event
+        finally:
+            await loop.run_in_executor(None, events.close)
+
+    def _parse_slots(self, needed: int, capacity: int) -> int:
+        """同時解析的篇數上限"""
+        if self.speculative_parses is None:
+            return capacity
+        return min(capacity, needed + self.speculative_parses)
+
+    @staticmethod
+    def _is_successful(parsed: Optional[Dict]) -> bool:
+        text = parsed.get("text", "") if parsed else ""
+        error_message = parsed.get("error", "") if parsed else ""
+        return bool(text.strip()) and not error_message and len(text) >= 50
+
+    def _record_domain_stats(self, record: Dict):
+        if self.domain_stats is not None:
+            self.domain_stats.record(record["url"], self._is_successful(record), record.get("elapsed_seconds"))
+
+    @staticmethod
+    def _check_near_duplicate_mode(mode: str):
+        if mode not in NEAR_DUPLICATE_MODES:
+            raise ValueError(f"near_duplicates 需為 {NEAR_DUPLICATE_MODES} 之一：{mode}")
+
+    def _needs_fingerprint(self, mode: str) -> bool:
+        # 與 _get_near_duplicate_index 一致：keep 且未設定索引時不比對，也就不必計算指紋
+        return self.near_duplicate_index is not None or mode != "keep"
+
+    def _get_near_duplicate_index(self, mode: str) -> Optional[NearDuplicateIndex]:
+        # keep 且未設定索引時不計算相似度；其他模式未設定時以 DB（或僅記憶體）建立預設索引
+        if self.near_duplicate_index is None and mode != "keep":
+            with self._index_lock:
+                if self.near_duplicate_index is None:
+                    self.near_duplicate_index = NearDuplicateIndex(self.db)
+        return self.near_duplicate_index
+
+    def _mark_near_duplicate(self, record: Dict, mode: str) -> str:
+        """比對指紋索引，近似重複時在 record 加上 duplicate_of；回傳事件狀態"""
+        index = self._get_near_duplicate_index(mode)
+        fingerprint = record.get("simhash")
+        if index is None or fingerprint is None:
+            return "success"
+        duplicate_of = index.find_or_add(record["url"], fingerprint)
+        if duplicate_of is None:
+            return "success"
+        logger.info(f"[近似重複] {record['url']} 與 {duplicate_of} 內容相近")
+        record["duplicate_of"] = duplicate_of
+        return "duplicate" if mode == "skip" else "success"
+
+    @staticmethod
+    def _db_record(record: Dict, mode: str) -> Dict:
+        # skip / link 模式下近似重複的文章只存指向原文的連結，之後查詢可直接命中快取
+        if mode != "keep" and record.get("duplicate_of"):
+            return {**record, "text": None}
+        return record
+
+    def _iter_candidates(
+            self,
+            pages: "_PagedCandidates",
+            existing_articles: Optional[Dict[str, Dict]] = None,
+            checked_urls: AbstractSet[str] = frozenset(),
+        ) -> Iterator[Tuple[Dict, Optional[Dict]]]:
+        """依序產出 (搜尋結果, DB 快取資料或 None)，每頁只查一次快取，已查過的 URL 不重查"""
+        existing_articles = existing_articles or {}
+        for page in pages.iter_pages():
+            found = {}
+            to_check = [r for r in page if r["url"] not in checked_urls]
+            if self.db and to_check:
+                found = self._lookup_existing(to_check)
+                logger.debug(f"[快取檢查] 資料庫已有 {len(found)} 篇")
+            for r in pages.walk(page):
+                yield r, found.get(r["url"]) or existing_articles.get(r["url"])
+
+    def _paged_candidates(
+            self,
+            query: str,
+            max_results: int,
+            first_page: Optional[List[Dict]] = None,
+            **kwargs
+        ) -> "_PagedCandidates":
+        def fetch_page(pageno: int) -> List[Dict]:
+            return self._fetch_results(query=query, max_results=max_results, pageno=pageno, **kwargs)
+
+        return _PagedCandidates(
+            fetch_page,
+            self.search_executor,
+            max_results=max_results,
+            max_pages=self.max_pages,
+            prefetch_threshold=self.max_workers,
+            first_page=first_page,
+            arrange=self.domain_stats.arrange if self.domain_stats is not None else None,
+        )
+
+    @staticmethod
+    def _collect_events(query: str, events: Iterator[ParseEvent]) -> Dict:
+        parsed_results = []
+        failed_results = []
+        duplicate_results = []
+        for event in events:
+            if event.status == "failed":
+                failed_results.append(event.record)
+            elif event.status == "duplicate":
+                duplicate_results.append(event.record)
+            else:
+                parsed_results.append(event.record)
 
-        logger.info(f"成功解析 {len(parsed_results)} 篇文章，失敗 {len(failed_results)} 篇，共嘗試 {parse_attempts} 篇")
-        
-        if self.db:
-            self._write_results_to_db(query, parsed_results, failed_results)
-        
         return {
             "query": query,
             "success": parsed_results,
-            "failed": failed_results
-        } 
+            "failed": failed_results,
+            "duplicates": duplicate_results,
+        }
+
+    def refresh_articles(
+            self,
+            urls: Optional[Iterable[str]] = None,
+            older_than: Optional[timedelta] = None,
+            limit: int = 100,
+        ) -> Iterator[ParseEvent]:
+        """以條件式請求重新驗證 parsed_articles 中的文章
+
+        回應 304 只更新 fetched_at；回應 200 才重新擷取並覆寫該列。未指定 urls 時，
+        依 fetched_at 由舊到新挑出超過 older_than（預設 1 小時）未驗證的文章。
+        """
+        if self.db is None:
+            raise ValueError("未設定資料庫，無法重新驗證")
+
+        rows = self._get_refresh_candidates(urls, older_than or timedelta(hours=1), limit)
+        logger.info(f"[重新驗證] 共 {len(rows)} 篇待驗證")
+        pending = iter(rows)
+        in_flight = {}
+        not_modified = []
+        refreshed = []
+        failed_count = 0
+        try:
+            while True:
+                while len(in_flight) < self.max_workers:
+                    row = next(pending, None)
+                    if row is None:
+                        break
+                    in_flight[self.executor.submit(self._refresh_one, row)] = row
+                if not in_flight:
+                    break
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    row = in_flight.pop(future)
+                    try:
+                        status, record = future.result()
+                    except Exception as e:
+                        logger.error(f"[重新驗證] {row['url']} 失敗 → {e}")
+                        status, record = "failed", {"url": row["url"], **error_result(str(e))}
+
+                    if status == "not_modified":
+                        not_modified.append(record)
+                    elif status == "refreshed":
+                        refreshed.append(record)
+                    else:
+                        failed_count += 1
+                    yield ParseEvent(status, record)
+        finally:
+            for future in in_flight:
+                future.cancel()
+            self._write_refresh_results_to_db(not_modified, refreshed)
+            logger.info(
+                f"[重新驗證] 未變更 {len(not_modified)} 篇，已更新 {len(refreshed)} 篇，失敗 {failed_count} 篇"
+            )
+
+    def _refresh_one(self, row: Dict) -> Tuple[str, Dict]:
+        url = row["url"]
+        fetch_url = row.get("original_url") or url
+        parser = get_parser(fetch_url)
+        fetched = parser.fetch(fetch_url, session=self.http, validators=row)
+        if fetched.not_modified:
+            return "not_modified", {"url": url, **freshness_fields(fetched)}
+
+        if self.raw_store is not None:
+            self.raw_store.put(fetch_url, fetched.content, fetched.encoding)
+        if self.extract_executor is not None:
+            future = self.extract_executor.submit(extract_article, fetch_url, fetched.content, fetched.encoding)
+            try:
+                parsed = future.result(timeout=self.extract_timeout)
+            except FutureTimeoutError:
+                future.cancel()
+                parsed = error_result(f"擷取超過 {self.extract_timeout} 秒")
+        else:
+            parsed = parser.extract(fetch_url, fetched.content, fetched.encoding)
+
+        record = {"url": url, **parsed, **freshness_fields(fetched)}
+        # 重新擷取失敗時保留舊資料，不覆寫
+        return ("refreshed" if self._is_successful(parsed) else "failed"), record
+
+    def reparse(
+            self,
+            urls: Optional[Iterable[str]] = None,
+            domain: Optional[str] = None,
+            batch_size: int = 200,
+        ) -> Iterator[ParseEvent]:
+        """以 raw_store 保存的原始內容重新執行目前的擷取器，不連網
+
+        有設定 DB 時，重新擷取成功的文章會覆寫 parsed_articles 並自 failed_articles 移除。
+        """
+        if self.raw_store is None:
+            raise ValueError("未設定 raw_store，無法重新解析")
+
+        executor = self.extract_executor or self.executor
+        pages = self.raw_store.iter_pages(urls=urls, domain=domain)
+        parsed_count = 0
+        failed_count = 0
+        pending_success = []
+        try:
+            while True:
+                batch = list(islice(pages, batch_size))
+                if not batch:
+                    break
+                futures = [
+                    (page, executor.submit(extract_article, page.source_url, page.content, page.encoding))
+                    for page in batch
+                ]
+                for page, future in futures:
+                    try:
+                        parsed = future.result(timeout=self.extract_timeout)
+                    except FutureTimeoutError:
+                        future.cancel()
+                        parsed = error_result(f"擷取超過 {self.extract_timeout} 秒")
+                    except Exception as e:
+                        parsed = error_result(str(e))
+                    record = {"url": page.url, "original_url": page.source_url, **parsed}
+                    if self._is_successful(parsed):
+                        parsed_count += 1
+                        if self.db:
+                            pending_success.append(record)
+                        yield ParseEvent("success", record)
+                    else:
+                        failed_count += 1
+                        yield ParseEvent("failed", record)
+
+                if pending_success:
+                    self._write_reparsed_to_db(pending_success)
+                    pending_success = []
+        finally:
+            if pending_success:
+                self._write_reparsed_to_db(pending_success)
+            logger.info(f"[重新解析] 成功 {parsed_count} 篇，失敗 {failed_count} 篇")
+
+    def close(self):
+        self.retry_scheduler.close()
+        self.executor.shutdown(wait=False)
+        self.search_executor.shutdown(wait=False)
+        if self.extract_executor is not None:
+            # 等待中的擷取最多只有在途篇數，等它結束以免直譯器結束時 process pool 的管線已關閉
+            self.extract_executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
         
+    def _lookup_existing(self, results: List[Dict]) -> Dict[str, Dict]:
+        """以正規化 URL 查 DB 快取，一併比對原始 URL 以相容正規化前寫入的資料
+
+        設定 negative_cache 時，仍在 TTL 內的失敗紀錄以 {"negative": True, ...} 回傳，過期的視為未快取。
+        """
+        aliases = {}
+        fetch_urls = {}
+        for r in results:
+            aliases[r["url"]] = r["url"]
+            aliases.setdefault(r.get("original_url") or r["url"], r["url"])
+            fetch_urls[r["url"]] = r.get("original_url") or r["url"]
+        found = {}
+        for url, row in self._get_existing_articles(list(aliases)).items():
+            key = aliases[url]
+            if row.pop("failed", False):
+                if key in found or not self._is_negative_hit(fetch_urls[key], row):
+                    continue
+                row["negative"] = True
+            else:
+                row.pop("parser_version", None)
+                row.pop("failed_at", None)
+                if found.get(key, {}).get("negative"):
+                    del found[key]
+            found.setdefault(key, row)
+        return found
+
+    def _is_negative_hit(self, fetch_url: str, row: Dict) -> bool:
+        return self.negative_cache.is_fresh(
+            row.get("error"), row.get("failed_at"), row.get("parser_version"), get_parser(fetch_url).version
+        )
+
     def _get_existing_articles(self, urls: List[str]) -> Dict[str, Dict]:
+        """parsed_articles 的快取與 failed_articles 的負面快取在同一次查詢取得，成功紀錄優先
+
+        有設定 article_cache 時先查記憶體，只有未命中的 URL 才查 DB（查無資料的不快取）。
+        回傳的 dict 為複本，呼叫端可直接修改。
+        """
         if not urls or self.db is None:
             return {}
 
-        placeholders = ','.join(['%s'] * len(urls))
-        sql = f"""
-            SELECT
-                url,
-                title,
-                snippet,
-                engine,
-                published,
-                score,
-                text,
-                error
-            FROM parsed_articles
-            WHERE url IN ({placeholders})
-        """
-        result = self.db._execute_sql(sql, urls)
-        return {row["url"]: row for row in result["formatted_data"]}
+        found = {}
+        missing = list(urls)
+        if self.article_cache is not None:
+            missing = []
+            for url in urls:
+                row = self.article_cache.get(url)
+                if row is None:
+                    missing.append(url)
+                elif self.negative_cache is not None or not row["failed"]:
+                    found[url] = dict(row)
+            if not missing:
+                return found
+
+        if self.negative_cache is not None:
+            result = execute_sql(self.db, EXISTING_AND_FAILED_ARTICLES_SQL, [missing, missing], prepared=True)
+        else:
+            result = execute_sql(self.db, EXISTING_ARTICLES_SQL, [missing], prepared=True)
+        rows = {}
+        for row in result["formatted_data"]:
+            if not row["failed"]:
+                rows[row["url"]] = row
+            else:
+                rows.setdefault(row["url"], row)
+        for url, row in rows.items():
+            if self.article_cache is not None:
+                self.article_cache.set(url, row)
+            found[url] = dict(row)
+        return found
+
+    def _invalidate_articles(self, urls: Iterable[str]):
+        if self.article_cache is not None:
+            for url in urls:
+                self.article_cache.invalidate(url)
     
     def _write_results_to_db(self, query: str, success: List[dict], failed: List[dict]):
         if self.db is None:
             logger.warning("未設定資料庫，無法寫入")
             return
+        if not success and not failed:
+            return
 
         inserted_at = datetime.now()
         
@@ -209,12 +1092,105 @@ class SearchParser:
         for r in failed:
             r["query"] = query
             r["inserted_at"] = inserted_at
+            r["parser_version"] = get_parser(r.get("original_url") or r["url"]).version
+
+        # 舊的失敗紀錄先移除：成功的不再留在負面快取，再次失敗的以新的錯誤與時間重新計算 TTL
+        urls = [r["url"] for r in success + failed]
+        self._invalidate_articles(urls)
+        execute_sql(self.db, DELETE_FAILED_ARTICLES_SQL, [urls], prepared=True)
 
         if success:
             logger.info(f"[DB 寫入] 成功結果準備寫入 {len(success)} 篇")
-            self.db.add_data("parsed_articles", success, on_conflict_do_nothing=True, unique_columns="url")
+            self.db.add_data("parsed_articles", success, to_null=True, on_conflict_do_nothing=True, unique_columns="url")
 
         if failed:
             logger.info(f"[DB 寫入] 失敗結果準備寫入 {len(failed)} 篇")
-            self.db.add_data("failed_articles", failed, on_conflict_do_nothing=True, unique_columns="url")
-        logger.info("[DB 寫入] 資料寫入完成")
\ No newline at end of file
+            self.db.add_data("failed_articles", failed, to_null=True, on_conflict_do_nothing=True, unique_columns="url")
+        logger.info("[DB 寫入] 資料寫入完成")
+
+    def _write_reparsed_to_db(self, records: List[dict]):
+        """以新的擷取結果取代舊資料，保留原本的 query / snippet / engine / score"""
+        # 舊資料可能以正規化前的原始 URL 為鍵
+        aliases = {}
+        for r in records:
+            aliases[r["url"]] = r["url"]
+            aliases.setdefault(r["original_url"], r["url"])
+        urls = list(aliases)
+        result = execute_sql(self.db, REPARSE_PREVIOUS_SQL, [urls, urls], prepared=True)
+        previous = {}
+        for row in result["formatted_data"]:
+            previous.setdefault(aliases[row["url"]], {**row, "url": aliases[row["url"]]})
+
+        inserted_at = datetime.now()
+        rows = []
+        for r in records:
+            old = previous.get(r["url"], {})
+            rows.append({
+                **old,
+                **r,
+                "published": r.get("published") or old.get("published"),
+                "inserted_at": inserted_at,
+            })
+
+        self._invalidate_articles(urls)
+        execute_sql(self.db, DELETE_FAILED_ARTICLES_SQL, [urls], prepared=True)
+        # 以正規化前的原始 URL 為鍵的舊資料改由正規化後的新列取代
+        stale = [url for url, key in aliases.items() if url != key]
+        if stale:
+            execute_sql(self.db, DELETE_PARSED_ARTICLES_SQL, [stale], prepared=True)
+        # 只寫入重新擷取與沿用舊資料的欄位，duplicate_of 等其他欄位維持原值
+        present = {key for row in rows for key in row}
+        header = [column for column in self.db.get_header("parsed_articles", no_ser_pk=True) if column in present]
+        self.db.upsert_data(
+            "parsed_articles", rows, "url", adding_header_list=header, to_null=True,
+            merge_rules={column: "coalesce" for column in REPARSE_CARRIED_COLUMNS},
+        )
+        logger.info(f"[重新解析] 已更新 {len(rows)} 篇至 parsed_articles")
+
+    def _get_refresh_candidates(self, urls: Optional[Iterable[str]], older_than: timedelta, limit: int) -> List[Dict]:
+        if urls is not None:
+            # 同時比對正規化與原始形式，相容正規化前寫入的資料
+            urls = list({url for u in urls for url in (u, canonicalize_url(u))})
+            if not urls:
+                return []
+            result = execute_sql(self.db, REFRESH_CANDIDATES_SQL, [urls], prepared=True)
+        else:
+            sql = """
+                SELECT url, original_url, etag, last_modified, fetched_at
+                FROM parsed_articles
+                WHERE fetched_at IS NULL OR fetched_at < %s
+                ORDER BY fetched_at NULLS FIRST
+                LIMIT %s
+            """
+            result = self.db._execute_sql(sql, [datetime.now() - older_than, limit])
+        return result["formatted_data"]
+
+    def _write_refresh_results_to_db(self, not_modified: List[Dict], refreshed: List[Dict]):
+        if not not_modified and not refreshed:
+            return
+        self._invalidate_articles(r["url"] for r in not_modified + refreshed)
+        if not_modified:
+            self.db.update_data(
+                "parsed_articles",
+                [
+                    {"fetched_at =": r["fetched_at"], "etag =": r["etag"], "last_modified =": r["last_modified"], "url =": r["url"]}
+                    for r in not_modified
+                ],
+                ["url ="],
+            )
+
+        if refreshed:
+            self.db.update_data(
+                "parsed_articles",
+                [
+                    {
+                        "title =": r["title"], "published =": r["published"], "text =": r["text"], "error =": None,
+                        "etag =": r["etag"], "last_modified =": r["last_modified"], "fetched_at =": r["fetched_at"],
+                        "url =": r["url"],
+                    }
+                    for r in refreshed
+                ],
+                ["url ="],
+                merge_rules={"published": "coalesce"},
+            )
+        logger.info(f"[重新驗證] DB 更新：未變更 {len(not_modified)} 篇，覆寫 {len(refreshed)} 篇")
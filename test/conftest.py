@@ -0,0 +1,12 @@
+import sys
+import types
+from pathlib import Path
+
+# 測試以 SearchParser 套件匯入；repo 目錄不一定叫 SearchParser，直接把 repo 根目錄登記為該套件
+if "SearchParser" not in sys.modules:
+    package = types.ModuleType("SearchParser")
+    package.__path__ = [str(Path(__file__).resolve().parents[1])]
+    sys.modules["SearchParser"] = package
+
+# 需連線實際資料庫的手動腳本，不納入 pytest
+collect_ignore = ["test.py", "insert_sample_data.py"]
@@ -0,0 +1,84 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("httpx")
+
+from SearchParser.async_search_parser import AsyncSearchParser
+from SearchParser.parser import registry
+from SearchParser.parser.base import BaseParser, FetchedContent
+from SearchParser.utils.retry import RetryPolicy
+
+
+class _CountingParser(BaseParser):
+    """記錄同時下載數的假解析器；fail_once 中的 URL 第一次下載拋出可重試的例外"""
+
+    retry_policy = RetryPolicy(base_delay=1.0, max_delay=1.0, jitter=0.0)
+
+    def __init__(self, fail_once=()):
+        self.fail_once = set(fail_once)
+        self.running = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def fetch(self, url, cancel_token=None, session=None, validators=None):
+        with self._lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+            failing = url in self.fail_once
+            self.fail_once.discard(url)
+        try:
+            time.sleep(0.05)
+            if failing:
+                raise TimeoutError("timed out")
+            return FetchedContent(("文章內文" * 40).encode("utf-8"))
+        finally:
+            with self._lock:
+                self.running -= 1
+
+    def extract(self, url, content, encoding=None):
+        return {"title": url, "published": None, "text": content.decode("utf-8"), "error": None}
+
+
+def _run(fake, count, **kwargs):
+    results = [
+        {"title": f"t{i}", "url": f"https://a.test/{i}", "snippet": "", "engine": "test", "score": 1.0}
+        for i in range(count)
+    ]
+
+    async def main():
+        parser = AsyncSearchParser(extract_workers=0, **kwargs)
+
+        async def fetch_results(query, max_results, pageno=1, **kw):
+            return [dict(r) for r in results] if pageno == 1 else []
+
+        parser._afetch_results = fetch_results
+        try:
+            return await parser.search_and_parse("q", min_parsed=3)
+        finally:
+            await parser.aclose()
+
+    registry.register("a.test", fake)
+    try:
+        return asyncio.run(main())
+    finally:
+        registry.unregister("a.test")
+
+
+def test_async_stops_at_min_parsed_with_bounded_speculation():
+    fake = _CountingParser()
+    result = _run(fake, 12, max_workers=5, max_concurrency=20)
+    assert len(result["success"]) == 3
+    # 預設只比尚需篇數多解析 2 篇
+    assert fake.peak <= 5
+
+
+def test_async_backoff_does_not_hold_a_slot():
+    fake = _CountingParser(fail_once={"https://a.test/0", "https://a.test/1"})
+    started = time.monotonic()
+    result = _run(fake, 8, max_workers=2, max_concurrency=2, speculative_parses=0)
+    assert len(result["success"]) == 3
+    assert "https://a.test/0" not in {r["url"] for r in result["success"]}
+    assert time.monotonic() - started < 1
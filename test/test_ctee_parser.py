@@ -0,0 +1,60 @@
+import time
+
+import pytest
+
+pytest.importorskip("cloudscraper")
+
+from SearchParser.parser import ctee_parser
+from SearchParser.parser.ctee_parser import ScraperPool, ScraperPoolTimeout, fetch_ctee_html
+from SearchParser.utils.http import FetchLimits
+from SearchParser.utils.retry import DEFAULT_RETRY_ON
+
+
+class _FakeScraper:
+    def close(self):
+        pass
+
+
+class _FakePool(ScraperPool):
+    def _create(self):
+        return _FakeScraper()
+
+
+def test_checkout_times_out_with_retryable_error():
+    pool = _FakePool(size=1, checkout_timeout=0.2)
+    pool.checkout()
+    started = time.monotonic()
+    with pytest.raises(ScraperPoolTimeout):
+        pool.checkout()
+    assert time.monotonic() - started < 1
+    assert isinstance(ScraperPoolTimeout(), DEFAULT_RETRY_ON)
+
+
+def test_pool_wait_does_not_count_against_download_deadline(monkeypatch):
+    pool = _FakePool(size=1)
+    original_checkout = pool.checkout
+
+    def slow_checkout(cancel_token=None, timeout=None):
+        time.sleep(0.3)
+        return original_checkout(cancel_token, timeout)
+
+    pool.checkout = slow_checkout
+    seen = {}
+
+    class _Response:
+        status_code = 200
+
+        def close(self):
+            pass
+
+    def fake_get(url, headers=None, timeout=None, stream=False):
+        return _Response()
+
+    def fake_fetched(response, validators, limits, started):
+        seen["elapsed"] = time.monotonic() - started
+        return "fetched"
+
+    monkeypatch.setattr(_FakeScraper, "get", staticmethod(fake_get), raising=False)
+    monkeypatch.setattr(ctee_parser, "fetched_from_response", fake_fetched)
+    assert fetch_ctee_html("https://www.ctee.com.tw/news/1", scraper_pool=pool, limits=FetchLimits(deadline=0.2)) == "fetched"
+    assert seen["elapsed"] < 0.2
@@ -0,0 +1,40 @@
+from SearchParser.utils.db import execute_sql
+
+
+class _PlainHandler:
+    """_execute_sql 沒有 prepared 參數的 handler（如 SQLite 的 DBHandler）"""
+
+    def __init__(self):
+        self.calls = []
+
+    def _execute_sql(self, sql, entries=[]):
+        self.calls.append((sql, entries))
+        return {"indicator": True, "data": [], "formatted_data": []}
+
+
+class _PreparingHandler(_PlainHandler):
+    prepare_statements = True
+
+    def _execute_sql(self, sql, entries=[], prepared=False):
+        self.calls.append((sql, entries, prepared))
+        return {"indicator": True, "data": [], "formatted_data": []}
+
+
+def test_execute_sql_omits_prepared_for_plain_handlers():
+    handler = _PlainHandler()
+    assert execute_sql(handler, "SELECT 1", [1], prepared=True)["indicator"]
+    assert handler.calls == [("SELECT 1", [1])]
+
+
+def test_execute_sql_passes_prepared_when_supported():
+    handler = _PreparingHandler()
+    execute_sql(handler, "SELECT 1", [1], prepared=True)
+    execute_sql(handler, "SELECT 2", [2])
+    assert handler.calls == [("SELECT 1", [1], True), ("SELECT 2", [2], False)]
+
+
+def test_execute_sql_respects_disabled_prepared_statements():
+    handler = _PreparingHandler()
+    handler.prepare_statements = False
+    execute_sql(handler, "SELECT 1", [1], prepared=True)
+    assert handler.calls == [("SELECT 1", [1], False)]
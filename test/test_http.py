@@ -0,0 +1,42 @@
+import socket
+
+from SearchParser.utils import http
+from SearchParser.utils.http import HttpSession, disable_dns_cache, enable_dns_cache
+
+
+def _default_pool_maxsize(session):
+    return session.session.get_adapter("https://example.com/")._pool_maxsize
+
+
+def test_ensure_pool_maxsize_only_grows_default_pool():
+    session = HttpSession(pool_maxsize=10, host_pool_sizes={"busy.example.com": 5})
+    session.ensure_pool_maxsize(40)
+    assert _default_pool_maxsize(session) == 40
+    session.ensure_pool_maxsize(20)
+    assert _default_pool_maxsize(session) == 40
+    # 主機專用的連線池仍優先比對
+    assert session.session.get_adapter("https://busy.example.com/a")._pool_maxsize == 5
+    session.close()
+
+
+def test_session_dns_cache_is_restored_on_close():
+    original = socket.getaddrinfo
+    first = HttpSession(dns_cache_ttl=60)
+    second = HttpSession(dns_cache_ttl=60)
+    assert socket.getaddrinfo is http._cached_getaddrinfo
+    first.close()
+    assert socket.getaddrinfo is http._cached_getaddrinfo
+    second.close()
+    second.close()
+    assert socket.getaddrinfo is original
+
+
+def test_explicit_dns_cache_outlives_sessions():
+    original = socket.getaddrinfo
+    enable_dns_cache(ttl=60)
+    try:
+        HttpSession(dns_cache_ttl=60).close()
+        assert socket.getaddrinfo is http._cached_getaddrinfo
+    finally:
+        disable_dns_cache()
+    assert socket.getaddrinfo is original
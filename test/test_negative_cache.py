@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from SearchParser.utils.negative_cache import NegativeCache, classify_failure
+
+NOW = datetime(2026, 1, 1, 12, 0)
+
+
+@pytest.mark.parametrize(
+    "error, expected",
+    [
+        (None, "too_short"),
+        ("", "too_short"),
+        ("找不到 <article> 標籤", "layout"),
+        ("HTTPSConnectionPool(host='a.com', port=443): Read timed out. (read timeout=10)", "timeout"),
+        ("已截斷：下載超過總時限 30 秒（已讀 0 bytes）", "timeout"),
+        ("已截斷：回應超過 5000000 bytes", "too_large"),
+        ("已拒絕：Content-Type image/png", "rejected"),
+        ("HTTPSConnectionPool(host='a.com', port=443): Max retries exceeded (Connection refused)", "connection"),
+        ("404 Client Error: Not Found for url: https://a.com/x", "not_found"),
+        ("Client error '410 Gone' for url 'https://a.com/x'", "not_found"),
+        ("403 Client Error: Forbidden for url: https://a.com/x", "forbidden"),
+        ("Server error '503 Service Unavailable' for url 'https://a.com/x'", "server"),
+        ("something else", "other"),
+    ],
+)
+def test_classify_failure(error, expected):
+    assert classify_failure(error) == expected
+
+
+def test_ttl_failures_expire_after_class_ttl():
+    cache = NegativeCache()
+    error = "Read timed out."
+    assert cache.is_fresh(error, NOW - timedelta(minutes=9), None, "1", now=NOW)
+    assert not cache.is_fresh(error, NOW - timedelta(minutes=11), None, "1", now=NOW)
+    assert not cache.is_fresh(error, None, None, "1", now=NOW)
+
+
+def test_layout_failures_last_until_parser_version_changes():
+    cache = NegativeCache()
+    error = "找不到 <article> 標籤"
+    long_ago = NOW - timedelta(days=365)
+    assert cache.is_fresh(error, long_ago, "2", "2", now=NOW)
+    assert not cache.is_fresh(error, long_ago, "1", "2", now=NOW)
+    assert not cache.is_fresh(error, long_ago, None, "2", now=NOW)
+
+
+def test_custom_and_default_ttls():
+    cache = NegativeCache(ttls={"not_found": timedelta(hours=1)}, default_ttl=timedelta(minutes=5))
+    assert not cache.is_fresh("404 Client Error", NOW - timedelta(hours=2), None, "1", now=NOW)
+    assert cache.is_fresh("something else", NOW - timedelta(minutes=4), None, "1", now=NOW)
+    assert not cache.is_fresh("something else", NOW - timedelta(minutes=6), None, "1", now=NOW)
+
+
+def test_count_saved_by_class():
+    cache = NegativeCache()
+    cache.count_saved("https://a.com/1", "404 Client Error")
+    cache.count_saved("https://a.com/2", None)
+    assert cache.saved == 2
+    assert cache.saved_by_class == {"not_found": 1, "too_short": 1}
@@ -0,0 +1,347 @@
+import datetime
+import logging
+import threading
+import time
+
+import pytest
+
+from psycopg2 import errors
+
+from SearchParser.database.postgres_db import postgres_tools
+from SearchParser.database.postgres_db.postgres_tools import (
+    ConnectionUnavailableError, PostgresHandler, _CopyStream, _copy_value, _to_positional,
+)
+
+
+def test_copy_value_escapes_text_format():
+    assert _copy_value(None) == "\\N"
+    assert _copy_value(True) == "t"
+    assert _copy_value(False) == "f"
+    assert _copy_value(1.5) == "1.5"
+    assert _copy_value("a\tb\nc\r\\d") == "a\\tb\\nc\\r\\\\d"
+    assert _copy_value(datetime.datetime(2024, 5, 10, 8, 30)) == "2024-05-10T08:30:00"
+    assert _copy_value(datetime.date(2024, 5, 10)) == "2024-05-10"
+
+
+def test_copy_stream_reads_rows_in_chunks():
+    rows = [("https://a.com/1", "第一行\n第二行", None), ("https://a.com/2", "x", 3)]
+    expected = "https://a.com/1\t第一行\\n第二行\t\\N\nhttps://a.com/2\tx\t3\n"
+    stream = _CopyStream(rows)
+    chunks = []
+    while True:
+        chunk = stream.read(7)
+        if not chunk:
+            break
+        assert len(chunk) <= 7
+        chunks.append(chunk)
+    assert "".join(chunks) == expected
+    assert _CopyStream(rows).read() == expected
+
+
+class _RecordingHandler(PostgresHandler):
+    """不連線的 PostgresHandler：欄位型別固定，記錄 execute_values 收到的 SQL"""
+
+    def __init__(self, column_types):
+        self.logger = logging.getLogger("test_postgres_tools")
+        self.column_types = column_types
+        self.calls = []
+
+    def get_column_types(self, table):
+        return self.column_types
+
+    def _run(self, work, result):
+        work(None)
+        result["indicator"] = True
+        result["message"] = "Operation succeeded."
+        return result
+
+
+@pytest.fixture
+def handler(monkeypatch):
+    handler = _RecordingHandler({"url": "text", "text": "text", "published": "timestamp", "score": "double precision"})
+
+    def execute_values(cursor, sql, entries, template=None, page_size=100, fetch=False):
+        handler.calls.append((sql, entries, template))
+        return [(True,)] * len(entries)
+
+    monkeypatch.setattr(postgres_tools.extras, "execute_values", execute_values)
+    return handler
+
+
+@pytest.mark.parametrize(
+    "rule, expected",
+    [
+        ("overwrite", "v.text"),
+        ("keep", "t.text"),
+        ("coalesce", "COALESCE(v.text, t.text)"),
+        ("fill", "COALESCE(t.text, v.text)"),
+        ("longer", "CASE WHEN length(v.text) > COALESCE(length(t.text), -1) THEN v.text ELSE t.text END"),
+        ("greatest", "GREATEST(v.text, t.text)"),
+        ("least", "LEAST(v.text, t.text)"),
+        ("{old} || {new}", "t.text || v.text"),
+    ],
+)
+def test_merge_expression(rule, expected):
+    assert PostgresHandler._merge_expression(rule, "v.text", "t.text") == expected
+
+
+def test_split_key():
+    assert PostgresHandler._split_key("title =") == ("title", "=")
+    assert PostgresHandler._split_key("title") == ("title", "=")
+    assert PostgresHandler._split_key("score >=") == ("score", ">=")
+
+
+def test_update_data_sql(handler):
+    editing_list = [
+        {"text =": "new", "published =": None, "url": "https://a.com/1"},
+        {"text =": "newer", "published =": None, "url": "https://a.com/1"},
+    ]
+    result = handler.update_data("parsed_articles", editing_list, ["url"], merge_rules={"published": "coalesce"})
+    assert result["indicator"] and result["updated"] == 1
+    (sql, entries, template), = handler.calls
+    assert sql == (
+        "UPDATE parsed_articles AS t SET text = v.text, published = COALESCE(v.published, t.published) "
+        "FROM (VALUES %s) AS v (text, published, url) WHERE t.url = v.url RETURNING 1;"
+    )
+    assert template == "(%s::text, %s::timestamp, %s::text)"
+    # 同一參照值只保留最後一筆
+    assert entries == [["newer", None, "https://a.com/1"]]
+
+
+def test_update_data_rejects_unknown_columns(handler):
+    result = handler.update_data("parsed_articles", [{"missing =": 1, "url": "u"}], ["url"])
+    assert not result["indicator"]
+    assert handler.calls == []
+
+
+def test_upsert_data_sql(handler):
+    adding_list = [{"url": "https://a.com/1", "text": "body", "score": 1.0}]
+    result = handler.upsert_data(
+        "parsed_articles", adding_list, "url", adding_header_list=["url", "text", "published", "score"],
+        to_null=True, merge_rules={"text": "longer", "score": "keep"},
+    )
+    assert result["indicator"] and result["inserted"] == 1 and result["updated"] == 0
+    (sql, entries, _), = handler.calls
+    assert sql == (
+        "INSERT INTO parsed_articles AS t (url, text, published, score) VALUES %s ON CONFLICT (url) DO UPDATE SET "
+        "text = CASE WHEN length(EXCLUDED.text) > COALESCE(length(t.text), -1) THEN EXCLUDED.text ELSE t.text END, "
+        "published = EXCLUDED.published RETURNING (xmax = 0);"
+    )
+    assert entries == [["https://a.com/1", "body", None, 1.0]]
+
+
+def test_upsert_data_with_only_kept_columns_does_nothing_on_conflict(handler):
+    handler.upsert_data("parsed_articles", [{"url": "u", "text": "t"}], "url", adding_header_list=["url", "text"],
+                        merge_rules={"text": "keep"})
+    (sql, _, _), = handler.calls
+    assert "ON CONFLICT (url) DO NOTHING" in sql
+
+
+def test_to_positional_numbers_placeholders_and_unescapes_percent():
+    assert _to_positional("SELECT * FROM t WHERE url = ANY(%s) AND title LIKE '10%%' LIMIT %s") == (
+        "SELECT * FROM t WHERE url = ANY($1) AND title LIKE '10%' LIMIT $2",
+        2,
+    )
+    assert _to_positional("SELECT 1") == ("SELECT 1", 0)
+
+
+class _FakeConnection:
+    def __init__(self):
+        self.prepared_statements = {}
+        self.schema_generation = 0
+        self.prepare_lock = threading.RLock()
+
+
+class _FakeCursor:
+    def __init__(self, connection, duplicate=False):
+        self.connection = connection
+        self.duplicate = duplicate
+        self.executed = []
+
+    def execute(self, sql, params=None):
+        self.executed.append(sql)
+        if self.duplicate and sql.startswith("PREPARE"):
+            raise errors.DuplicatePreparedStatement("already exists")
+
+
+@pytest.fixture
+def preparing_handler():
+    handler = _RecordingHandler({})
+    handler._schema_generation = 0
+    handler.max_prepared_statements = 2
+    handler.table_header_dict = {}
+    handler.column_type_dict = {}
+    return handler
+
+
+def _prepare(handler, cursor, sql):
+    with handler._prepared(cursor, sql) as statement:
+        return statement
+
+
+def test_prepared_statement_is_prepared_once_per_connection(preparing_handler):
+    sql = "SELECT url FROM parsed_articles WHERE url = ANY(%s)"
+    cursor = _FakeCursor(_FakeConnection())
+    name, count = _prepare(preparing_handler, cursor, sql)
+    assert _prepare(preparing_handler, cursor, sql) == (name, count)
+    assert count == 1
+    assert cursor.executed.count(f"PREPARE {name} AS SELECT url FROM parsed_articles WHERE url = ANY($1)") == 1
+
+    # prepared statement 只存在於建立它的連線
+    other = _FakeCursor(_FakeConnection())
+    assert _prepare(preparing_handler, other, sql) == (name, count)
+    assert any(statement.startswith("PREPARE") for statement in other.executed)
+
+
+def test_prepared_statements_are_released_after_schema_change_or_cap(preparing_handler):
+    cursor = _FakeCursor(_FakeConnection())
+    _prepare(preparing_handler, cursor, "SELECT 1")
+    preparing_handler.invalidate_schema("parsed_articles")
+    _prepare(preparing_handler, cursor, "SELECT 1")
+    assert cursor.executed.count("DEALLOCATE ALL") == 1
+    assert len([s for s in cursor.executed if s.startswith("PREPARE")]) == 2
+
+    _prepare(preparing_handler, cursor, "SELECT 2")
+    _prepare(preparing_handler, cursor, "SELECT 3")
+    assert cursor.executed.count("DEALLOCATE ALL") == 2
+    assert list(cursor.connection.prepared_statements) == ["SELECT 3"]
+
+
+def test_existing_prepared_statement_is_reused(preparing_handler):
+    cursor = _FakeCursor(_FakeConnection(), duplicate=True)
+    name, _ = _prepare(preparing_handler, cursor, "SELECT 1")
+    assert "ROLLBACK TO SAVEPOINT prepare_statement" in cursor.executed
+    assert cursor.connection.prepared_statements["SELECT 1"] == (name, 0)
+
+
+class _FakePoolCursor:
+    def __init__(self, rows):
+        self.rows = rows
+        self.executed = []
+        self.closed = False
+        self.itersize = None
+
+    def execute(self, sql, params=None):
+        self.executed.append((sql, params))
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def close(self):
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class _FakePoolConnection:
+    def __init__(self, rows):
+        self.closed = 0
+        self.rows = rows
+        self.cursors = []
+
+    def cursor(self, name=None, cursor_factory=None):
+        cursor = _FakePoolCursor(self.rows)
+        cursor.name = name
+        self.cursors.append(cursor)
+        return cursor
+
+    def rollback(self):
+        pass
+
+
+class _FakeConnectionPool:
+    def __init__(self, rows):
+        self.idle = []
+        self.rows = rows
+        self.created = 0
+        self.discarded = 0
+
+    def getconn(self):
+        if self.idle:
+            return self.idle.pop()
+        self.created += 1
+        return _FakePoolConnection(self.rows)
+
+    def putconn(self, connection, close=False):
+        if close:
+            self.discarded += 1
+        else:
+            self.idle.append(connection)
+
+
+class _PooledHandler(PostgresHandler):
+    """連線池換成假的，不連線資料庫"""
+
+    rows = [(1, "a"), (2, "b"), (3, "c")]
+
+    def load_db_config(self, filename=None, section=None):
+        return {"host": "localhost", "port": "5432", "dbname": "test", "user": "test", "password": ""}
+
+    def _create_pool(self):
+        self.pool = _FakeConnectionPool(self.rows)
+
+
+def test_pool_checkouts_are_bounded_and_counted():
+    handler = _PooledHandler(pool_size=2)
+    barrier = threading.Barrier(6)
+
+    def borrow():
+        barrier.wait()
+        with handler._checkout():
+            time.sleep(0.02)
+
+    threads = [threading.Thread(target=borrow) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    metrics = handler.pool_metrics()
+    assert metrics["checkouts"] == 6
+    assert metrics["peak_in_use"] == 2
+    assert metrics["in_use"] == 0 and metrics["utilization"] == 0
+    assert handler.pool.created == 2
+
+
+def test_pool_checkout_times_out_when_exhausted():
+    handler = _PooledHandler(pool_size=1, pool_timeout=0.05)
+    with handler._checkout():
+        with pytest.raises(ConnectionUnavailableError):
+            with handler._checkout():
+                pass
+    assert handler.pool_metrics()["timeouts"] == 1
+
+
+def test_closed_pooled_connection_is_replaced():
+    handler = _PooledHandler(pool_size=1)
+    with handler._checkout() as connection:
+        connection.closed = 1
+    with handler._checkout() as replacement:
+        assert replacement is not connection
+    assert handler.pool.discarded == 1
+
+
+def test_iter_sql_streams_with_named_cursor_and_returns_connection():
+    handler = _PooledHandler(pool_size=1)
+    rows = handler.iter_sql("SELECT id, name FROM t WHERE id > %s;", [0], itersize=2)
+    assert next(rows) == (1, "a")
+    assert handler.pool_metrics()["in_use"] == 1
+    # 中途停止迭代也會關閉 cursor 並歸還連線
+    rows.close()
+    assert handler.pool_metrics()["in_use"] == 0
+
+    connection = handler.pool.idle[0]
+    # 借出前的健康檢查用一般 cursor，查詢本身用具名 cursor
+    cursor, = [c for c in connection.cursors if c.name]
+    assert cursor.itersize == 2 and cursor.closed
+    assert cursor.executed == [("SELECT id, name FROM t WHERE id > %s", [0])]
+    assert list(handler.iter_data("t", ["id", "name"], [("id >", 0)])) == _PooledHandler.rows
+
+
+def test_iter_sql_rejects_unknown_row_type():
+    with pytest.raises(ValueError):
+        next(_PooledHandler(pool_size=1).iter_sql("SELECT 1", row_type="list"))
@@ -0,0 +1,65 @@
+import multiprocessing
+import os
+
+import pytest
+
+pytest.importorskip("zstandard")
+
+from SearchParser.utils.raw_store import RawStore, fcntl
+
+
+def test_put_get_round_trip(tmp_path):
+    store = RawStore(str(tmp_path))
+    content = "<html>新聞內文</html>".encode("utf-8")
+    content_hash = store.put("https://www.example.com/news/1?utm_source=x", content, "utf-8")
+
+    page = store.get("https://example.com/news/1")
+    assert page.content == content
+    assert page.encoding == "utf-8"
+    assert page.content_hash == content_hash
+    assert page.source_url == "https://www.example.com/news/1?utm_source=x"
+    store.close()
+
+
+def test_identical_content_is_stored_once(tmp_path):
+    store = RawStore(str(tmp_path))
+    store.put("https://a.com/1", b"same body")
+    store.put("https://b.com/2", b"same body")
+    assert len(store) == 2
+    assert os.path.getsize(tmp_path / "segment-00001.zst") == store._writer.tell()
+    assert store._index.execute("SELECT COUNT(*) FROM blobs").fetchone()[0] == 1
+    assert [page.source_url for page in store.iter_pages(domain="b.com")] == ["https://b.com/2"]
+    store.close()
+
+
+def test_segments_roll_over(tmp_path):
+    store = RawStore(str(tmp_path), segment_max_bytes=200)
+    bodies = {f"https://a.com/{i}": os.urandom(150) for i in range(5)}
+    for url, body in bodies.items():
+        store.put(url, body)
+    assert len(list(tmp_path.glob("segment-*.zst"))) > 1
+    assert all(store.get(url).content == body for url, body in bodies.items())
+    store.close()
+
+
+def _write_pages(root, worker):
+    store = RawStore(root, segment_max_bytes=20000)
+    for i in range(100):
+        store.put(f"https://a.com/{worker}/{i}", os.urandom(200) + f"{worker}-{i}".encode() * 20)
+    store.close()
+
+
+@pytest.mark.skipif(fcntl is None, reason="需要 fcntl 才能跨行程寫入")
+def test_concurrent_processes_do_not_corrupt_offsets(tmp_path):
+    processes = [multiprocessing.Process(target=_write_pages, args=(str(tmp_path), worker)) for worker in range(3)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+        assert process.exitcode == 0
+
+    store = RawStore(str(tmp_path))
+    for worker in range(3):
+        for i in range(100):
+            assert store.get(f"https://a.com/{worker}/{i}").content.endswith(f"{worker}-{i}".encode() * 20)
+    store.close()
@@ -0,0 +1,29 @@
+from SearchParser.parser.base import BaseParser
+from SearchParser.parser.registry import ParserRegistry
+
+
+class _ExampleParser(BaseParser):
+    """只實作 extract 的解析器，適用範圍由註冊的網域決定"""
+
+    def extract(self, url, content, encoding=None):
+        return {"title": "", "published": None, "text": content.decode(), "error": None}
+
+
+def test_parser_with_only_extract_is_routed_by_domain_suffix():
+    registry = ParserRegistry(default=_ExampleParser, load_entry_points=False)
+    parser = _ExampleParser()
+    registry.register("Example.com", parser)
+
+    assert registry.get("https://news.example.com/a") is parser
+    assert registry.get("https://example.com/b") is parser
+    assert registry.get("https://notexample.com/c") is not parser
+
+
+def test_registered_specs_are_importable_names():
+    registry = ParserRegistry(default=_ExampleParser, load_entry_points=False)
+    registry.register("example.com", _ExampleParser())
+    registry.register("example.org", "my_pkg.parsers:OrgParser")
+    assert registry.registered_specs() == {
+        "example.com": f"{__name__}:_ExampleParser",
+        "example.org": "my_pkg.parsers:OrgParser",
+    }
@@ -0,0 +1,63 @@
+import threading
+
+import pytest
+import requests
+
+from SearchParser.utils import retry as retry_module
+from SearchParser.utils.retry import NO_RETRY, RetryPolicy, RetryScheduler
+
+
+class _StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"{status_code} error")
+        self.response = type("Response", (), {"status_code": status_code})()
+
+
+def test_backoff_doubles_up_to_max_delay():
+    policy = RetryPolicy(base_delay=1.0, max_delay=10.0, jitter=0.0)
+    assert [policy.backoff(attempt) for attempt in range(1, 7)] == [1.0, 2.0, 4.0, 8.0, 10.0, 10.0]
+
+
+@pytest.mark.parametrize("random_value, expected", [(0.0, 4.0), (1.0, 2.0)])
+def test_backoff_jitter_only_shortens_delay(monkeypatch, random_value, expected):
+    monkeypatch.setattr(retry_module.random, "random", lambda: random_value)
+    policy = RetryPolicy(base_delay=1.0, max_delay=10.0, jitter=0.5)
+    assert policy.backoff(3) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize(
+    "exc, expected",
+    [
+        (requests.ConnectionError("reset"), True),
+        (TimeoutError("timed out"), True),
+        (_StatusError(503), True),
+        (_StatusError(429), True),
+        (_StatusError(404), False),
+        (ValueError("找不到 <article> 標籤"), False),
+    ],
+)
+def test_should_retry_by_exception_type_and_status(exc, expected):
+    assert RetryPolicy().should_retry(exc, attempt=1) is expected
+
+
+def test_should_retry_stops_at_max_attempts():
+    policy = RetryPolicy(max_attempts=3)
+    assert policy.should_retry(TimeoutError(), attempt=2)
+    assert not policy.should_retry(TimeoutError(), attempt=3)
+    assert not NO_RETRY.should_retry(TimeoutError(), attempt=1)
+
+
+def test_should_retry_extra_types():
+    assert RetryPolicy().should_retry(KeyError("x"), attempt=1, extra_types=(KeyError,))
+
+
+def test_scheduler_runs_callbacks_in_due_order():
+    scheduler = RetryScheduler()
+    order = []
+    done = threading.Event()
+    scheduler.schedule(0.2, lambda: (order.append("late"), done.set()))
+    scheduler.schedule(0.05, lambda: order.append("early"))
+    assert done.wait(5)
+    assert order == ["early", "late"]
+    scheduler.close()
+    assert not scheduler.schedule(0, lambda: None)
@@ -0,0 +1,247 @@
+import threading
+import time
+import types
+
+import pytest
+
+from SearchParser.parser import registry
+from SearchParser.parser.base import BaseParser, FetchedContent, conditional_headers
+from SearchParser.search_parser import REPARSE_CARRIED_COLUMNS, SearchParser
+from SearchParser.utils.cancellation import cancellable_sleep
+from SearchParser.utils.retry import RetryPolicy
+
+
+class _FakeDB:
+    """記錄 upsert_data 參數的假 DB，舊資料固定回傳一列"""
+
+    header = [
+        "url", "original_url", "query", "title", "snippet", "engine", "published", "score", "text",
+        "error", "etag", "last_modified", "fetched_at", "duplicate_of", "elapsed_seconds", "inserted_at",
+    ]
+
+    def __init__(self, previous):
+        self.previous = previous
+        self.sql = []
+        self.upserts = []
+        self.updates = []
+
+    def _execute_sql(self, sql, entries=[], prepared=False):
+        self.sql.append((sql, entries))
+        rows = self.previous if sql.lstrip().startswith("SELECT") else []
+        return {"indicator": True, "data": [], "formatted_data": rows}
+
+    def get_header(self, table_name, force=False, no_ser_pk=False):
+        return list(self.header)
+
+    def upsert_data(self, table, adding_list, unique_columns, adding_header_list=[], to_null=False, merge_rules=None):
+        self.upserts.append((table, adding_list, unique_columns, adding_header_list, to_null, merge_rules))
+        return {"indicator": True}
+
+    def update_data(self, table, editing_list, reference_column_list, merge_rules=None):
+        self.updates.append((table, editing_list, reference_column_list, merge_rules))
+        return {"indicator": True}
+
+
+def test_reparse_write_only_touches_produced_columns():
+    db = _FakeDB([{"url": "https://a.com/1", "query": "q", "snippet": "s", "engine": "google", "score": 1.0,
+                   "published": None, "etag": "e", "last_modified": None, "fetched_at": None}])
+    parser = types.SimpleNamespace(db=db, _invalidate_articles=lambda urls: None)
+    SearchParser._write_reparsed_to_db(parser, [
+        {"url": "https://a.com/1", "original_url": "https://a.com/1", "title": "T", "text": "內文", "error": None},
+    ])
+
+    (table, rows, unique, header, to_null, merge_rules), = db.upserts
+    assert table == "parsed_articles" and unique == "url"
+    # 重新擷取不產生的欄位不得出現在寫入欄位中，以免被 to_null 覆寫為 NULL
+    assert "duplicate_of" not in header and "elapsed_seconds" not in header
+    assert {"title", "text", "query", "etag", "inserted_at"} <= set(header)
+    assert rows[0]["query"] == "q" and rows[0]["text"] == "內文"
+    assert merge_rules == {column: "coalesce" for column in REPARSE_CARRIED_COLUMNS}
+    # URL 以陣列參數傳入，SQL 不隨篇數改變
+    assert all("ANY(%s)" in sql and "IN (" not in sql for sql, _ in db.sql)
+
+
+def test_refresh_candidates_query_uses_array_parameter():
+    db = _FakeDB([])
+    parser = types.SimpleNamespace(db=db)
+    SearchParser._get_refresh_candidates(parser, ["https://a.com/1", "https://a.com/2"], None, 10)
+    (sql, entries), = db.sql
+    assert "ANY(%s)" in sql
+    assert len(entries) == 1 and set(entries[0]) >= {"https://a.com/1", "https://a.com/2"}
+
+
+class _FakeParser(BaseParser):
+    """不連網的解析器：依 delays 睡眠（可被取消），fail_once 中的 URL 第一次下載拋出可重試的例外"""
+
+    retry_policy = RetryPolicy(base_delay=1.0, max_delay=1.0, jitter=0.0)
+
+    def __init__(self, delays=None, fail_once=()):
+        self.delays = delays or {}
+        self.fail_once = set(fail_once)
+        self.fetched = []
+        self.tokens = {}
+        self._lock = threading.Lock()
+
+    def fetch(self, url, cancel_token=None, session=None, validators=None):
+        with self._lock:
+            self.fetched.append(url)
+            self.tokens[url] = cancel_token
+            failing = url in self.fail_once
+            self.fail_once.discard(url)
+        cancellable_sleep(self.delays.get(url, 0.05), cancel_token)
+        if failing:
+            raise TimeoutError("timed out")
+        return FetchedContent(("文章內文" * 40).encode("utf-8"))
+
+    def extract(self, url, content, encoding=None):
+        return {"title": url, "published": None, "text": content.decode("utf-8"), "error": None}
+
+
+def _results(count):
+    return [
+        {"title": f"t{i}", "url": f"https://a.test/{i}", "snippet": "", "engine": "test", "score": 1.0}
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def fake_parser():
+    parsers = []
+
+    def install(**kwargs):
+        parser = _FakeParser(**kwargs)
+        registry.register("a.test", parser)
+        parsers.append(parser)
+        return parser
+
+    yield install
+    registry.unregister("a.test")
+
+
+def _search_parser(results, **kwargs):
+    parser = SearchParser(extract_workers=0, **kwargs)
+    parser._fetch_results = lambda query, max_results, pageno=1, **kw: [dict(r) for r in results] if pageno == 1 else []
+    return parser
+
+
+def test_stops_at_min_parsed_and_cancels_in_flight_parses(fake_parser):
+    fake = fake_parser(delays={"https://a.test/0": 5})
+    parser = _search_parser(_results(8), max_workers=5)
+    started = time.monotonic()
+    result = parser.search_and_parse("q", min_parsed=3)
+    elapsed = time.monotonic() - started
+    parser.close()
+
+    assert len(result["success"]) == 3
+    assert "https://a.test/0" not in {r["url"] for r in result["success"]}
+    # 慢的那篇在達標後被取消，不必等它下載完
+    assert fake.tokens["https://a.test/0"].cancelled
+    assert elapsed < 3
+
+
+def test_iter_search_and_parse_yields_exactly_min_parsed_successes(fake_parser):
+    fake_parser()
+    parser = _search_parser(_results(8), max_workers=5, speculative_parses=None)
+    events = list(parser.iter_search_and_parse("q", min_parsed=2))
+    parser.close()
+    assert [event.status for event in events].count("success") == 2
+
+
+def test_retry_backoff_does_not_hold_a_worker(fake_parser):
+    fake = fake_parser(fail_once={"https://a.test/0"})
+    parser = _search_parser(_results(4), max_workers=1, speculative_parses=None)
+    started = time.monotonic()
+    result = parser.search_and_parse("q", min_parsed=3)
+    elapsed = time.monotonic() - started
+    parser.close()
+
+    # 唯一的工作槽在 /0 退避的 1 秒內繼續處理其他 URL
+    assert fake.fetched[:2] == ["https://a.test/0", "https://a.test/1"]
+    assert {r["url"] for r in result["success"]} == {"https://a.test/1", "https://a.test/2", "https://a.test/3"}
+    assert elapsed < 1
+
+
+def test_search_and_parse_many_parses_shared_urls_once(fake_parser):
+    fake = fake_parser()
+    parser = _search_parser(_results(3), max_workers=5)
+    results = parser.search_and_parse_many(["q1", "q2"], min_parsed=3)
+    parser.close()
+
+    assert [len(r["success"]) for r in results] == [3, 3]
+    assert sorted(fake.fetched) == [f"https://a.test/{i}" for i in range(3)]
+
+
+class _RevalidatingParser(_FakeParser):
+    """etag 仍為 "v1" 時回應 304，否則回傳新版內容"""
+
+    def fetch(self, url, cancel_token=None, session=None, validators=None):
+        self.fetched.append((url, conditional_headers(validators)))
+        if validators.get("etag") == "v1":
+            return FetchedContent(b"", status=304, etag="v1")
+        return FetchedContent(("新版內文" * 40).encode("utf-8"), etag="v2")
+
+
+def test_refresh_articles_only_rewrites_changed_articles():
+    fake = _RevalidatingParser()
+    registry.register("a.test", fake)
+    db = _FakeDB([
+        {"url": "https://a.test/same", "original_url": None, "etag": "v1", "last_modified": None, "fetched_at": None},
+        {"url": "https://a.test/changed", "original_url": None, "etag": "v0", "last_modified": None, "fetched_at": None},
+    ])
+    parser = SearchParser(db_handler=db, extract_workers=0)
+    try:
+        events = {event.record["url"]: event.status for event in parser.refresh_articles(urls=[row["url"] for row in db.previous])}
+    finally:
+        parser.close()
+        registry.unregister("a.test")
+
+    assert events == {"https://a.test/same": "not_modified", "https://a.test/changed": "refreshed"}
+    assert ("https://a.test/same", {"If-None-Match": "v1"}) in fake.fetched
+    (_, not_modified, _, _), (_, refreshed, _, _) = db.updates
+    # 304 只更新驗證欄位，200 才覆寫內文
+    assert [set(row) for row in not_modified] == [{"fetched_at =", "etag =", "last_modified =", "url ="}]
+    assert refreshed[0]["url ="] == "https://a.test/changed"
+    assert refreshed[0]["etag ="] == "v2" and refreshed[0]["text ="].startswith("新版內文")
+
+
+class _SlowExtractParser(_FakeParser):
+    def extract(self, url, content, encoding=None):
+        if url.endswith("/slow"):
+            time.sleep(1)
+        return super().extract(url, content, encoding)
+
+
+def test_reparse_reports_extract_timeout_as_failure():
+    registry.register("a.test", _SlowExtractParser())
+    pages = [
+        types.SimpleNamespace(url=f"https://a.test/{name}", source_url=f"https://a.test/{name}",
+                              content=("文章內文" * 40).encode("utf-8"), encoding="utf-8")
+        for name in ("slow", "fast")
+    ]
+    raw_store = types.SimpleNamespace(iter_pages=lambda urls=None, domain=None: iter(pages))
+    parser = SearchParser(extract_workers=0, raw_store=raw_store, extract_timeout=0.2)
+    try:
+        events = {event.record["url"]: event for event in parser.reparse()}
+    finally:
+        parser.close()
+        registry.unregister("a.test")
+
+    assert events["https://a.test/slow"].status == "failed"
+    assert "擷取超過" in events["https://a.test/slow"].record["error"]
+    assert events["https://a.test/fast"].status == "success"
+
+
+def test_extract_pool_is_opt_in():
+    parser = SearchParser()
+    assert parser.extract_executor is None
+    parser.close()
+
+    registry.register("a.test", "my_pkg.parsers:ExampleParser")
+    try:
+        parser = SearchParser(extract_workers=2)
+        # 子行程以 initializer 補上已註冊的解析器，不在主程序預先載入
+        assert parser.extract_executor._initargs == (registry.registered_specs(),)
+        assert parser.extract_executor._mp_context.get_start_method() in ("forkserver", "spawn")
+        parser.close()
+    finally:
+        registry.unregister("a.test")
@@ -0,0 +1,69 @@
+import pytest
+
+from SearchParser.utils.simhash import (
+    NearDuplicateIndex,
+    hamming_distance,
+    simhash,
+    split_bands,
+    to_signed,
+    to_unsigned,
+)
+
+ARTICLE = "台積電今日公布第三季財報，營收較去年同期成長三成，毛利率創下歷史新高，法人看好後市表現。" * 3
+REPRINT = ARTICLE + "（記者王小明／台北報導）"
+UNRELATED = "中央氣象署發布颱風海上警報，提醒民眾注意強風豪雨，並做好防颱準備，避免前往海邊與山區。" * 3
+
+
+def test_simhash_ignores_whitespace_and_short_text():
+    assert simhash("ab") is None
+    assert simhash("") is None
+    assert simhash(ARTICLE) == simhash(ARTICLE.replace("，", "， \n"))
+
+
+def test_simhash_distance_separates_reprints_from_unrelated_text():
+    assert hamming_distance(simhash(ARTICLE), simhash(REPRINT)) <= 5
+    assert hamming_distance(simhash(ARTICLE), simhash(UNRELATED)) > 5
+
+
+def test_split_bands_widths_cover_all_bits():
+    assert split_bands((1 << 64) - 1, 6) == [2047, 2047, 2047, 2047, 1023, 1023]
+    fingerprint = simhash(ARTICLE)
+    bands = split_bands(fingerprint, 6)
+    rebuilt, shift = 0, 0
+    for band, width in zip(bands, [11, 11, 11, 11, 10, 10]):
+        rebuilt |= band << shift
+        shift += width
+    assert rebuilt == fingerprint
+
+
+@pytest.mark.parametrize("value", [0, 1, (1 << 63) - 1, 1 << 63, (1 << 64) - 1])
+def test_signed_round_trip(value):
+    signed = to_signed(value)
+    assert -(1 << 63) <= signed < 1 << 63
+    assert to_unsigned(signed) == value
+
+
+def test_index_finds_near_duplicates_through_band_lookup():
+    index = NearDuplicateIndex()
+    assert index.find_or_add("https://a.com/1", simhash(ARTICLE)) is None
+    assert index.find_or_add("https://b.com/1", simhash(REPRINT)) == "https://a.com/1"
+    assert index.find_or_add("https://c.com/1", simhash(UNRELATED)) is None
+    # 同一 URL 再次加入不算重複
+    assert index.find_or_add("https://a.com/1", simhash(ARTICLE)) is None
+
+
+def test_index_matches_fingerprint_differing_in_every_band_but_one():
+    index = NearDuplicateIndex(max_distance=5)
+    fingerprint = simhash(ARTICLE)
+    # 前 5 段各翻轉 1 bit，距離 5，只剩最後一段相同
+    flipped = fingerprint ^ sum(1 << shift for shift in (0, 11, 22, 33, 44))
+    index.add("https://a.com/1", fingerprint)
+    assert index.find(flipped) == "https://a.com/1"
+    assert index.find(flipped ^ (1 << 60)) is None
+
+
+def test_index_rejects_invalid_max_distance():
+    with pytest.raises(ValueError):
+        NearDuplicateIndex(max_distance=32)
+    with pytest.raises(ValueError):
+        NearDuplicateIndex(db_handler=object(), max_distance=3)
@@ -0,0 +1,67 @@
+import pytest
+
+from SearchParser.utils.url_utils import canonicalize_url
+
+
+def test_normalizes_scheme_host_port_fragment_and_query_order():
+    url = "HTTPS://WWW.Example.com:443/news/1/?b=2&a=1#comments"
+    assert canonicalize_url(url) == "https://example.com/news/1?a=1&b=2"
+
+
+def test_keeps_non_default_port():
+    assert canonicalize_url("http://example.com:8080/a") == "http://example.com:8080/a"
+
+
+@pytest.mark.parametrize("url", ["http://example.com:99999/a", "http://example.com:abc/a", "http://[::1/a"])
+def test_invalid_url_falls_back_to_raw_url(url):
+    assert canonicalize_url(f"  {url} ") == url
+
+
+def test_drops_tracking_and_amp_params():
+    url = "https://example.com/a?utm_source=fb&fbclid=1&amp=1&id=7"
+    assert canonicalize_url(url) == "https://example.com/a?id=7"
+
+
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        ("https://example.com/amp/news/1", "https://example.com/news/1"),
+        ("https://example.com/news/1/amp/", "https://example.com/news/1"),
+        ("https://example.com/news/1.amp.html", "https://example.com/news/1.html"),
+    ],
+)
+def test_strips_amp_paths(url, expected):
+    assert canonicalize_url(url) == expected
+
+
+def test_keeps_reserved_percent_escapes():
+    assert canonicalize_url("https://example.com/a%2fb") == "https://example.com/a%2Fb"
+    assert canonicalize_url("https://example.com/a%2Fb") != canonicalize_url("https://example.com/a/b")
+
+
+def test_decodes_unreserved_escapes_and_encodes_non_ascii():
+    assert canonicalize_url("https://example.com/%7euser") == "https://example.com/~user"
+    encoded = "https://example.com/%E6%96%B0%E8%81%9E"
+    assert canonicalize_url("https://example.com/新聞") == encoded
+    assert canonicalize_url("https://example.com/%e6%96%b0%e8%81%9e") == encoded
+    assert canonicalize_url("https://example.com/100%") == "https://example.com/100%25"
+
+
+@pytest.mark.parametrize(
+    "host, expected",
+    [
+        ("www.ctee.com.tw", "ctee.com.tw"),
+        ("m.bbc.co.uk", "bbc.co.uk"),
+        ("amp.example.com", "example.com"),
+        ("www.com.tw", "www.com.tw"),
+        ("www.co.uk", "www.co.uk"),
+        ("m.com", "m.com"),
+    ],
+)
+def test_strips_host_prefix_only_when_registrable_domain_remains(host, expected):
+    assert canonicalize_url(f"https://{host}/a") == f"https://{expected}/a"
+
+
+def test_applies_domain_rules():
+    assert canonicalize_url("https://www.youtube.com/watch?list=x&v=abc") == "https://youtube.com/watch?v=abc"
+    assert canonicalize_url("https://www.ctee.com.tw/news/1?from=home") == "https://ctee.com.tw/news/1"
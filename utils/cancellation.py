@@ -0,0 +1,42 @@
+import threading
+import time
+from typing import Optional
+
+
+class ParseCancelledError(Exception):
+    """解析工作在完成前被取消"""
+
+
+class CancellationToken:
+    """跨執行緒共用的取消旗標，解析器在下載、重試與解析步驟之間檢查"""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise ParseCancelledError("解析已取消")
+
+    def sleep(self, seconds: float):
+        """可被取消中斷的 sleep，取消時立即拋出 ParseCancelledError"""
+        if self._event.wait(seconds):
+            raise ParseCancelledError("解析已取消")
+
+
+def check_cancelled(cancel_token: Optional[CancellationToken]):
+    if cancel_token is not None:
+        cancel_token.raise_if_cancelled()
+
+
+def cancellable_sleep(seconds: float, cancel_token: Optional[CancellationToken]):
+    if cancel_token is None:
+        time.sleep(seconds)
+    else:
+        cancel_token.sleep(seconds)
@@ -0,0 +1,11 @@
+from typing import Dict
+
+
+def execute_sql(db_handler, sql: str, entries=[], prepared: bool = False) -> Dict:
+    """呼叫 db_handler._execute_sql；只有支援 prepared statement 的 handler（PostgresHandler）才帶 prepared 參數
+
+    SQLite 的 DBHandler 等其他 handler 的 _execute_sql 沒有 prepared 參數，改以一般查詢執行。
+    """
+    if prepared and getattr(db_handler, "prepare_statements", False):
+        return db_handler._execute_sql(sql, entries, prepared=True)
+    return db_handler._execute_sql(sql, entries)
@@ -0,0 +1,206 @@
+import re
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from .logger import logger
+
+_PATTERN_RE = re.compile(r"^[a-z]+://([^/?#]+)(/[^/?#]*)?")
+
+# 與 url_pattern() 相同的規則：主機 + 第一段路徑，數字一律換成 #
+PATTERN_SQL = (
+    "substring(url from '^[a-z]+://([^/?#]+)') || "
+    "regexp_replace(coalesce(substring(url from '^[a-z]+://[^/?#]+(/[^/?#]*)'), '/'), '[0-9]+', '#', 'g')"
+)
+
+
+def url_pattern(url: str) -> Optional[str]:
+    """https://ctee.com.tw/news/20240501700123.html → ctee.com.tw/news"""
+    m = _PATTERN_RE.match(url)
+    if m is None:
+        return None
+    return m.group(1) + re.sub(r"[0-9]+", "#", m.group(2) or "/")
+
+
+def pattern_domain(pattern: str) -> str:
+    return pattern.split("/", 1)[0]
+
+
+@dataclass
+class _Counter:
+    successes: int = 0
+    failures: int = 0
+    latency_total: float = 0.0
+    latency_count: int = 0
+
+    @property
+    def attempts(self) -> int:
+        return self.successes + self.failures
+
+    def add(self, other: "_Counter"):
+        self.successes += other.successes
+        self.failures += other.failures
+        self.latency_total += other.latency_total
+        self.latency_count += other.latency_count
+
+
+class DomainStats:
+    """各網域與 URL 樣式（主機 + 第一段路徑）的成功率與耗時統計，用來排序與過濾候選 URL
+
+    統計來自 parsed_articles / failed_articles 近 window 內的紀錄，每隔 refresh_interval 秒重新載入，
+    期間由 record() 即時累加本程序的結果。估計值逐層平滑（全體 → 網域 → 樣式），
+    樣本少的樣式會接近所屬網域的表現；候選依「預估成功率 / 預估耗時」由高到低排序。
+    """
+
+    def __init__(
+        self,
+        db_handler=None,
+        skip_below: Optional[float] = None,
+        min_samples: int = 10,
+        window: timedelta = timedelta(days=30),
+        refresh_interval: float = 600.0,
+        prior_strength: float = 2.0,
+        default_success_rate: float = 0.8,
+        default_latency: float = 5.0,
+    ):
+        self.db = db_handler
+        self.skip_below = skip_below
+        self.min_samples = min_samples
+        self.window = window
+        self.refresh_interval = refresh_interval
+        self.prior_strength = prior_strength
+        self.default_success_rate = default_success_rate
+        self.default_latency = default_latency
+        self.skipped = 0
+        self._lock = threading.Lock()
+        self._patterns: Dict[str, _Counter] = {}
+        self._domains: Dict[str, _Counter] = {}
+        self._total = _Counter()
+        self._loaded_at: Optional[float] = None
+
+    def load(self):
+        """自 DB 重新彙整統計（以 DB 為準，取代先前即時累加的數字）"""
+        self._loaded_at = time.monotonic()
+        if self.db is None:
+            return
+        since = datetime.now() - self.window
+        sql = f"""
+            SELECT {PATTERN_SQL} AS pattern,
+                   SUM(ok) AS successes,
+                   COUNT(*) - SUM(ok) AS failures,
+                   SUM(elapsed_seconds) AS latency_total,
+                   COUNT(elapsed_seconds) AS latency_count
+            FROM (
+                SELECT url, 1 AS ok, elapsed_seconds FROM parsed_articles WHERE inserted_at >= %s
+                UNION ALL
+                SELECT url, 0 AS ok, elapsed_seconds FROM failed_articles WHERE inserted_at >= %s
+            ) t
+            GROUP BY pattern
+        """
+        result = self.db._execute_sql(sql, [since, since])
+        if not result["indicator"]:
+            logger.error(f"[網域統計] 載入失敗：{result['message']}")
+            return
+
+        patterns = {}
+        for row in result["formatted_data"]:
+            if row["pattern"] is None:
+                continue
+            patterns[row["pattern"]] = _Counter(
+                int(row["successes"] or 0),
+                int(row["failures"] or 0),
+                float(row["latency_total"] or 0.0),
+                int(row["latency_count"] or 0),
+            )
+        with self._lock:
+            self._patterns = patterns
+            self._domains = {}
+            self._total = _Counter()
+            for pattern, counter in patterns.items():
+                self._domains.setdefault(pattern_domain(pattern), _Counter()).add(counter)
+                self._total.add(counter)
+        logger.info(f"[網域統計] 已載入 {len(self._domains)} 個網域、{len(patterns)} 個樣式，共 {self._total.attempts} 筆紀錄")
+
+    def _maybe_reload(self):
+        if self._loaded_at is None or time.monotonic() - self._loaded_at >= self.refresh_interval:
+            self.load()
+
+    def record(self, url: str, success: bool, elapsed: Optional[float] = None):
+        pattern = url_pattern(url)
+        if pattern is None:
+            return
+        observed = _Counter(int(success), int(not success), elapsed or 0.0, int(elapsed is not None))
+        with self._lock:
+            self._patterns.setdefault(pattern, _Counter()).add(observed)
+            self._domains.setdefault(pattern_domain(pattern), _Counter()).add(observed)
+            self._total.add(observed)
+
+    def _smooth(self, counter: Optional[_Counter], prior_rate: float, prior_latency: float) -> Tuple[float, float]:
+        if counter is None:
+            return prior_rate, prior_latency
+        k = self.prior_strength
+        rate = (counter.successes + k * prior_rate) / (counter.attempts + k)
+        latency = (counter.latency_total + k * prior_latency) / (counter.latency_count + k)
+        return rate, latency
+
+    def _estimate(self, pattern: str) -> Tuple[float, float]:
+        rate, latency = self._smooth(self._total, self.default_success_rate, self.default_latency)
+        rate, latency = self._smooth(self._domains.get(pattern_domain(pattern)), rate, latency)
+        return self._smooth(self._patterns.get(pattern), rate, latency)
+
+    def estimate(self, url: str) -> Tuple[float, float]:
+        """回傳 (預估成功率, 預估耗時秒數)"""
+        pattern = url_pattern(url)
+        with self._lock:
+            if pattern is None:
+                return self._smooth(self._total, self.default_success_rate, self.default_latency)
+            return self._estimate(pattern)
+
+    def score(self, url: str) -> float:
+        """每秒預期成功篇數"""
+        rate, latency = self.estimate(url)
+        return rate / max(latency, 0.1)
+
+    def should_skip(self, url: str) -> bool:
+        if self.skip_below is None:
+            return False
+        pattern = url_pattern(url)
+        if pattern is None:
+            return False
+        domain = pattern_domain(pattern)
+        with self._lock:
+            counter = self._domains.get(domain)
+            if counter is None or counter.attempts < self.min_samples:
+                return False
+            rate, _ = self._smooth(
+                counter, *self._smooth(self._total, self.default_success_rate, self.default_latency)
+            )
+        return rate < self.skip_below
+
+    def arrange(self, results: List[Dict]) -> List[Dict]:
+        """移除低成功率網域的結果，其餘依每秒預期成功篇數排序（分數相同時保留搜尋引擎順序）"""
+        self._maybe_reload()
+        kept = [r for r in results if not self.should_skip(r["url"])]
+        if len(kept) < len(results):
+            self.skipped += len(results) - len(kept)
+            logger.info(f"[網域統計] 略過 {len(results) - len(kept)} 個低成功率網域的結果")
+        return sorted(kept, key=lambda r: -self.score(r["url"]))
+
+    def snapshot(self) -> List[Dict]:
+        """各樣式目前的統計與估計值，依嘗試次數由多到少排列"""
+        with self._lock:
+            rows = []
+            for pattern, counter in self._patterns.items():
+                rate, latency = self._estimate(pattern)
+                rows.append({
+                    "pattern": pattern,
+                    "domain": pattern_domain(pattern),
+                    "attempts": counter.attempts,
+                    "successes": counter.successes,
+                    "success_rate": round(rate, 3),
+                    "latency": round(latency, 3),
+                    "score": round(rate / max(latency, 0.1), 3),
+                })
+        return sorted(rows, key=lambda row: -row["attempts"])
@@ -0,0 +1,288 @@
+import socket
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .cache import TTLCache
+from .logger import logger
+from .retry import RetryScheduler
+
+
+class FetchRejectedError(Exception):
+    """回應不符合 FetchLimits（內容類型、大小或總時限），訊息即為寫入 error 欄位的原因；不會重試"""
+
+
+@dataclass(frozen=True)
+class FetchLimits:
+    """下載防護：先看標頭拒絕非文章內容，再以串流讀取並限制大小與總時間（含連線）"""
+
+    max_bytes: int = 5 * 1024 * 1024
+    deadline: float = 20.0
+    allowed_types: Tuple[str, ...] = (
+        "text/html",
+        "application/xhtml+xml",
+        "application/json",
+        "text/plain",
+        "text/xml",
+        "application/xml",
+    )
+    chunk_size: int = 64 * 1024
+
+    def check_headers(self, headers):
+        content_type = (headers.get("Content-Type") or "").split(";")[0].strip().lower()
+        # 未宣告類型時照常下載，交給擷取器判斷
+        if content_type and content_type not in self.allowed_types:
+            raise FetchRejectedError(f"已拒絕：不支援的內容類型 {content_type}")
+        declared = headers.get("Content-Length")
+        if declared and declared.isdigit() and int(declared) > self.max_bytes:
+            raise FetchRejectedError(f"已拒絕：Content-Length {declared} bytes 超過上限 {self.max_bytes} bytes")
+
+    def check_progress(self, size: int, started: float):
+        if size > self.max_bytes:
+            raise FetchRejectedError(f"已截斷：回應超過 {self.max_bytes} bytes")
+        if time.monotonic() - started > self.deadline:
+            raise FetchRejectedError(f"已截斷：下載超過總時限 {self.deadline} 秒（已讀 {size} bytes）")
+
+    def socket_timeout(self, started: float, timeout: float) -> float:
+        """單次 socket 等待不超過剩餘的總時限"""
+        remaining = self.deadline - (time.monotonic() - started)
+        if remaining <= 0:
+            raise FetchRejectedError(f"已截斷：下載超過總時限 {self.deadline} 秒")
+        return min(timeout, remaining)
+
+
+DEFAULT_FETCH_LIMITS = FetchLimits()
+
+
+def _response_socket(response) -> Optional[socket.socket]:
+    raw = getattr(response, "raw", None)
+    sock = getattr(getattr(raw, "_connection", None), "sock", None)
+    if sock is None:
+        # 非 keep-alive 的回應，http.client 已把 socket 從連線物件移交給讀取端
+        fp = getattr(getattr(raw, "_fp", None), "fp", None)
+        sock = getattr(getattr(fp, "raw", None), "_sock", None)
+    return sock
+
+
+def _abort_response(response):
+    # close() 無法喚醒阻塞中的 recv，需直接 shutdown 底層 socket
+    sock = _response_socket(response)
+    if sock is not None:
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+    response.close()
+
+
+class _ReadGuard:
+    """read_limited 讀取期間的中止開關；讀完後才到期的計時不會動到已歸還連線池的 socket"""
+
+    def __init__(self, response):
+        self._lock = threading.Lock()
+        self._response = response
+
+    def abort(self):
+        with self._lock:
+            if self._response is not None:
+                _abort_response(self._response)
+
+    def release(self):
+        with self._lock:
+            self._response = None
+
+
+# 所有下載共用一條計時執行緒，不必每次下載各開一個 threading.Timer
+_read_watchdog = RetryScheduler(name="search-parser-read-watchdog")
+
+
+def read_limited(response, limits: FetchLimits, started: float) -> bytes:
+    """逐塊讀取 stream=True 的回應，超過大小或總時限即中止
+
+    單次 socket 讀取可能等待整個 chunk，總時限到時由共用的計時執行緒關閉連線。
+    """
+    guard = _ReadGuard(response)
+    _read_watchdog.schedule(max(0.0, limits.deadline - (time.monotonic() - started)), guard.abort)
+    body = bytearray()
+    try:
+        for chunk in response.iter_content(limits.chunk_size):
+            body += chunk
+            limits.check_progress(len(body), started)
+    except FetchRejectedError:
+        raise
+    except Exception:
+        # 計時器關閉連線造成的讀取錯誤
+        limits.check_progress(len(body), started)
+        raise
+    finally:
+        guard.release()
+    # 連線被計時器關閉時 iter_content 也可能正常結束，需再確認一次
+    limits.check_progress(len(body), started)
+    return bytes(body)
+
+
+class HttpSession:
+    """SearchParser 與各解析器共用的 keep-alive HTTP session，可依主機設定連線池大小與重試
+
+    pool_maxsize 為每個主機的連線數上限，應不小於同時下載的執行緒數，否則多出的連線用完即丟（"Connection pool is full"）。
+    dns_cache_ttl 會啟用整個 process 的 DNS 快取（見 enable_dns_cache），最後一個啟用它的 session close() 時還原。
+    """
+
+    def __init__(
+        self,
+        pool_connections: int = 20,
+        pool_maxsize: int = 32,
+        host_pool_sizes: Optional[Dict[str, int]] = None,
+        retries: int = 0,
+        backoff_factor: float = 0.3,
+        headers: Optional[Dict[str, str]] = None,
+        dns_cache_ttl: Optional[float] = None,
+    ):
+        self._uses_dns_cache = bool(dns_cache_ttl)
+        if self._uses_dns_cache:
+            _acquire_dns_cache(dns_cache_ttl)
+
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self._pool_lock = threading.Lock()
+        self.session = requests.Session()
+        if headers:
+            self.session.headers.update(headers)
+
+        self.retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(["GET", "HEAD"]),
+            raise_on_status=False,
+        )
+        self._mount_default_adapter()
+
+        # 高流量主機使用獨立、較大的連線池，requests 以最長前綴比對 adapter
+        for host, size in (host_pool_sizes or {}).items():
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=size, max_retries=self.retry)
+            self.session.mount(f"http://{host}", adapter)
+            self.session.mount(f"https://{host}", adapter)
+
+    def _mount_default_adapter(self):
+        default_adapter = HTTPAdapter(
+            pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize, max_retries=self.retry
+        )
+        self.session.mount("http://", default_adapter)
+        self.session.mount("https://", default_adapter)
+
+    def ensure_pool_maxsize(self, pool_maxsize: int):
+        """將預設連線池放大到至少 pool_maxsize（host_pool_sizes 指定的主機不受影響）；已有的連線由舊池用完後釋放"""
+        with self._pool_lock:
+            if pool_maxsize <= self.pool_maxsize:
+                return
+            self.pool_maxsize = pool_maxsize
+            self._mount_default_adapter()
+        logger.info(f"[HttpSession] 連線池上限調整為 {pool_maxsize}")
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.session.get(url, **kwargs)
+
+    def close(self):
+        self.session.close()
+        if self._uses_dns_cache:
+            self._uses_dns_cache = False
+            _release_dns_cache()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+_default_session: Optional[HttpSession] = None
+_default_session_lock = threading.Lock()
+
+
+def get_default_session(pool_maxsize: Optional[int] = None) -> HttpSession:
+    """process 內共用的 session；指定 pool_maxsize 時連線池至少放大到該大小（如 SearchParser 的下載執行緒數）"""
+    global _default_session
+    with _default_session_lock:
+        if _default_session is None:
+            _default_session = HttpSession()
+        session = _default_session
+    if pool_maxsize:
+        session.ensure_pool_maxsize(pool_maxsize)
+    return session
+
+
+_dns_cache: Optional[TTLCache] = None
+_dns_cache_lock = threading.Lock()
+# 以 dns_cache_ttl 啟用快取、尚未 close() 的 HttpSession 數；直接呼叫 enable_dns_cache() 時不隨 session 還原
+_dns_cache_sessions = 0
+_dns_cache_pinned = False
+_original_getaddrinfo = socket.getaddrinfo
+
+
+def _cached_getaddrinfo(host, port, *args, **kwargs):
+    cache = _dns_cache
+    if cache is None:
+        return _original_getaddrinfo(host, port, *args, **kwargs)
+    key = (host, port, args, tuple(sorted(kwargs.items())))
+    result = cache.get(key)
+    if result is None:
+        result = _original_getaddrinfo(host, port, *args, **kwargs)
+        cache.set(key, result)
+    return result
+
+
+def _install_dns_cache(ttl: float, maxsize: int):
+    global _dns_cache
+    if _dns_cache is None:
+        _dns_cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        socket.getaddrinfo = _cached_getaddrinfo
+        logger.info(f"[HttpSession] 已啟用 DNS 快取，TTL={ttl} 秒")
+
+
+def _uninstall_dns_cache():
+    global _dns_cache, _dns_cache_sessions, _dns_cache_pinned
+    if _dns_cache is not None:
+        socket.getaddrinfo = _original_getaddrinfo
+        _dns_cache = None
+        logger.info("[HttpSession] 已停用 DNS 快取")
+    _dns_cache_sessions = 0
+    _dns_cache_pinned = False
+
+
+def enable_dns_cache(ttl: float = 300, maxsize: int = 1024):
+    """以 TTL 快取 DNS 查詢結果
+
+    這會替換整個 process 的 socket.getaddrinfo，影響所有函式庫的連線，直到呼叫 disable_dns_cache() 還原。
+    已啟用時沿用現有的快取設定。
+    """
+    global _dns_cache_pinned
+    with _dns_cache_lock:
+        _dns_cache_pinned = True
+        _install_dns_cache(ttl, maxsize)
+
+
+def disable_dns_cache():
+    """還原 socket.getaddrinfo 並清空 DNS 快取（包含由 HttpSession 啟用的）"""
+    with _dns_cache_lock:
+        _uninstall_dns_cache()
+
+
+def _acquire_dns_cache(ttl: float):
+    global _dns_cache_sessions
+    with _dns_cache_lock:
+        _dns_cache_sessions += 1
+        _install_dns_cache(ttl, 1024)
+
+
+def _release_dns_cache():
+    global _dns_cache_sessions
+    with _dns_cache_lock:
+        _dns_cache_sessions = max(0, _dns_cache_sessions - 1)
+        if _dns_cache_sessions == 0 and not _dns_cache_pinned:
+            _uninstall_dns_cache()
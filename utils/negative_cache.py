@@ -0,0 +1,81 @@
+import re
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from .logger import logger
+
+# 依序比對錯誤訊息，第一個符合的即為該次失敗的類別
+FAILURE_CLASSES = (
+    ("layout", re.compile(r"找不到 <article> 標籤|無法從網址中擷取文章 ID")),
+    ("timeout", re.compile(r"timed? ?out|timeout|下載超過總時限", re.I)),
+    ("too_large", re.compile(r"^已(截斷：回應超過|拒絕：Content-Length)")),
+    ("rejected", re.compile(r"^已拒絕")),
+    ("connection", re.compile(r"connection|name or service not known|temporary failure in name resolution", re.I)),
+    # requests："404 Client Error: …"；httpx："Client error '404 Not Found' …"
+    ("not_found", re.compile(r"(?:^|')(404|410) ")),
+    ("forbidden", re.compile(r"(?:^|')(401|403|451) ")),
+    ("server", re.compile(r"(?:^|')(429|5\d\d) ")),
+)
+
+# None 表示直到該網域的解析器 version 變更前都不再嘗試
+DEFAULT_TTLS: Dict[str, Optional[timedelta]] = {
+    "layout": None,
+    "timeout": timedelta(minutes=10),
+    "connection": timedelta(minutes=10),
+    "server": timedelta(minutes=30),
+    "forbidden": timedelta(days=1),
+    "not_found": timedelta(days=7),
+    "too_large": timedelta(days=7),
+    "rejected": timedelta(days=7),
+    # 沒有錯誤訊息：下載成功但內文不足 50 字（付費牆、索引頁等）
+    "too_short": timedelta(days=1),
+}
+
+
+def classify_failure(error: Optional[str]) -> str:
+    if not error:
+        return "too_short"
+    for name, pattern in FAILURE_CLASSES:
+        if pattern.search(error):
+            return name
+    return "other"
+
+
+class NegativeCache:
+    """以 failed_articles 作為負面快取：近期失敗的 URL 在該錯誤類別的 TTL 內不再下載
+
+    查詢與 parsed_articles 的快取查詢合併為同一次 SQL；saved 累計因此省下的嘗試次數。
+    """
+
+    def __init__(self, ttls: Optional[Dict[str, Optional[timedelta]]] = None, default_ttl: timedelta = timedelta(hours=1)):
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.default_ttl = default_ttl
+        self.saved = 0
+        self.saved_by_class: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def is_fresh(
+        self,
+        error: Optional[str],
+        failed_at: Optional[datetime],
+        recorded_version: Optional[str],
+        current_version: str,
+        now: Optional[datetime] = None,
+    ) -> bool:
+        """該筆失敗紀錄是否仍有效（有效則不重試）"""
+        ttl = self.ttls.get(classify_failure(error), self.default_ttl)
+        if ttl is None:
+            # 舊資料沒有記錄版本，重試一次以補上
+            return recorded_version is not None and recorded_version == current_version
+        if failed_at is None:
+            return False
+        return (now or datetime.now()) - failed_at < ttl
+
+    def count_saved(self, url: str, error: Optional[str]):
+        failure_class = classify_failure(error)
+        with self._lock:
+            self.saved += 1
+            self.saved_by_class[failure_class] += 1
+        logger.info(f"[負面快取] 略過近期失敗的 URL（{failure_class}）：{url}")
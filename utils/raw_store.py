@@ -0,0 +1,209 @@
+import hashlib
+import mmap
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, NamedTuple, Optional
+from urllib.parse import urlsplit
+
+import zstandard
+
+try:
+    import fcntl
+except ImportError:  # Windows 沒有 fcntl，只能由單一行程寫入
+    fcntl = None
+
+from .logger import logger
+from .url_utils import canonicalize_url
+
+INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    content_hash TEXT PRIMARY KEY,
+    segment INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    source_url TEXT,
+    host TEXT,
+    content_hash TEXT NOT NULL,
+    encoding TEXT,
+    fetched_at TEXT
+);
+CREATE INDEX IF NOT EXISTS pages_host_idx ON pages (host);
+"""
+
+
+class RawPage(NamedTuple):
+    url: str
+    source_url: str
+    content: bytes
+    encoding: Optional[str]
+    content_hash: str
+    fetched_at: str
+
+
+class RawStore:
+    """原始回應（HTML / JSON）儲存區，供改善擷取器後不連網重新解析
+
+    內容以 sha256 去重，每筆各自壓成一個 zstd frame 附加到分段檔（segment-00001.zst …），
+    讀取時以 mmap 直接切出該 frame 解壓；URL → 內容雜湊的索引存在同目錄的 SQLite。
+    寫入分段檔時以 flock 鎖住同目錄的 segment.lock，多個行程可共用同一個儲存區（需支援 fcntl 的平台）。
+    """
+
+    def __init__(self, root: str = "./data/raw_store", segment_max_bytes: int = 256 * 1024 * 1024, level: int = 3):
+        self.root = root
+        self.segment_max_bytes = segment_max_bytes
+        self.level = level
+        os.makedirs(root, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._maps: Dict[int, mmap.mmap] = {}
+        self._index = sqlite3.connect(os.path.join(root, "index.sqlite"), check_same_thread=False)
+        self._index.execute("PRAGMA journal_mode=WAL")
+        self._index.execute("PRAGMA synchronous=NORMAL")
+        self._index.executescript(INDEX_SCHEMA)
+
+        row = self._index.execute("SELECT MAX(segment) FROM blobs").fetchone()
+        self._segment = row[0] or 1
+        self._writer = open(self._segment_path(self._segment), "ab")
+        self._lock_file = open(os.path.join(root, "segment.lock"), "ab")
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.root, f"segment-{segment:05d}.zst")
+
+    def _compressor(self) -> zstandard.ZstdCompressor:
+        # ZstdCompressor 不可跨執行緒共用
+        if not hasattr(self._local, "compressor"):
+            self._local.compressor = zstandard.ZstdCompressor(level=self.level)
+            self._local.decompressor = zstandard.ZstdDecompressor()
+        return self._local.compressor
+
+    def _decompressor(self) -> zstandard.ZstdDecompressor:
+        self._compressor()
+        return self._local.decompressor
+
+    @contextmanager
+    def _segment_lock(self):
+        """跨行程的寫入鎖，並切換到其他行程可能已開啟的較新分段檔"""
+        if fcntl is not None:
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            if os.path.exists(self._segment_path(self._segment + 1)):
+                while os.path.exists(self._segment_path(self._segment + 1)):
+                    self._segment += 1
+                self._writer.close()
+                self._writer = open(self._segment_path(self._segment), "ab")
+            # 其他行程可能已附加資料，位移一律以目前檔尾為準
+            self._writer.seek(0, os.SEEK_END)
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _has_blob(self, content_hash: str) -> bool:
+        return self._index.execute("SELECT 1 FROM blobs WHERE content_hash = ?", (content_hash,)).fetchone() is not None
+
+    def put(self, url: str, content: bytes, encoding: Optional[str] = None) -> str:
+        """存入原始內容並回傳內容雜湊；相同內容只存一份"""
+        source_url = url
+        url = canonicalize_url(url)
+        content_hash = hashlib.sha256(content).hexdigest()
+        fetched_at = datetime.now().isoformat(timespec="seconds")
+
+        with self._lock:
+            exists = self._has_blob(content_hash)
+        # 壓縮在鎖外進行，多個下載執行緒可同時寫入
+        frame = None if exists else self._compressor().compress(content)
+
+        with self._lock:
+            if frame is not None and not self._has_blob(content_hash):
+                with self._segment_lock():
+                    # 等鎖期間其他行程可能已寫入相同內容
+                    if not self._has_blob(content_hash):
+                        if self._writer.tell() + len(frame) > self.segment_max_bytes and self._writer.tell() > 0:
+                            self._writer.close()
+                            self._segment += 1
+                            self._writer = open(self._segment_path(self._segment), "ab")
+                        offset = self._writer.tell()
+                        self._writer.write(frame)
+                        self._writer.flush()
+                        self._index.execute(
+                            "INSERT INTO blobs (content_hash, segment, offset, length, size) VALUES (?, ?, ?, ?, ?)",
+                            (content_hash, self._segment, offset, len(frame), len(content)),
+                        )
+                        # 釋放寫入鎖前提交，其他行程才看得到這筆 blob
+                        self._index.commit()
+            self._index.execute(
+                "INSERT INTO pages (url, source_url, host, content_hash, encoding, fetched_at) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (url) DO UPDATE SET source_url = excluded.source_url, content_hash = excluded.content_hash, "
+                "encoding = excluded.encoding, fetched_at = excluded.fetched_at",
+                (url, source_url, urlsplit(url).hostname, content_hash, encoding, fetched_at),
+            )
+            self._index.commit()
+        return content_hash
+
+    def _read(self, segment: int, offset: int, length: int) -> bytes:
+        with self._lock:
+            mapped = self._maps.get(segment)
+            if mapped is None or offset + length > len(mapped):
+                # 寫入中的分段檔會持續變長，讀超過目前映射範圍時重新映射
+                if mapped is not None:
+                    mapped.close()
+                with open(self._segment_path(segment), "rb") as f:
+                    mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self._maps[segment] = mapped
+            frame = mapped[offset:offset + length]
+        return self._decompressor().decompress(frame)
+
+    def get(self, url: str) -> Optional[RawPage]:
+        url = canonicalize_url(url)
+        with self._lock:
+            row = self._index.execute(
+                "SELECT p.url, p.source_url, p.encoding, p.content_hash, p.fetched_at, b.segment, b.offset, b.length "
+                "FROM pages p JOIN blobs b ON b.content_hash = p.content_hash WHERE p.url = ?",
+                (url,),
+            ).fetchone()
+        if row is None:
+            return None
+        return RawPage(row[0], row[1], self._read(*row[5:]), row[2], row[3], row[4])
+
+    def iter_pages(self, urls: Optional[Iterable[str]] = None, domain: Optional[str] = None) -> Iterator[RawPage]:
+        """依分段檔位置順序讀出，可限定 URL 或網域（含子網域）"""
+        sql = (
+            "SELECT p.url, p.source_url, p.encoding, p.content_hash, p.fetched_at, b.segment, b.offset, b.length "
+            "FROM pages p JOIN blobs b ON b.content_hash = p.content_hash"
+        )
+        params = []
+        if domain:
+            domain = domain.lower().lstrip(".")
+            sql += " WHERE (p.host = ? OR p.host LIKE ?)"
+            params += [domain, f"%.{domain}"]
+        sql += " ORDER BY b.segment, b.offset"
+        with self._lock:
+            rows = self._index.execute(sql, params).fetchall()
+
+        if urls is not None:
+            wanted = {canonicalize_url(u) for u in urls}
+            rows = [row for row in rows if row[0] in wanted]
+        logger.info(f"[RawStore] 讀取 {len(rows)} 筆原始內容")
+        for row in rows:
+            yield RawPage(row[0], row[1], self._read(*row[5:]), row[2], row[3], row[4])
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._index.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._writer.close()
+            self._lock_file.close()
+            for mapped in self._maps.values():
+                mapped.close()
+            self._maps.clear()
+            self._index.close()
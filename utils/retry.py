@@ -0,0 +1,105 @@
+import heapq
+import itertools
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Optional, Tuple, Type
+
+import requests
+
+from .logger import logger
+
+DEFAULT_RETRY_ON: Tuple[Type[BaseException], ...] = (
+    requests.ConnectionError,
+    requests.Timeout,
+    ConnectionError,
+    TimeoutError,
+)
+DEFAULT_RETRY_STATUSES: Tuple[int, ...] = (429, 500, 502, 503, 504)
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """單一解析器的重試規則：哪些例外可重試、最多幾次、指數退避的上下限"""
+
+    retry_on: Tuple[Type[BaseException], ...] = DEFAULT_RETRY_ON
+    retry_statuses: Tuple[int, ...] = DEFAULT_RETRY_STATUSES
+    max_attempts: int = 3
+    base_delay: float = 1.0
+    max_delay: float = 10.0
+    jitter: float = 0.5
+
+    def should_retry(
+        self,
+        exc: BaseException,
+        attempt: int,
+        extra_types: Tuple[Type[BaseException], ...] = (),
+    ) -> bool:
+        if attempt >= self.max_attempts:
+            return False
+        if isinstance(exc, self.retry_on + extra_types):
+            return True
+        # requests.HTTPError 與 httpx.HTTPStatusError 都帶有 response.status_code
+        status_code = getattr(getattr(exc, "response", None), "status_code", None)
+        return status_code in self.retry_statuses
+
+    def backoff(self, attempt: int) -> float:
+        """第 attempt 次失敗後的等待秒數：指數成長並加上隨機抖動，避免同時重打同一站"""
+        delay = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return delay * (1 - self.jitter * random.random())
+
+
+NO_RETRY = RetryPolicy(max_attempts=1)
+
+
+@dataclass(order=True)
+class _ScheduledCall:
+    run_at: float
+    seq: int
+    callback: Callable[[], None] = field(compare=False)
+
+
+class RetryScheduler:
+    """單一背景執行緒依時間排程重試，等待期間不佔用任何解析工作執行緒"""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic, name: str = "search-parser-retry"):
+        self._clock = clock
+        self._name = name
+        self._heap = []
+        self._seq = itertools.count()
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+    def schedule(self, delay: float, callback: Callable[[], None]) -> bool:
+        """delay 秒後在排程執行緒上呼叫 callback；已關閉時回傳 False"""
+        with self._condition:
+            if self._closed:
+                return False
+            heapq.heappush(self._heap, _ScheduledCall(self._clock() + delay, next(self._seq), callback))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
+                self._thread.start()
+            self._condition.notify()
+        return True
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._closed and (not self._heap or self._heap[0].run_at > self._clock()):
+                    timeout = self._heap[0].run_at - self._clock() if self._heap else None
+                    self._condition.wait(timeout)
+                if self._closed:
+                    return
+                call = heapq.heappop(self._heap)
+            try:
+                call.callback()
+            except Exception as e:
+                logger.error(f"[RetryScheduler] 重試排程執行失敗：{e}")
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._heap.clear()
+            self._condition.notify()
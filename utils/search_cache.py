@@ -0,0 +1,95 @@
+import hashlib
+import json
+from datetime import datetime
+from typing import Dict, Optional
+
+from .cache import TTLCache
+from .db import execute_sql
+from .logger import logger
+
+# 依 time_range 決定搜尋結果可沿用多久（秒），範圍越短的查詢結果變動越快
+DEFAULT_TTL_BY_TIME_RANGE = {
+    None: 3600,
+    "day": 600,
+    "week": 1800,
+    "month": 6 * 3600,
+    "year": 24 * 3600,
+}
+
+
+class SearchResultCache:
+    """SearxNG 查詢結果快取：記憶體 LRU + TTL，可選擇以資料庫 search_cache 表做持久層
+
+    持久層的 SQL 使用 psycopg2 的 %s 參數，db_handler 需為 PostgresHandler（不支援 SQLite 的 DBHandler）。
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 512,
+        ttl_by_time_range: Optional[Dict[Optional[str], float]] = None,
+        db_handler=None,
+        table: str = "search_cache",
+    ):
+        self.ttl_by_time_range = {**DEFAULT_TTL_BY_TIME_RANGE, **(ttl_by_time_range or {})}
+        self.memory = TTLCache(maxsize=maxsize, ttl=self.ttl_by_time_range[None])
+        self.db = db_handler
+        self.table = table
+
+    @staticmethod
+    def make_key(params: Dict) -> str:
+        normalized = {}
+        for key, value in params.items():
+            if value is None or value == "":
+                continue
+            if key == "q":
+                value = " ".join(str(value).split()).lower()
+            elif key in ("engines", "categories"):
+                value = ",".join(sorted(v.strip() for v in str(value).split(",") if v.strip()))
+            normalized[key] = value
+        payload = json.dumps(normalized, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    def get_ttl(self, params: Dict) -> float:
+        time_range = params.get("time_range")
+        return self.ttl_by_time_range.get(time_range, self.ttl_by_time_range[None])
+
+    def get(self, params: Dict) -> Optional[Dict]:
+        key = self.make_key(params)
+        data = self.memory.get(key)
+        if data is not None:
+            return data
+        if self.db is None:
+            return None
+
+        sql = f"SELECT results, fetched_at FROM {self.table} WHERE cache_key = %s"
+        result = execute_sql(self.db, sql, [key], prepared=True)
+        if not result["formatted_data"]:
+            return None
+
+        row = result["formatted_data"][0]
+        remaining = self.get_ttl(params) - (datetime.now() - row["fetched_at"]).total_seconds()
+        if remaining <= 0:
+            return None
+        data = json.loads(row["results"])
+        self.memory.set(key, data, ttl=remaining)
+        return data
+
+    def set(self, params: Dict, data: Dict):
+        key = self.make_key(params)
+        self.memory.set(key, data, ttl=self.get_ttl(params))
+        if self.db is None:
+            return
+
+        sql = f"""
+            INSERT INTO {self.table} (cache_key, query, results, fetched_at)
+            VALUES (%s, %s, %s, %s)
+            ON CONFLICT (cache_key) DO UPDATE
+            SET results = EXCLUDED.results, fetched_at = EXCLUDED.fetched_at
+        """
+        result = self.db._execute_sql(sql, [key, params.get("q"), json.dumps(data, ensure_ascii=False), datetime.now()])
+        if not result["indicator"]:
+            logger.warning(f"[搜尋快取] 寫入資料庫失敗：{result['message']}")
+
+    def invalidate(self, params: Optional[Dict] = None):
+        """清除記憶體層快取；持久層的資料會依 TTL 自然失效"""
+        self.memory.invalidate(None if params is None else self.make_key(params))
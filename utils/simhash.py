@@ -0,0 +1,140 @@
+import hashlib
+import re
+import threading
+from collections import Counter
+from typing import Dict, List, Optional, Set, Tuple
+
+from .db import execute_sql
+from .logger import logger
+
+FINGERPRINT_BITS = 64
+# article_fingerprints 表的分段欄位數（band0 … band5），對應預設 max_distance=5
+DB_BANDS = 6
+
+
+def simhash(text: str, ngram: int = 3) -> Optional[int]:
+    """以字元 n-gram 計算 64-bit SimHash（中文沒有空白分詞，直接取字元片段）"""
+    text = re.sub(r"\s+", "", text or "")
+    if len(text) < ngram:
+        return None
+
+    weights = [0] * FINGERPRINT_BITS
+    shingles = Counter(text[i:i + ngram] for i in range(len(text) - ngram + 1))
+    for shingle, count in shingles.items():
+        h = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(FINGERPRINT_BITS):
+            weights[bit] += count if h >> bit & 1 else -count
+
+    fingerprint = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def split_bands(fingerprint: int, bands: int) -> List[int]:
+    """切成 bands 段，無法整除時前幾段多分 1 bit（64 / 6 → 11, 11, 11, 11, 10, 10）"""
+    values = []
+    shift = 0
+    for i in range(bands):
+        width = FINGERPRINT_BITS // bands + (1 if i < FINGERPRINT_BITS % bands else 0)
+        values.append((fingerprint >> shift) & ((1 << width) - 1))
+        shift += width
+    return values
+
+
+def to_signed(fingerprint: int) -> int:
+    """轉成 PostgreSQL BIGINT 可存的有號整數"""
+    return fingerprint - (1 << 64) if fingerprint >= 1 << 63 else fingerprint
+
+
+def to_unsigned(value: int) -> int:
+    return value + (1 << 64) if value < 0 else value
+
+
+class NearDuplicateIndex:
+    """SimHash 的 LSH 索引，用來找出轉載的近似重複文章
+
+    64-bit 指紋切成 max_distance + 1 段，Hamming 距離不超過 max_distance 的兩份指紋
+    至少有一段完全相同，因此只需以各段精確比對取出候選，再計算實際距離。
+    記憶體中保留本程序寫入的指紋；設定 db_handler 時另存於 article_fingerprints 表，
+    各段皆有索引，查詢不需掃描整張表（SQL 使用 psycopg2 的 %s 參數並以 tuple 讀取，db_handler 需為 PostgresHandler）。
+
+    max_distance 預設 5：中文新聞改幾個字、加上編輯署名約差 2～6 bit，無關文章約差 32 bit。
+    """
+
+    def __init__(self, db_handler=None, max_distance: int = 5, table: str = "article_fingerprints"):
+        if not 0 <= max_distance < FINGERPRINT_BITS // 2:
+            raise ValueError(f"max_distance 需介於 0 到 {FINGERPRINT_BITS // 2 - 1}")
+        if db_handler is not None and max_distance + 1 != DB_BANDS:
+            raise ValueError(f"{table} 表固定為 {DB_BANDS} 段，使用 DB 時 max_distance 需為 {DB_BANDS - 1}")
+        self.db = db_handler
+        self.max_distance = max_distance
+        self.bands = max_distance + 1
+        self.table = table
+        self._lock = threading.Lock()
+        self._buckets: List[Dict[int, Set[Tuple[int, str]]]] = [{} for _ in range(self.bands)]
+
+    def _find_in_memory(self, fingerprint: int, exclude: Optional[str]) -> Optional[str]:
+        for i, band in enumerate(split_bands(fingerprint, self.bands)):
+            for other, url in self._buckets[i].get(band, ()):
+                if url != exclude and hamming_distance(fingerprint, other) <= self.max_distance:
+                    return url
+        return None
+
+    def _find_in_db(self, fingerprint: int, exclude: Optional[str]) -> Optional[str]:
+        if self.db is None:
+            return None
+        conditions = " OR ".join(f"band{i} = %s" for i in range(self.bands))
+        sql = f"SELECT url, simhash FROM {self.table} WHERE {conditions}"
+        result = execute_sql(self.db, sql, split_bands(fingerprint, self.bands), prepared=True)
+        for url, value in result["data"]:
+            if url != exclude and hamming_distance(fingerprint, to_unsigned(value)) <= self.max_distance:
+                return url
+        return None
+
+    def find(self, fingerprint: int, exclude: Optional[str] = None) -> Optional[str]:
+        """回傳近似重複的既有文章 URL，沒有則回傳 None"""
+        with self._lock:
+            found = self._find_in_memory(fingerprint, exclude)
+        return found or self._find_in_db(fingerprint, exclude)
+
+    def _add_to_memory(self, url: str, fingerprint: int):
+        for i, band in enumerate(split_bands(fingerprint, self.bands)):
+            self._buckets[i].setdefault(band, set()).add((fingerprint, url))
+
+    def _add_to_db(self, url: str, fingerprint: int):
+        if self.db is None:
+            return
+        columns = ", ".join(f"band{i}" for i in range(self.bands))
+        placeholders = ", ".join(["%s"] * (self.bands + 2))
+        sql = (
+            f"INSERT INTO {self.table} (url, simhash, {columns}) VALUES ({placeholders}) "
+            "ON CONFLICT (url) DO NOTHING"
+        )
+        result = execute_sql(self.db, sql, [url, to_signed(fingerprint)] + split_bands(fingerprint, self.bands), prepared=True)
+        if not result["indicator"]:
+            logger.error(f"[NearDuplicateIndex] 指紋寫入失敗：{url} → {result['message']}")
+
+    def add(self, url: str, fingerprint: int):
+        with self._lock:
+            self._add_to_memory(url, fingerprint)
+        self._add_to_db(url, fingerprint)
+
+    def find_or_add(self, url: str, fingerprint: int) -> Optional[str]:
+        """找到近似重複則回傳其 URL，否則將此篇加入索引並回傳 None"""
+        duplicate_of = self._find_in_db(fingerprint, url)
+        if duplicate_of is not None:
+            return duplicate_of
+        # 記憶體內的查詢與加入需一起持鎖，避免同時完成的兩篇轉載互相錯過
+        with self._lock:
+            duplicate_of = self._find_in_memory(fingerprint, url)
+            if duplicate_of is None:
+                self._add_to_memory(url, fingerprint)
+        if duplicate_of is None:
+            self._add_to_db(url, fingerprint)
+        return duplicate_of
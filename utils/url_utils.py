@@ -0,0 +1,150 @@
+import re
+import string
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qsl, quote, urlencode, urlsplit, urlunsplit
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# 追蹤用參數，不影響頁面內容
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "msclkid", "yclid", "igshid",
+    "mc_cid", "mc_eid", "_ga", "_gl", "ref_src", "spm",
+}
+TRACKING_PREFIXES = ("utm_",)
+AMP_PARAMS = {"amp", "amp_js_v", "usqp", "outputtype"}
+
+# 行動版 / AMP 子網域與 www 視為同一站
+HOST_PREFIXES = ("www.", "m.", "mobile.", "amp.")
+
+# 常見的多層公共後綴；去除前綴後只剩這些（如 www.com.tw → com.tw）時不去除
+MULTI_LABEL_SUFFIXES = {
+    "com.tw", "net.tw", "org.tw", "edu.tw", "gov.tw", "idv.tw",
+    "com.hk", "net.hk", "org.hk", "edu.hk", "gov.hk",
+    "com.cn", "net.cn", "org.cn", "gov.cn",
+    "co.jp", "ne.jp", "or.jp", "ac.jp", "go.jp",
+    "co.kr", "or.kr",
+    "co.uk", "org.uk", "ac.uk", "gov.uk",
+    "com.au", "net.au", "org.au",
+    "com.sg", "com.my", "co.nz", "co.in", "com.br",
+}
+
+PATH_SAFE = "/:@!$&'()*+,;=-._~"
+UNRESERVED = frozenset(string.ascii_letters + string.digits + "-._~")
+_PERCENT_ESCAPE_RE = re.compile(r"(%[0-9A-Fa-f]{2})")
+
+
+@dataclass(frozen=True)
+class CanonicalRule:
+    """單一網域的正規化規則"""
+
+    drop_params: Tuple[str, ...] = ()
+    # 指定時只保留這些參數（空 tuple 表示全部移除）
+    keep_params: Optional[Tuple[str, ...]] = None
+    # 統一改寫的主機名稱
+    host: Optional[str] = None
+
+
+DOMAIN_RULES: Dict[str, CanonicalRule] = {
+    "msn.com": CanonicalRule(drop_params=("ocid", "cvid", "ei", "pc", "apiversion")),
+    "ctee.com.tw": CanonicalRule(keep_params=()),
+    "youtube.com": CanonicalRule(keep_params=("v",)),
+}
+
+
+def register_canonical_rule(domain: str, rule: CanonicalRule):
+    DOMAIN_RULES[domain.lower().lstrip(".")] = rule
+
+
+def _find_rule(host: str) -> CanonicalRule:
+    labels = host.split(".")
+    for i in range(len(labels)):
+        rule = DOMAIN_RULES.get(".".join(labels[i:]))
+        if rule is not None:
+            return rule
+    return CanonicalRule()
+
+
+def _is_registrable(host: str) -> bool:
+    labels = host.split(".")
+    if len(labels) < 2:
+        return False
+    if ".".join(labels[-2:]) in MULTI_LABEL_SUFFIXES:
+        return len(labels) > 2
+    return True
+
+
+def _strip_host_prefix(host: str) -> str:
+    for prefix in HOST_PREFIXES:
+        if host.startswith(prefix) and _is_registrable(host[len(prefix):]):
+            return host[len(prefix):]
+    return host
+
+
+def _normalize_path(path: str) -> str:
+    # 只解碼未保留字元的跳脫（%7E → ~），%2F 等保留字元維持編碼、十六進位統一大寫；其餘字元補上編碼
+    pieces = _PERCENT_ESCAPE_RE.split(path)
+    for i, piece in enumerate(pieces):
+        if i % 2:
+            char = chr(int(piece[1:], 16))
+            pieces[i] = char if char in UNRESERVED else piece.upper()
+        else:
+            pieces[i] = quote(piece, safe=PATH_SAFE)
+    return "".join(pieces)
+
+
+def _strip_amp_path(path: str) -> str:
+    path = re.sub(r"\.amp(\.html?)$", r"\1", path)
+    segments = path.split("/")
+    if len(segments) > 2 and segments[1] == "amp":
+        segments.pop(1)
+    if len(segments) > 2 and segments[-1] == "amp":
+        segments.pop()
+    elif len(segments) > 3 and segments[-1] == "" and segments[-2] == "amp":
+        segments.pop(-2)
+    return "/".join(segments)
+
+
+def canonicalize_url(url: str) -> str:
+    """正規化 URL，作為快取查詢、結果去重與 DB 的鍵（不一定能直接下載，下載仍用原始 URL）
+
+    - scheme / host 轉小寫，去除預設 port、fragment 與 www. / m. / amp. 等前綴
+    - 移除 utm_*、fbclid 等追蹤參數與 AMP 參數，其餘參數排序
+    - 去除 AMP 路徑（/amp、.amp.html）與結尾斜線，統一百分比編碼（不解碼 %2F 等保留字元）
+    - 依 DOMAIN_RULES 套用網域專屬規則
+
+    port 無效等無法解析的 URL 原樣（去除前後空白）回傳。
+    """
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except ValueError:
+        return url.strip()
+    scheme = parts.scheme.lower()
+    host = _strip_host_prefix((parts.hostname or "").lower())
+    rule = _find_rule(host)
+    host = rule.host or host
+    if port and port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{port}"
+
+    path = _normalize_path(parts.path)
+    path = _strip_amp_path(path)
+    if len(path) > 1:
+        path = path.rstrip("/")
+    path = path or "/"
+
+    params = []
+    for key, value in parse_qsl(parts.query, keep_blank_values=True):
+        lowered = key.lower()
+        if rule.keep_params is not None:
+            if key in rule.keep_params:
+                params.append((key, value))
+            continue
+        if lowered in TRACKING_PARAMS or lowered in AMP_PARAMS or lowered.startswith(TRACKING_PREFIXES):
+            continue
+        if key in rule.drop_params:
+            continue
+        params.append((key, value))
+    query = urlencode(sorted(params), quote_via=quote)
+
+    return urlunsplit((scheme, host, path, query, ""))